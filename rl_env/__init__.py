@@ -19,7 +19,12 @@ Example usage:
 """
 
 from .slack_gym_env import SlackGymEnv, make_slack_env
+from .sim_backend import SimSlackBackend, SimSlackGymEnv
+from .traces import ReplayBackend, ReplaySlackEnv, TraceRecorder
 
 __version__ = '1.0.0'
-__all__ = ['SlackGymEnv', 'make_slack_env']
+__all__ = [
+    'SlackGymEnv', 'make_slack_env', 'SimSlackBackend', 'SimSlackGymEnv',
+    'ReplayBackend', 'ReplaySlackEnv', 'TraceRecorder'
+]
 
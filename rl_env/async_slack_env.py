@@ -0,0 +1,484 @@
+"""
+Asyncio Slack RL Environment
+============================
+
+An asyncio-native variant of SlackGymEnv. HTTP calls go through a shared
+``aiohttp`` connection pool and real-time events through
+``socketio.AsyncClient``, so a single event loop can drive hundreds of
+agent sessions against one backend. Sessions in the same workspace share
+one AsyncWorkspacePoller, so channel info, presence and unread counts are
+filled as in SlackGymEnv.
+
+Example usage:
+    import asyncio
+    from rl_env.async_slack_env import AsyncSlackEnv, make_http_session, run_sessions
+
+    async def main():
+        session = make_http_session(limit=200)
+        envs = [
+            AsyncSlackEnv(session=session, agent_email=f"agent{i}@slack.ai")
+            for i in range(100)
+        ]
+        results = await run_sessions(envs, n_steps=100)
+        await session.close()
+
+    asyncio.run(main())
+"""
+
+import asyncio
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+import gymnasium as gym
+import numpy as np
+from socketio import AsyncClient as AsyncSocketIOClient
+
+try:
+    from .slack_gym_env import EMOJI_MAP, SlackGymEnv
+    from .workspace_poller import AsyncWorkspacePoller
+except ImportError:  # running from inside rl_env/
+    from slack_gym_env import EMOJI_MAP, SlackGymEnv
+    from workspace_poller import AsyncWorkspacePoller
+
+
+# Event loop -> (backend_url, workspace_id) -> poller shared by the sessions
+# in that workspace; pollers run as tasks, so they never cross loops
+_WORKSPACE_POLLERS: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]' = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def make_http_session(limit: int = 256, limit_per_host: int = 0) -> aiohttp.ClientSession:
+    """
+    Create a keep-alive connection pool to share between AsyncSlackEnvs.
+
+    Args:
+        limit: Maximum open connections in the pool
+        limit_per_host: Maximum connections per host (0 = no extra limit)
+    """
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host)
+    return aiohttp.ClientSession(connector=connector)
+
+
+class AsyncSlackEnv(SlackGymEnv):
+    """
+    SlackGymEnv with coroutine reset()/step()/close().
+
+    Observation, action space, reward and message decoding are inherited;
+    only the network I/O is replaced. Pass the same ``session`` to many
+    environments so they share one connection pool. Workspace features come
+    from one AsyncWorkspacePoller per workspace (poll_interval=0 disables it).
+
+    Args:
+        session: Shared aiohttp.ClientSession (one is created if omitted)
+        **kwargs: Passed through to SlackGymEnv
+    """
+
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None, **kwargs):
+        super(AsyncSlackEnv, self).__init__(**kwargs)
+        # The blocking pool of the parent class is never used
+        self.http.close()
+
+        self.session = session
+        self._owns_session = session is None
+
+        # Set by the socket handler on every new message (see wait_for)
+        self._arrived = asyncio.Event()
+
+    async def reset(
+        self,
+        seed: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Reset the environment and return the initial observation and info."""
+        gym.Env.reset(self, seed=seed)
+        self._start_episode()
+
+        if self.session is None:
+            self.session = make_http_session()
+
+        # Authenticate and setup workspace, unless a cached session is still valid
+        if not self._restore_session():
+            await self._authenticate()
+            await self._setup_environment()
+            self._store_session()
+
+        # Connect to WebSocket (reuses a live connection)
+        await self._connect_socket()
+        await self._start_poller()
+
+        return self._get_observation(), self._reset_info()
+
+    async def step(self, action: Dict[str, Any]) -> Tuple[Dict, float, bool, bool, Dict]:
+        """Execute action and return observation, reward, terminated, truncated, info."""
+        self.current_step += 1
+        seq_before = self.messages.total
+        reply_to = self._last_incoming
+
+        action_result = await self._execute_action(action)
+        wait = None
+        if self.wait_for is not None:
+            wait = await self._wait_for_events(action_result, seq_before)
+        reward = self._calculate_reward(action, action_result, reply_to)
+        truncated = self.current_step >= self.max_steps
+        observation = self._get_observation()
+
+        info = {
+            'action_success': action_result['success'],
+            'messages_received': len(self.messages),
+            'current_step': self.current_step
+        }
+        if self.poller is not None:
+            info['feature_staleness'] = self.poller.staleness()
+        if wait is not None:
+            info['wait'] = wait
+
+        return observation, reward, False, truncated, info
+
+    async def close(self):
+        """Leave the workspace poller, disconnect the socket and close the pool if owned."""
+        await self._stop_poller()
+        if self.sio_client:
+            await self.sio_client.disconnect()
+            self.sio_client = None
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    # ==================== Private Methods ====================
+
+    async def _request(self, method: str, path: str, retry: bool = True, **kwargs) -> Tuple[int, Any]:
+        """
+        Call the backend API over the shared pool; returns (status, json).
+
+        On 401 the cached session is invalidated and the request is retried
+        once with a fresh login.
+        """
+        headers = {'Authorization': f'Bearer {self.session_id}'} if self.session_id else {}
+        async with self.session.request(
+            method, f"{self.backend_url}{path}", headers=headers, **kwargs
+        ) as response:
+            status = response.status
+            data = await response.json() if response.content_type == 'application/json' else None
+
+        if status == 401 and self.session_id and retry:
+            self._invalidate_session()
+            await self._authenticate()
+            self._store_session()
+            return await self._request(method, path, retry=False, **kwargs)
+
+        return status, data
+
+    async def _poll_request(self, method: str, path: str, **kwargs) -> Tuple[int, Any]:
+        """Request for the workspace poller; a 401 is left for the session to re-authenticate."""
+        return await self._request(method, path, retry=False, **kwargs)
+
+    async def _start_poller(self):
+        """Attach to the workspace's shared poller, starting it for the first session."""
+        if self.poll_interval <= 0 or self.workspace_id is None:
+            return
+        pollers = _WORKSPACE_POLLERS.setdefault(asyncio.get_running_loop(), {})
+        key = (self.backend_url, self.workspace_id)
+        poller = pollers.get(key)
+        if self.poller is not None and self.poller is poller:
+            return
+        await self._stop_poller()
+        if poller is None:
+            poller = pollers[key] = AsyncWorkspacePoller(
+                self.workspace_id, interval=self.poll_interval
+            )
+        poller.attach(self._poll_request)
+        self.poller = poller
+        await poller.start()
+
+    async def _stop_poller(self):
+        """Detach from the shared poller, stopping it after its last session."""
+        poller, self.poller = self.poller, None
+        if poller is None or poller.detach(self._poll_request):
+            return
+        pollers = _WORKSPACE_POLLERS.get(asyncio.get_running_loop(), {})
+        key = (self.backend_url, poller.workspace_id)
+        if pollers.get(key) is poller:
+            del pollers[key]
+        await poller.stop()
+
+    def _workspace_features(self, out: Dict[str, np.ndarray]):
+        """As SlackGymEnv, with channel_info relative to this session's channel."""
+        super(AsyncSlackEnv, self)._workspace_features(out)
+        if self.poller is not None:
+            np.copyto(out['channel_info'], self.poller.channel_info(self.current_channel_id))
+
+    async def _authenticate(self):
+        """Authenticate the RL agent."""
+        status, data = await self._request(
+            'POST', '/api/auth/login', retry=False,
+            json={'email': self.agent_email, 'password': self.agent_password}
+        )
+        if status != 200:
+            # Create account if doesn't exist
+            status, data = await self._request(
+                'POST', '/api/auth/register', retry=False,
+                json={
+                    'username': self._agent_username(),
+                    'email': self.agent_email,
+                    'password': self.agent_password
+                }
+            )
+            if status != 200:
+                raise Exception("Failed to authenticate RL agent")
+
+        self.session_id = data.get('sessionId')
+        self.user_id = data.get('user', {}).get('id')
+
+    async def _setup_environment(self):
+        """Setup workspace and channels."""
+        status, workspaces = await self._request('GET', '/api/workspaces')
+        if status == 200:
+            if workspaces:
+                self.workspace_id = workspaces[0]['id']
+            else:
+                status, data = await self._request(
+                    'POST', '/api/workspaces',
+                    json={'name': 'RL Training Space', 'slug': 'rl-training'}
+                )
+                if status == 200:
+                    # server/index.js returns the workspace itself
+                    self.workspace_id = data.get('workspace', data)['id']
+
+        status, channels = await self._request(
+            'GET', f"/api/workspaces/{self.workspace_id}/channels"
+        )
+        if status == 200:
+            self._channel_ids = [c['id'] for c in channels]
+            self._channel_names_by_id = {c['id']: c.get('name', '') for c in channels}
+            self._member_ids = None
+            if channels:
+                self.current_channel_id = channels[0]['id']
+
+    async def _workspace_channels(self) -> List[str]:
+        """Channel ids of the workspace (fetched once, extended by create-channel)."""
+        if self._channel_ids is None:
+            status, channels = await self._request(
+                'GET', f"/api/workspaces/{self.workspace_id}/channels"
+            )
+            if status != 200:
+                return []
+            self._channel_ids = [c['id'] for c in channels]
+            self._channel_names_by_id = {c['id']: c.get('name', '') for c in channels}
+        return self._channel_ids
+
+    def _channel_names(self) -> Dict[str, str]:
+        # _workspace_channels() is a coroutine here; rewards use the fetched list
+        return {cid: self._channel_names_by_id.get(cid, '') for cid in self._channel_ids or []}
+
+    async def _workspace_members(self) -> List[str]:
+        """User ids of the other workspace members (fetched once)."""
+        if self._member_ids is None:
+            status, members = await self._request(
+                'GET', f"/api/workspaces/{self.workspace_id}/members"
+            )
+            if status != 200:
+                return []
+            self._member_ids = [
+                m['user_id'] for m in members if m.get('user_id') != self.user_id
+            ]
+        return self._member_ids
+
+    async def _connect_socket(self):
+        """Connect to WebSocket (reusing a live connection) and join the current channel."""
+        if self.sio_client is None or not self.sio_client.connected:
+            try:
+                self.sio_client = AsyncSocketIOClient()
+                self._room = None
+
+                @self.sio_client.on('new-message')
+                async def on_message(data):
+                    self._on_new_message(data)
+                    self._arrived.set()
+
+                await self.sio_client.connect(self.backend_url)
+                await self.sio_client.emit('user-online', {
+                    'userId': self.user_id,
+                    'workspaceId': self.workspace_id
+                })
+            except Exception as e:
+                print(f"Socket connection error: {e}")
+                return
+
+        # new-message is broadcast to the channel's room only
+        if self.current_channel_id is not None:
+            await self._join_room(self.current_channel_id)
+
+    async def _join_room(self, channel_id: str):
+        """Move the socket into a channel's room, leaving the previous one."""
+        if self._room is not None and self._room != channel_id:
+            await self.sio_client.emit('leave-channel', self._room)
+        await self.sio_client.emit('join-channel', channel_id)
+        self._room = channel_id
+
+    async def _wait_for_events(self, action_result: Dict[str, Any], since: int) -> Optional[Dict[str, Any]]:
+        """
+        Await the wait_for condition without blocking the event loop.
+
+        Same contract as SlackGymEnv._wait_for_events; messages arrive on
+        this loop, so an asyncio.Event replaces the store's condition.
+        """
+        predicate = self._wait_predicate(action_result)
+        if predicate is None:
+            return None
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + self.wait_timeout
+        satisfied = predicate(self.messages.since(since))
+        while not satisfied and loop.time() < deadline:
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), deadline - loop.time())
+            except asyncio.TimeoutError:
+                pass
+            satisfied = predicate(self.messages.since(since))
+        return {'satisfied': satisfied, 'seconds': loop.time() - start}
+
+    async def _execute_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute the action and return result."""
+        action_type = action['action_type']
+        result = {'success': False, 'message': ''}
+
+        try:
+            if action_type == 0:  # Send message
+                if self.sio_client:
+                    message_text = self._decode_message(action['message_embedding'])
+                    await self.sio_client.emit('send-message', {
+                        'channelId': self.current_channel_id,
+                        'content': message_text,
+                        'userId': self.user_id
+                    })
+                    result = {'success': True, 'message': 'Message sent', 'content': message_text}
+
+            elif action_type == 1:  # React to message
+                last_msg = self.messages.last()
+                if last_msg is not None:
+                    status, data = await self._request(
+                        'POST', f"/api/messages/{last_msg.id}/reactions",
+                        json={'emoji': EMOJI_MAP[action['emoji'] % len(EMOJI_MAP)]}
+                    )
+                    if status == 200:
+                        removed = bool(data and data.get('removed'))
+                        result = {'success': True,
+                                  'message': 'Reaction removed' if removed else 'Reaction added'}
+                    else:
+                        result = {'success': False, 'message': f'HTTP {status}'}
+
+            elif action_type == 2:  # Create channel
+                status, data = await self._request(
+                    'POST', f"/api/workspaces/{self.workspace_id}/channels",
+                    json={
+                        'name': f"rl-channel-{int(action['target_id'])}",
+                        'description': 'Created by RL agent',
+                        'isPrivate': False
+                    }
+                )
+                if status == 200:
+                    if self._channel_ids is not None:
+                        self._channel_ids.append(data['id'])
+                    self._channel_names_by_id[data['id']] = data.get('name', '')
+                    if self.poller is not None:
+                        self.poller.refresh_channels()
+                    result = {'success': True, 'message': 'Channel created', 'channel_id': data['id']}
+
+            elif action_type == 3:  # Join channel
+                channel_ids = await self._workspace_channels()
+                if channel_ids and self.sio_client:
+                    channel_id = channel_ids[int(action['target_id']) % len(channel_ids)]
+                    await self._join_room(channel_id)
+                    self.current_channel_id = channel_id
+                    result = {'success': True, 'message': 'Joined channel'}
+
+            elif action_type == 4:  # Send DM
+                member_ids = await self._workspace_members()
+                if member_ids and self.sio_client:
+                    other_id = member_ids[int(action['target_id']) % len(member_ids)]
+                    status, data = await self._request(
+                        'POST', '/api/dm-conversations', json={'userId': other_id}
+                    )
+                    if status == 200:
+                        message_text = self._decode_message(action['message_embedding'])
+                        await self.sio_client.emit('join-dm', data['id'])
+                        await self.sio_client.emit('send-message', {
+                            'dmConversationId': data['id'],
+                            'content': message_text,
+                            'userId': self.user_id
+                        })
+                        result = {'success': True, 'message': 'DM sent', 'content': message_text}
+
+            elif action_type == 5:  # Mark as read
+                status, _ = await self._request(
+                    'POST', f"/api/channels/{self.current_channel_id}/mark-read"
+                )
+                result = {'success': status == 200, 'message': 'Marked as read'}
+                if result['success'] and self.poller is not None:
+                    self.poller.mark_read(self.current_channel_id)
+
+            elif action_type == 6:  # Pin message
+                last_msg = self.messages.last()
+                if last_msg is not None:
+                    last_msg_id = last_msg.id
+                    status, _ = await self._request(
+                        'POST', f"/api/messages/{last_msg_id}/pin",
+                        json={'channelId': self.current_channel_id}
+                    )
+                    result = {'success': status == 200, 'message': 'Message pinned'}
+
+            elif action_type == 7:  # Search messages
+                last_msg = self.messages.last()
+                words = last_msg.content.split() if last_msg is not None else []
+                if words:
+                    status, results = await self._request(
+                        'GET', f"/api/workspaces/{self.workspace_id}/search",
+                        params={'q': words[0]}
+                    )
+                    if status == 200:
+                        result = {'success': bool(results), 'message': f'{len(results)} results'}
+
+            elif action_type == 8:  # No action
+                result = {'success': True, 'message': 'No action taken'}
+
+        except Exception as e:
+            result = {'success': False, 'message': str(e)}
+
+        return result
+
+
+async def run_sessions(
+    envs: List[AsyncSlackEnv],
+    policy: Optional[Callable[[Dict[str, np.ndarray]], Dict[str, Any]]] = None,
+    n_steps: int = 100
+) -> List[float]:
+    """
+    Drive many agent sessions concurrently from one event loop.
+
+    Each session runs its own reset/step loop, so requests from different
+    sessions are in flight at the same time over the shared pool instead
+    of waiting on each other.
+
+    Args:
+        envs: Environments to run (ideally sharing one session)
+        policy: Maps an observation to an action (random if omitted)
+        n_steps: Steps per session
+
+    Returns:
+        Total reward per session
+    """
+    async def run_one(env: AsyncSlackEnv) -> float:
+        obs, info = await env.reset()
+        total_reward = 0.0
+        for _ in range(n_steps):
+            action = policy(obs) if policy else env.action_space.sample()
+            obs, reward, terminated, truncated, info = await env.step(action)
+            total_reward += reward
+            if terminated or truncated:
+                obs, info = await env.reset()
+        return total_reward
+
+    return await asyncio.gather(*(run_one(env) for env in envs))
@@ -0,0 +1,374 @@
+"""
+Environment Benchmarks
+======================
+
+Reproducible throughput and latency measurements for the Slack
+environments, written as JSON so runs can be compared across commits.
+
+For every case and environment count it measures:
+
+- steps/sec over a fixed number of steps with pre-sampled actions
+  (auto-resets included, action sampling excluded)
+- reset latency (per environment, p50/p95)
+- observation build time
+- Python heap memory per environment (tracemalloc, in a separate pass)
+
+Cases:
+    simple  SimpleSlackEnv
+    sim     SlackGymEnv on the in-process simulated backend
+    http    SlackGymEnv against a running backend (--backend-url)
+    mock    SlackGymEnv against the in-memory mock backend, started in a
+            subprocess per run (--mock-latency)
+    vec     SlackVecEnv (natively vectorized simulator)
+    shm     SharedMemoryVecEnv of simulated envs in worker processes
+
+Example usage:
+    python benchmark.py --cases sim vec --envs 1 8 64 --json bench.json
+    python benchmark.py --cases sim vec --envs 1 8 64 --baseline bench.json
+    python benchmark.py --cases mock --envs 1 8 --mock-latency 2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+try:
+    from .mock_backend import MockBackendProcess
+    from .shm_vec_env import SharedMemoryVecEnv
+    from .simple_slack_env import SimpleSlackEnv
+    from .slack_gym_env import make_slack_env
+    from .vec_env import SlackVecEnv
+except ImportError:  # running from inside rl_env/
+    from mock_backend import MockBackendProcess
+    from shm_vec_env import SharedMemoryVecEnv
+    from simple_slack_env import SimpleSlackEnv
+    from slack_gym_env import make_slack_env
+    from vec_env import SlackVecEnv
+
+
+def _observation(result):
+    """Observation from reset(), whether it returns obs or (obs, info)."""
+    return result[0] if isinstance(result, tuple) else result
+
+
+def _done(result) -> bool:
+    """Episode end from a 4-tuple (done) or 5-tuple (terminated, truncated) step result."""
+    if len(result) == 5:
+        return bool(result[2] or result[3])
+    return bool(result[2])
+
+
+class EnvListRunner:
+    """
+    N independent single environments stepped one after another
+    (DummyVecEnv-style).
+
+    Args:
+        env_fns: One factory per environment
+        sample_action: Maps an env to a random action
+    """
+
+    def __init__(self, env_fns: Sequence[Callable], sample_action: Callable):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.envs = [fn() for fn in env_fns]
+        self.sample_action = sample_action
+        self.num_envs = len(self.envs)
+        self.can_build_observation = True
+
+    def reset(self) -> List[float]:
+        """Reset every env; returns per-env latencies in seconds."""
+        latencies = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for env in self.envs:
+                start = time.perf_counter()
+                _observation(env.reset())
+                latencies.append(time.perf_counter() - start)
+        return latencies
+
+    def sample(self, n_steps: int) -> List[List[Any]]:
+        return [[self.sample_action(env) for env in self.envs] for _ in range(n_steps)]
+
+    def step(self, actions: List[Any]):
+        for env, action in zip(self.envs, actions):
+            if _done(env.step(action)):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    env.reset()
+
+    def build_observation(self):
+        for env in self.envs:
+            env._get_observation()
+
+    def close(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for env in self.envs:
+                env.close()
+
+
+class VecRunner:
+    """
+    A VecEnv (auto-resetting) stepped with batched actions.
+
+    Args:
+        make_vec_env: Factory taking the number of envs
+        n_envs: Number of environments
+    """
+
+    def __init__(self, make_vec_env: Callable[[int], Any], n_envs: int):
+        self.env = make_vec_env(n_envs)
+        self.num_envs = n_envs
+
+    def reset(self) -> List[float]:
+        start = time.perf_counter()
+        _observation(self.env.reset())
+        return [(time.perf_counter() - start) / self.num_envs] * self.num_envs
+
+    def sample(self, n_steps: int) -> List[List[Any]]:
+        space = self.env.action_space
+        return [[space.sample() for _ in range(self.num_envs)] for _ in range(n_steps)]
+
+    def step(self, actions: List[Any]):
+        self.env.step(actions)
+
+    @property
+    def can_build_observation(self) -> bool:
+        # Worker-process envs build observations out of reach
+        return hasattr(self.env, '_get_observation')
+
+    def build_observation(self):
+        self.env._get_observation()
+
+    def close(self):
+        self.env.close()
+
+
+def _make_runner(case: str, n_envs: int, backend_url: str):
+    if case == 'simple':
+        return EnvListRunner(
+            [partial(SimpleSlackEnv, backend_url=backend_url) for _ in range(n_envs)],
+            lambda env: env.sample_action()
+        )
+    if case == 'sim':
+        return EnvListRunner(
+            [partial(make_slack_env, backend='sim', seed=i) for i in range(n_envs)],
+            lambda env: env.action_space.sample()
+        )
+    if case in ('http', 'mock'):
+        return EnvListRunner(
+            [
+                partial(make_slack_env, backend_url=backend_url,
+                        agent_email=f"bench_agent{i}@slack.ai", poll_interval=0)
+                for i in range(n_envs)
+            ],
+            lambda env: env.action_space.sample()
+        )
+    if case == 'vec':
+        return VecRunner(lambda n: SlackVecEnv(num_envs=n, seed=0), n_envs)
+    if case == 'shm':
+        return VecRunner(
+            lambda n: SharedMemoryVecEnv(
+                [partial(make_slack_env, backend='sim', seed=i) for i in range(n)],
+                n_workers=min(n, os.cpu_count() or 1)
+            ),
+            n_envs
+        )
+    raise ValueError(f"Unknown benchmark case: {case}")
+
+
+CASES = ['simple', 'sim', 'http', 'mock', 'vec', 'shm']
+
+
+def measure_memory(case: str, n_envs: int, backend_url: str, warmup_steps: int = 20) -> float:
+    """Python heap growth per env (KiB) after creation, reset and a few steps."""
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        runner = _make_runner(case, n_envs, backend_url)
+        runner.reset()
+        for actions in runner.sample(warmup_steps):
+            runner.step(actions)
+        current = tracemalloc.get_traced_memory()[0]
+        runner.close()
+    finally:
+        tracemalloc.stop()
+    return (current - baseline) / n_envs / 1024.0
+
+
+def run_case(case: str, n_envs: int, n_steps: int = 200, n_resets: int = 5,
+             obs_repeats: int = 100, backend_url: str = "http://localhost:3001",
+             memory: bool = True) -> Dict[str, Any]:
+    """Benchmark one case at one environment count."""
+    runner = _make_runner(case, n_envs, backend_url)
+    try:
+        reset_latencies = []
+        for _ in range(n_resets):
+            reset_latencies.extend(runner.reset())
+
+        actions = runner.sample(n_steps)
+        # Warm caches and connections before timing
+        for batch in actions[:min(10, n_steps)]:
+            runner.step(batch)
+
+        start = time.perf_counter()
+        for batch in actions:
+            runner.step(batch)
+        elapsed = time.perf_counter() - start
+
+        obs_time = None
+        if runner.can_build_observation:
+            start = time.perf_counter()
+            for _ in range(obs_repeats):
+                runner.build_observation()
+            obs_time = (time.perf_counter() - start) / (obs_repeats * runner.num_envs)
+    finally:
+        runner.close()
+
+    total_steps = n_steps * n_envs
+    reset_ms = np.array(reset_latencies) * 1000.0
+    result = {
+        'case': case,
+        'n_envs': n_envs,
+        'steps': total_steps,
+        'steps_per_sec': total_steps / elapsed,
+        'step_us_per_env': elapsed / total_steps * 1e6,
+        'reset_ms_p50': float(np.percentile(reset_ms, 50)),
+        'reset_ms_p95': float(np.percentile(reset_ms, 95)),
+        'obs_build_us_per_env': None if obs_time is None else obs_time * 1e6
+    }
+    if memory:
+        result['memory_kib_per_env'] = measure_memory(case, n_envs, backend_url)
+    return result
+
+
+def run_suite(cases: Sequence[str], env_counts: Sequence[int], mock_latency: float = 0.0,
+              **kwargs) -> Dict[str, Any]:
+    """
+    Benchmark every case at every env count; adds speedup over the smallest count.
+
+    The mock case runs against a fresh MockBackendProcess with mock_latency
+    seconds added per response.
+    """
+    results = []
+    for case in cases:
+        case_results = []
+        with contextlib.ExitStack() as stack:
+            case_kwargs = kwargs
+            if case == 'mock':
+                mock = stack.enter_context(MockBackendProcess(latency=mock_latency))
+                case_kwargs = dict(kwargs, backend_url=mock.url)
+            for n_envs in env_counts:
+                try:
+                    result = run_case(case, n_envs, **case_kwargs)
+                except Exception as e:
+                    print(f"  {case:>6} x{n_envs:<5} skipped: {e}")
+                    break
+                case_results.append(result)
+                obs_us = result['obs_build_us_per_env']
+                print(
+                    f"  {case:>6} x{n_envs:<5} {result['steps_per_sec']:>12,.0f} steps/s  "
+                    f"reset p50 {result['reset_ms_p50']:8.3f} ms  "
+                    f"obs {'-' if obs_us is None else f'{obs_us:.1f}':>8} us"
+                )
+        if case_results:
+            base = case_results[0]['steps_per_sec']
+            for result in case_results:
+                result['speedup'] = result['steps_per_sec'] / base
+        results.extend(case_results)
+
+    return {'meta': _metadata(), 'config': dict(kwargs, cases=list(cases),
+                                                 env_counts=list(env_counts),
+                                                 mock_latency=mock_latency),
+            'results': results}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.1) -> List[str]:
+    """Regressions of steps/sec beyond tolerance against a baseline run."""
+    previous = {(r['case'], r['n_envs']): r for r in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        old = previous.get((result['case'], result['n_envs']))
+        if old is None:
+            continue
+        ratio = result['steps_per_sec'] / old['steps_per_sec']
+        line = f"{result['case']} x{result['n_envs']}: {ratio:.2f}x steps/sec vs baseline"
+        print(f"  {line}")
+        if ratio < 1.0 - tolerance:
+            regressions.append(line)
+    return regressions
+
+
+def _metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Slack RL environments')
+    parser.add_argument('--cases', nargs='+', default=['simple', 'sim', 'vec'], choices=CASES,
+                        help='Environments to benchmark')
+    parser.add_argument('--envs', nargs='+', type=int, default=[1, 4, 16, 64],
+                        help='Environment counts for the scaling curve')
+    parser.add_argument('--steps', type=int, default=200, help='Timed steps per env')
+    parser.add_argument('--resets', type=int, default=5, help='Resets per env')
+    parser.add_argument('--backend-url', type=str, default='http://localhost:3001',
+                        help='Backend for the http case')
+    parser.add_argument('--mock-latency', type=float, default=0.0,
+                        help='Injected mock backend latency per response (ms)')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc pass')
+    parser.add_argument('--json', type=str, default=None, help='Write results to this file')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='Earlier results JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Allowed steps/sec drop vs baseline (fraction)')
+    args = parser.parse_args()
+
+    print(f"Benchmarking {', '.join(args.cases)} with {args.envs} envs")
+    results = run_suite(
+        args.cases, args.envs,
+        n_steps=args.steps,
+        n_resets=args.resets,
+        backend_url=args.backend_url,
+        mock_latency=args.mock_latency / 1000.0,
+        memory=not args.no_memory
+    )
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
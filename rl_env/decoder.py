@@ -0,0 +1,306 @@
+"""
+Action Decoders
+===============
+
+Turn the policy's ``message_embedding`` action into a reply text.
+
+A ResponseBank holds candidate replies together with their embeddings,
+computed once with a message encoder into one (n, dim) matrix. Decoders
+pick the reply whose embedding is closest (cosine) to the action:
+
+- ExactDecoder: one matrix product per batch of actions; exact, and fast
+  for banks up to tens of thousands of replies.
+- IVFDecoder: inverted-file index over spherical k-means clusters; only
+  the n_probe closest clusters are scanned, for very large banks.
+
+Both decode a whole batch of actions at once (decode_batch), which is what
+SlackVecEnv uses; single environments call decode().
+
+Example usage:
+    from rl_env.decoder import DEFAULT_RESPONSES, ResponseBank, make_decoder
+    from rl_env.encoders import make_encoder
+
+    bank = ResponseBank.from_texts(DEFAULT_RESPONSES, make_encoder('hashed', 128))
+    decoder = make_decoder('exact', bank)
+    text = decoder.decode(action['message_embedding'])
+    ids = decoder.decode_batch(actions['message_embedding'])    # (n,) bank ids
+"""
+
+import itertools
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    from .encoders import MessageEncoder
+except ImportError:  # running from inside rl_env/
+    from encoders import MessageEncoder
+
+
+# Replies the agent can send by default: short acknowledgements, questions
+# and status updates, combined with openers and sign-offs (~2.5k replies)
+_OPENERS = [
+    "", "Sure, ", "Thanks, ", "Got it, ", "Okay, ", "Good question, ",
+    "Quick note: ", "FYI, ", "Heads up: ", "Sounds good, "
+]
+_BODIES = [
+    "hello! How can I help?", "that's interesting!", "I agree with that.",
+    "can you tell me more?", "thanks for sharing!", "great point!",
+    "I'm processing that information.", "let me think about it.",
+    "I'll take a look.", "I'll review the PR now.", "the build is green on my side.",
+    "I can reproduce the error.", "I can't reproduce it yet.", "can you share the logs?",
+    "which environment is this on?", "let's discuss in standup.", "I'll follow up after lunch.",
+    "I've pinned the message.", "this should go to the support channel.",
+    "please move this thread to the right channel.", "the deploy is rolling out now.",
+    "let's roll back the last release.", "I've opened a ticket for this.",
+    "I'll update the docs.", "that's fixed in the latest version.", "is this blocking you?",
+    "can we pair on this later?", "I'll ping the on-call engineer.",
+    "please keep it respectful.", "let's keep this channel on topic.",
+    "what's the expected behavior?", "I'll add a test for that.", "the meeting moved to 3pm.",
+    "I'm out this afternoon.", "I'm on it.", "done!", "looks good to me.",
+    "I have a few comments.", "who owns this service?", "can you add more context?",
+    "I'll check with the team.", "that works for me.",
+]
+_CLOSERS = ["", " 👍", " Thanks!", " Will follow up.", " Let me know.", " 🙏"]
+
+DEFAULT_RESPONSES = list(dict.fromkeys(
+    (opener + (body[0].upper() + body[1:] if not opener else body) + closer)
+    for opener, body, closer in itertools.product(_OPENERS, _BODIES, _CLOSERS)
+))
+
+
+class ResponseBank:
+    """
+    Candidate replies and their embeddings.
+
+    Embeddings are L2-normalized float32 rows, so a dot product with an
+    action is proportional to cosine similarity.
+
+    Args:
+        texts: Candidate replies
+        embeddings: (len(texts), dim) embeddings of the replies
+    """
+
+    def __init__(self, texts: Sequence[str], embeddings: np.ndarray):
+        if len(texts) != len(embeddings):
+            raise ValueError(f"{len(texts)} texts but {len(embeddings)} embeddings")
+        if len(texts) == 0:
+            raise ValueError("Response bank is empty")
+        self.texts = list(texts)
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        self.embeddings = embeddings / np.maximum(norms, 1e-12)
+        self.embeddings.flags.writeable = False
+        self._by_text: Optional[Dict[str, np.ndarray]] = None
+
+    @classmethod
+    def from_texts(cls, texts: Sequence[str], encoder: MessageEncoder) -> 'ResponseBank':
+        """Embed texts once with encoder."""
+        return cls(texts, encoder.encode_batch(list(texts)))
+
+    @classmethod
+    def from_file(cls, path: str, encoder: MessageEncoder) -> 'ResponseBank':
+        """One reply per non-empty line of a UTF-8 text file."""
+        with open(path, encoding='utf-8') as f:
+            texts = [line.strip() for line in f if line.strip()]
+        return cls.from_texts(texts, encoder)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def embeddings_by_text(self) -> Dict[str, np.ndarray]:
+        """Text -> embedding row (read-only views), built once."""
+        if self._by_text is None:
+            self._by_text = dict(zip(self.texts, self.embeddings))
+        return self._by_text
+
+    @property
+    def embedding_dim(self) -> int:
+        return self.embeddings.shape[1]
+
+
+class MessageDecoder:
+    """
+    Base class for decoders.
+
+    Subclasses implement decode_batch(); queries need not be normalized,
+    as the argmax of the dot product with normalized rows is the same.
+
+    Args:
+        bank: Replies to choose from
+        max_scores: Bound on floats of similarity scores held at once;
+                    large batches are decoded in chunks
+    """
+
+    def __init__(self, bank: ResponseBank, max_scores: int = 1 << 22):
+        self.bank = bank
+        self.max_scores = max_scores
+
+    def decode(self, embedding: np.ndarray) -> str:
+        """Reply text for a single action embedding."""
+        return self.bank.texts[int(self.decode_batch(np.asarray(embedding)[None])[0])]
+
+    def decode_texts(self, embeddings: np.ndarray) -> List[str]:
+        """Reply texts for a batch of action embeddings."""
+        texts = self.bank.texts
+        return [texts[i] for i in self.decode_batch(embeddings)]
+
+    def decode_batch(self, embeddings: np.ndarray) -> np.ndarray:
+        """Bank ids (int64) of the closest reply for each row of (n, dim) embeddings."""
+        raise NotImplementedError
+
+    def _queries(self, embeddings: np.ndarray) -> np.ndarray:
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if queries.ndim != 2 or queries.shape[1] != self.bank.embedding_dim:
+            raise ValueError(
+                f"Expected (n, {self.bank.embedding_dim}) embeddings, got {queries.shape}"
+            )
+        return queries
+
+
+class ExactDecoder(MessageDecoder):
+    """
+    Brute-force nearest neighbour: scores = queries @ bank.T, then argmax.
+    """
+
+    def decode_batch(self, embeddings: np.ndarray) -> np.ndarray:
+        queries = self._queries(embeddings)
+        matrix_t = self.bank.embeddings.T
+        chunk = max(1, self.max_scores // len(self.bank))
+        if len(queries) <= chunk:
+            return np.argmax(queries @ matrix_t, axis=1)
+
+        ids = np.empty(len(queries), dtype=np.int64)
+        for start in range(0, len(queries), chunk):
+            stop = start + chunk
+            ids[start:stop] = np.argmax(queries[start:stop] @ matrix_t, axis=1)
+        return ids
+
+
+class IVFDecoder(MessageDecoder):
+    """
+    Approximate nearest neighbour with an inverted-file index.
+
+    Bank embeddings are clustered with spherical k-means and stored grouped
+    by cluster. A batch of queries scores the centroids, then each probed
+    cluster is scanned with one matrix product over all queries that probe
+    it. Recall rises with n_probe; n_probe = n_lists is exact.
+
+    Args:
+        bank: Replies to choose from
+        n_lists: Number of clusters (default: sqrt of the bank size)
+        n_probe: Clusters scanned per query
+        n_iter: k-means iterations
+        train_size: Bank rows sampled to fit k-means (default: 64 per cluster)
+        seed: Seed for the sample and initial centroids
+        max_scores: See MessageDecoder
+    """
+
+    def __init__(self, bank: ResponseBank, n_lists: Optional[int] = None, n_probe: int = 8,
+                 n_iter: int = 10, train_size: Optional[int] = None, seed: int = 0,
+                 max_scores: int = 1 << 22):
+        super(IVFDecoder, self).__init__(bank, max_scores)
+        vectors = bank.embeddings
+        n = len(bank)
+        self.n_lists = min(n, n_lists or max(1, int(np.sqrt(n))))
+        self.n_probe = min(n_probe, self.n_lists)
+
+        rng = np.random.default_rng(seed)
+        train_size = min(n, train_size or 64 * self.n_lists)
+        sample = vectors[rng.choice(n, train_size, replace=False)] if train_size < n else vectors
+        self.centroids = self._kmeans(sample, n_iter, rng)
+
+        # Inverted lists: bank rows sorted by cluster, list l is rows
+        # [offsets[l], offsets[l + 1])
+        assign = self._assign(vectors, self.centroids)
+        self.list_ids = np.argsort(assign, kind='stable')
+        self.list_vectors = vectors[self.list_ids]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=self.n_lists))])
+
+    def decode_batch(self, embeddings: np.ndarray) -> np.ndarray:
+        queries = self._queries(embeddings)
+        longest = int(np.max(np.diff(self.offsets)))
+        chunk = max(1, self.max_scores // max(self.n_lists, self.n_probe * longest))
+        if len(queries) <= chunk:
+            return self._search(queries)
+
+        ids = np.empty(len(queries), dtype=np.int64)
+        for start in range(0, len(queries), chunk):
+            stop = start + chunk
+            ids[start:stop] = self._search(queries[start:stop])
+        return ids
+
+    # ==================== Private Methods ====================
+
+    def _search(self, queries: np.ndarray) -> np.ndarray:
+        n = len(queries)
+        coarse = queries @ self.centroids.T
+        if self.n_probe < self.n_lists:
+            probes = np.argpartition(-coarse, self.n_probe - 1, axis=1)[:, :self.n_probe]
+        else:
+            probes = np.broadcast_to(np.arange(self.n_lists), (n, self.n_lists))
+
+        # (query, probe) pairs grouped by cluster: one matmul per probed cluster
+        pair_lists = probes.ravel()
+        pair_queries = np.repeat(np.arange(n), self.n_probe)
+        order = np.argsort(pair_lists, kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(pair_lists, minlength=self.n_lists))])
+
+        pair_score = np.full(n * self.n_probe, -np.inf, dtype=np.float32)
+        pair_id = np.zeros(n * self.n_probe, dtype=np.int64)
+        for l in np.flatnonzero(np.diff(bounds)):
+            lo, hi = self.offsets[l], self.offsets[l + 1]
+            if lo == hi:
+                continue
+            pairs = order[bounds[l]:bounds[l + 1]]
+            scores = queries[pair_queries[pairs]] @ self.list_vectors[lo:hi].T
+            col = np.argmax(scores, axis=1)
+            pair_score[pairs] = scores[np.arange(len(pairs)), col]
+            pair_id[pairs] = self.list_ids[lo + col]
+
+        best = np.argmax(pair_score.reshape(n, self.n_probe), axis=1)
+        return pair_id.reshape(n, self.n_probe)[np.arange(n), best]
+
+    def _assign(self, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        chunk = max(1, self.max_scores // len(centroids))
+        return np.concatenate([
+            np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), chunk)
+        ])
+
+    def _kmeans(self, vectors: np.ndarray, n_iter: int, rng: np.random.Generator) -> np.ndarray:
+        """Spherical k-means: centroids are re-normalized cluster means."""
+        centroids = vectors[rng.choice(len(vectors), self.n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assign = self._assign(vectors, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, vectors)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            filled = norms[:, 0] > 0
+            centroids[filled] = sums[filled] / norms[filled]
+        return centroids
+
+
+def make_decoder(name: Union[str, MessageDecoder] = 'auto', bank: Optional[ResponseBank] = None,
+                 encoder: Optional[MessageEncoder] = None, **kwargs) -> MessageDecoder:
+    """
+    Create a decoder by name ('exact', 'ivf' or 'auto').
+
+    'auto' picks exact search below 50k replies and the IVF index above.
+    Without a bank, DEFAULT_RESPONSES are embedded with encoder. Decoder
+    instances are returned unchanged.
+    """
+    if isinstance(name, MessageDecoder):
+        return name
+    if bank is None:
+        if encoder is None:
+            raise ValueError("make_decoder needs a bank or an encoder")
+        bank = ResponseBank.from_texts(DEFAULT_RESPONSES, encoder)
+    if name == 'auto':
+        name = 'exact' if len(bank) < 50000 else 'ivf'
+    if name == 'exact':
+        return ExactDecoder(bank, **kwargs)
+    if name == 'ivf':
+        return IVFDecoder(bank, **kwargs)
+    raise ValueError(f"Unknown decoder: {name}")
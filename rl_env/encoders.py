@@ -0,0 +1,277 @@
+"""
+Message Encoders
+================
+
+Turn message text into fixed-size float32 vectors for observations.
+
+- HashedNgramEncoder: fast default; hashed character n-gram features
+  computed for a whole batch of messages with a few NumPy operations.
+- TransformerEncoder: optional local sentence-transformers model.
+- EmbeddingCache: bounded LRU cache in front of any encoder, so each
+  message is embedded once instead of on every step.
+
+Example usage:
+    from rl_env.encoders import EmbeddingCache, make_encoder
+
+    cache = EmbeddingCache(make_encoder('hashed', embedding_dim=128))
+    vectors = cache.encode_messages(recent_messages)  # (n, 128)
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Sequence, Tuple, Union
+
+import numpy as np
+
+
+class MessageEncoder:
+    """
+    Base class for message encoders.
+
+    Subclasses implement encode_batch(); vectors are L2-normalized, so every
+    component lies in [-1, 1] like the observation space expects.
+    """
+
+    def __init__(self, embedding_dim: int = 128):
+        self.embedding_dim = embedding_dim
+
+    def encode(self, text: str) -> np.ndarray:
+        """Encode a single message."""
+        return self.encode_batch([text])[0]
+
+    def encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Encode many messages into a (len(texts), embedding_dim) array."""
+        raise NotImplementedError
+
+
+class HashedNgramEncoder(MessageEncoder):
+    """
+    Signed feature hashing of character n-grams.
+
+    All texts of a batch are concatenated into one byte array; every n-gram
+    is hashed with vectorized uint64 arithmetic and scattered into its
+    message's row with a single np.bincount.
+
+    Args:
+        embedding_dim: Output dimension (number of hash buckets)
+        ngram_range: Smallest and largest n-gram length in bytes
+        max_bytes: Messages are truncated to this many UTF-8 bytes
+        lowercase: Lowercase text before hashing
+    """
+
+    _MULTIPLIER = np.uint64(0x100000001B3)
+    _MIX = np.uint64(0x9E3779B97F4A7C15)
+
+    def __init__(
+        self,
+        embedding_dim: int = 128,
+        ngram_range: Tuple[int, int] = (1, 3),
+        max_bytes: int = 1024,
+        lowercase: bool = True
+    ):
+        super(HashedNgramEncoder, self).__init__(embedding_dim)
+        self.ngram_range = ngram_range
+        self.max_bytes = max_bytes
+        self.lowercase = lowercase
+
+    def encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        n_texts = len(texts)
+        dim = self.embedding_dim
+        if n_texts == 0:
+            return np.zeros((0, dim), dtype=np.float32)
+
+        encoded = [
+            (text.lower() if self.lowercase else text).encode('utf-8')[:self.max_bytes]
+            for text in texts
+        ]
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=n_texts)
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros((n_texts, dim), dtype=np.float32)
+
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+        segment = np.repeat(np.arange(n_texts), lengths)
+        # Bytes left in the same message from each position (inclusive)
+        remaining = np.repeat(np.cumsum(lengths), lengths) - np.arange(total)
+
+        rows, buckets, signs = [], [], []
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            m = total - n + 1
+            if m <= 0:
+                continue
+            valid = remaining[:m] >= n
+
+            # FNV-style rolling hash over the n bytes, seeded by n
+            h = np.full(m, n, dtype=np.uint64)
+            for k in range(n):
+                h = (h * self._MULTIPLIER) ^ data[k:k + m]
+            h = h[valid] * self._MIX
+
+            rows.append(segment[:m][valid])
+            buckets.append((h >> np.uint64(32)) % np.uint64(dim))
+            signs.append(((h >> np.uint64(31)) & np.uint64(1)).astype(np.float32) * 2.0 - 1.0)
+
+        index = np.concatenate(rows) * dim + np.concatenate(buckets).astype(np.int64)
+        features = np.bincount(
+            index, weights=np.concatenate(signs), minlength=n_texts * dim
+        ).reshape(n_texts, dim)
+
+        norms = np.linalg.norm(features, axis=1, keepdims=True)
+        np.maximum(norms, 1e-12, out=norms)
+        return (features / norms).astype(np.float32)
+
+
+class TransformerEncoder(MessageEncoder):
+    """
+    Local sentence-transformers model.
+
+    If the model's native dimension differs from embedding_dim, outputs
+    are mapped with a fixed random projection and re-normalized.
+
+    Requires: pip install sentence-transformers
+
+    Args:
+        embedding_dim: Output dimension
+        model_name: Any sentence-transformers model name or path
+        device: Torch device ('cpu', 'cuda', ...); auto-detected if None
+        batch_size: Encoding batch size
+        seed: Seed for the projection matrix
+    """
+
+    def __init__(
+        self,
+        embedding_dim: int = 128,
+        model_name: str = 'all-MiniLM-L6-v2',
+        device: str = None,
+        batch_size: int = 64,
+        seed: int = 0
+    ):
+        super(TransformerEncoder, self).__init__(embedding_dim)
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "TransformerEncoder requires sentence-transformers: "
+                "pip install sentence-transformers"
+            ) from e
+
+        self.model = SentenceTransformer(model_name, device=device)
+        self.batch_size = batch_size
+
+        native_dim = self.model.get_sentence_embedding_dimension()
+        if native_dim == embedding_dim:
+            self.projection = None
+        else:
+            rng = np.random.default_rng(seed)
+            self.projection = (
+                rng.standard_normal((native_dim, embedding_dim)) / np.sqrt(embedding_dim)
+            ).astype(np.float32)
+
+    def encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        if len(texts) == 0:
+            return np.zeros((0, self.embedding_dim), dtype=np.float32)
+
+        vectors = self.model.encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32)
+
+        if self.projection is not None:
+            vectors = vectors @ self.projection
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.maximum(norms, 1e-12)
+        return vectors
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of message embeddings.
+
+    Embeddings are keyed by message content, so a message (or any repeat of
+    the same text) is encoded once while it stays in the cache. Misses from
+    one call are encoded together in a single encode_batch().
+
+    Precomputed embeddings (e.g. the decoder's response bank, see
+    add_static()) are consulted before encoding and never evicted.
+
+    Args:
+        encoder: Encoder used for cache misses
+        capacity: Maximum number of cached embeddings
+    """
+
+    def __init__(self, encoder: MessageEncoder, capacity: int = 4096):
+        self.encoder = encoder
+        self.capacity = capacity
+        self.embedding_dim = encoder.embedding_dim
+        self._cache: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._static: Dict[str, np.ndarray] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def encode(self, text: str) -> np.ndarray:
+        """Embedding of a single text."""
+        return self.encode_texts([text])[0]
+
+    def encode_messages(self, messages: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """Embeddings of message dicts (their 'content'), shape (n, dim)."""
+        return self.encode_texts([m.get('content', '') or '' for m in messages])
+
+    def encode_texts(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings of texts, shape (n, dim); misses are batch-encoded."""
+        out = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        cache = self._cache
+        static = self._static
+        missing: Dict[str, list] = {}
+
+        for i, text in enumerate(texts):
+            vector = cache.get(text)
+            if vector is not None:
+                cache.move_to_end(text)
+            else:
+                vector = static.get(text)
+                if vector is None:
+                    missing.setdefault(text, []).append(i)
+                    continue
+            out[i] = vector
+
+        self.hits += len(texts) - sum(len(rows) for rows in missing.values())
+
+        if missing:
+            new_texts = list(missing)
+            vectors = self.encoder.encode_batch(new_texts)
+            self.misses += len(new_texts)
+            for text, vector in zip(new_texts, vectors):
+                out[missing[text]] = vector
+                vector.flags.writeable = False
+                cache[text] = vector
+            while len(cache) > self.capacity:
+                cache.popitem(last=False)
+
+        return out
+
+    def add_static(self, embeddings: Dict[str, np.ndarray]):
+        """Use precomputed text -> embedding entries; they must come from this encoder."""
+        self._static = dict(self._static, **embeddings) if self._static else embeddings
+
+    def clear(self):
+        self._cache.clear()
+
+
+def make_encoder(name: Union[str, MessageEncoder] = 'hashed', embedding_dim: int = 128,
+                 **kwargs) -> MessageEncoder:
+    """
+    Create an encoder by name ('hashed' or 'transformer').
+
+    Encoder instances are returned unchanged.
+    """
+    if isinstance(name, MessageEncoder):
+        return name
+    if name == 'hashed':
+        return HashedNgramEncoder(embedding_dim, **kwargs)
+    if name == 'transformer':
+        return TransformerEncoder(embedding_dim, **kwargs)
+    raise ValueError(f"Unknown encoder: {name}")
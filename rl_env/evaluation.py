@@ -0,0 +1,276 @@
+"""
+Parallel Policy Evaluation
+==========================
+
+Runs evaluation episodes of a saved policy across a pool of worker
+processes, isolated from training.
+
+Each worker builds its own environment once and loads the checkpoint and
+the VecNormalize statistics saved with it (frozen: ``training=False``, so
+evaluation never updates them). Every episode is reset with its own fixed
+seed, so two evaluations of the same checkpoint see the same traffic on
+the simulated backend. Results stream back as episodes finish, and
+``submit()`` returns immediately so evaluation can run alongside training.
+
+Example usage:
+    from rl_env.evaluation import ParallelEvaluator, summarize
+
+    evaluator = ParallelEvaluator(task='conversation', backend='sim', n_workers=4)
+    for result in evaluator.evaluate('models/ppo_final.zip', n_episodes=20,
+                                     vecnormalize_path='models/ppo_vecnormalize.pkl'):
+        print(result.seed, result.reward, result.length)
+
+    run = evaluator.submit('models/ckpt_50000.zip', n_episodes=20)   # non-blocking
+    ...
+    print(summarize(run.wait()))
+"""
+
+import multiprocessing as mp
+import os
+import pickle
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .shm_vec_env import _FnWrapper
+    from .slack_gym_env import make_slack_env
+except ImportError:  # running from inside rl_env/
+    from shm_vec_env import _FnWrapper
+    from slack_gym_env import make_slack_env
+
+
+class EpisodeResult(NamedTuple):
+    """Outcome of one evaluation episode."""
+    seed: int
+    reward: float
+    length: int
+    seconds: float
+    checkpoint: str
+
+
+def summarize(results: Sequence[EpisodeResult]) -> Dict[str, float]:
+    """Mean/std of episode rewards and lengths."""
+    if not len(results):
+        return {'episodes': 0}
+    rewards = np.array([r.reward for r in results], dtype=np.float64)
+    lengths = np.array([r.length for r in results], dtype=np.float64)
+    return {
+        'episodes': len(results),
+        'mean_reward': float(rewards.mean()),
+        'std_reward': float(rewards.std()),
+        'mean_length': float(lengths.mean()),
+        'std_length': float(lengths.std()),
+    }
+
+
+# ==================== Worker Process ====================
+
+# Per-process state, set up by _init_worker
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(env_fn: _FnWrapper, algorithm: str, threads: int):
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _WORKER.clear()
+    _WORKER.update(env=env_fn.fns[0](), algorithm=algorithm, policy_key=None)
+
+
+def _load_policy(checkpoint: Any, vecnormalize_path: Optional[str]):
+    """Model and frozen VecNormalize for a checkpoint, cached per process."""
+    key = (checkpoint if isinstance(checkpoint, str) else id(checkpoint), vecnormalize_path)
+    if isinstance(checkpoint, str):
+        key += (os.path.getmtime(checkpoint),)
+    if _WORKER['policy_key'] != key:
+        if isinstance(checkpoint, str):
+            import stable_baselines3
+            algorithm = getattr(stable_baselines3, _WORKER['algorithm'])
+            model = algorithm.load(checkpoint, device='cpu')
+        else:
+            model = checkpoint  # Anything with predict(obs, deterministic=...)
+        normalizer = load_normalizer(vecnormalize_path)
+        _WORKER.update(policy_key=key, model=model, normalizer=normalizer)
+    return _WORKER['model'], _WORKER['normalizer']
+
+
+def run_episode(model: Any, env: Any, seed: int, normalizer: Optional[Any] = None,
+                deterministic: bool = True) -> Tuple[float, int]:
+    """
+    Play one episode of model on a single (Gymnasium) env.
+
+    Observations go through normalizer.normalize_obs (a frozen
+    VecNormalize) if given. Returns (total reward, length).
+    """
+    obs, _ = env.reset(seed=seed)
+    total, length = 0.0, 0
+    while True:
+        policy_obs = normalizer.normalize_obs(obs) if normalizer is not None else obs
+        action, _ = model.predict(policy_obs, deterministic=deterministic)
+        obs, reward, terminated, truncated, _ = env.step(action)
+        total += float(reward)
+        length += 1
+        if terminated or truncated:
+            return total, length
+
+
+def load_normalizer(path: Optional[str]) -> Optional[Any]:
+    """VecNormalize saved with VecNormalize.save(), frozen; None without a path."""
+    if path is None:
+        return None
+    with open(path, 'rb') as f:
+        normalizer = pickle.load(f)
+    normalizer.training = False
+    return normalizer
+
+
+def _run_episode(checkpoint: Any, vecnormalize_path: Optional[str], seed: int,
+                 deterministic: bool) -> EpisodeResult:
+    model, normalizer = _load_policy(checkpoint, vecnormalize_path)
+    start = time.perf_counter()
+    total, length = run_episode(model, _WORKER['env'], seed, normalizer, deterministic)
+    name = checkpoint if isinstance(checkpoint, str) else type(checkpoint).__name__
+    return EpisodeResult(seed, total, length, time.perf_counter() - start, name)
+
+
+# ==================== Evaluator ====================
+
+class EvaluationRun:
+    """
+    Handle of a submitted evaluation; results arrive in completion order.
+
+    Args:
+        futures: One future per episode
+    """
+
+    def __init__(self, futures: List[Future]):
+        self.futures = futures
+        self.results: List[EpisodeResult] = []
+        self._pending = set(futures)
+
+    @property
+    def done(self) -> bool:
+        return not self._pending
+
+    def poll(self) -> List[EpisodeResult]:
+        """Results that finished since the last poll (never blocks)."""
+        finished = [f for f in self._pending if f.done()]
+        self._pending.difference_update(finished)
+        new = [f.result() for f in finished]
+        self.results.extend(new)
+        return new
+
+    def stream(self, timeout: Optional[float] = None) -> Iterator[EpisodeResult]:
+        """Yield the remaining results as they finish."""
+        for future in as_completed(list(self._pending), timeout=timeout):
+            self._pending.discard(future)
+            result = future.result()
+            self.results.append(result)
+            yield result
+
+    def wait(self, timeout: Optional[float] = None) -> List[EpisodeResult]:
+        """Block until every episode has finished; returns all results."""
+        for _ in self.stream(timeout):
+            pass
+        return self.results
+
+    def cancel(self):
+        for future in self._pending:
+            future.cancel()
+
+
+class ParallelEvaluator:
+    """
+    Pool of worker processes that evaluate saved policies.
+
+    Workers build their environment once, with env_fn or
+    make_slack_env(task, backend, max_steps, **env_kwargs), and keep the
+    last loaded checkpoint in memory, so repeated evaluations of one
+    checkpoint only pay for the episodes.
+
+    Args:
+        task: Task to evaluate on
+        backend: Environment backend ('sim', 'http', 'replay')
+        algorithm: stable-baselines3 class the checkpoints were saved from
+        n_workers: Worker processes (default: CPU count)
+        max_steps: Episode length
+        env_fn: Environment factory; overrides task/backend/env_kwargs
+        env_kwargs: Extra make_slack_env arguments
+        deterministic: Use the deterministic policy action
+        base_seed: Episode i is reset with seed base_seed + i
+        threads_per_worker: Torch threads per worker
+        start_method: multiprocessing start method ('fork', 'spawn', ...)
+    """
+
+    def __init__(
+        self,
+        task: str = 'conversation',
+        backend: str = 'sim',
+        algorithm: str = 'PPO',
+        n_workers: Optional[int] = None,
+        max_steps: int = 100,
+        env_fn: Optional[Callable[[], Any]] = None,
+        env_kwargs: Optional[Dict[str, Any]] = None,
+        deterministic: bool = True,
+        base_seed: int = 10_000,
+        threads_per_worker: int = 1,
+        start_method: Optional[str] = None
+    ):
+        if env_fn is None:
+            env_fn = partial(
+                make_slack_env, task=task, backend=backend, max_steps=max_steps,
+                **(env_kwargs or {})
+            )
+        self.algorithm = algorithm
+        self.deterministic = deterministic
+        self.base_seed = base_seed
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(
+            self.n_workers,
+            mp_context=mp.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(_FnWrapper([env_fn]), algorithm, threads_per_worker)
+        )
+
+    def submit(self, checkpoint: Any, n_episodes: int = 10,
+               vecnormalize_path: Optional[str] = None,
+               seeds: Optional[Sequence[int]] = None) -> EvaluationRun:
+        """
+        Start evaluating a checkpoint without waiting for it.
+
+        Args:
+            checkpoint: Path of a saved model (or a picklable object with predict())
+            n_episodes: Number of episodes
+            vecnormalize_path: VecNormalize statistics saved with the model
+            seeds: Episode seeds (default: base_seed, base_seed + 1, ...)
+        """
+        if seeds is None:
+            seeds = range(self.base_seed, self.base_seed + n_episodes)
+        futures = [
+            self.executor.submit(
+                _run_episode, checkpoint, vecnormalize_path, int(seed), self.deterministic
+            )
+            for seed in seeds
+        ]
+        return EvaluationRun(futures)
+
+    def evaluate(self, checkpoint: Any, n_episodes: int = 10,
+                 vecnormalize_path: Optional[str] = None,
+                 seeds: Optional[Sequence[int]] = None) -> Iterator[EpisodeResult]:
+        """Evaluate a checkpoint, yielding results as episodes finish."""
+        return self.submit(checkpoint, n_episodes, vecnormalize_path, seeds).stream()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -10,7 +10,6 @@ import sys
 sys.path.insert(0, '/Users/anika/midnight')
 
 from rl_env.slack_gym_env import SlackGymEnv
-import time
 
 def main():
     print("="*70)
@@ -27,7 +26,8 @@ def main():
         env = SlackGymEnv(
             backend_url="http://localhost:3001",
             task="conversation",
-            max_steps=10
+            max_steps=10,
+            wait_for='ack'  # Each step returns once our own message is echoed back
         )
         print("✅ Environment created successfully!")
     except Exception as e:
@@ -82,8 +82,6 @@ def main():
         except Exception as e:
             print(f"❌ Error at step {step + 1}: {e}")
             break
-        
-        time.sleep(0.5)  # Small delay for readability
     
     print()
     print("="*70)
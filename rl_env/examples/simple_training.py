@@ -47,13 +47,13 @@ def main():
     
     # Step 6: Test trained model
     print("\n6. Testing trained model...")
-    obs = env.reset()
+    obs, info = env.reset()
     
     for i in range(10):
         action, _states = model.predict(obs, deterministic=True)
-        obs, reward, done, info = env.step(action)
+        obs, reward, terminated, truncated, info = env.step(action)
         print(f"  Step {i+1}: Reward = {reward:.3f}")
-        if done:
+        if terminated or truncated:
             break
     
     env.close()
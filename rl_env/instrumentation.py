@@ -0,0 +1,275 @@
+"""
+Step Instrumentation
+====================
+
+Hot-path timers and counters for SlackGymEnv.step().
+
+A StepProfiler splits every step into phases (action, wait, reward, embedding,
+observation) with one lap timer, times HTTP round trips and socket emits
+separately, and keeps fixed-bucket latency histograms plus counters for
+action types and failed actions. Environments without a profiler skip all
+of this behind a single ``is not None`` check.
+
+Example usage:
+    from rl_env import make_slack_env
+    from rl_env.instrumentation import PrometheusTextExporter, StepProfiler
+
+    profiler = StepProfiler(exporters=[PrometheusTextExporter('metrics.prom')])
+    env = make_slack_env(backend='sim', profiler=profiler)
+    ...
+    print(profiler.summary()['phase/action/p95_ms'])
+"""
+
+import bisect
+import math
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+# Names of the action types, indexed by action['action_type']
+ACTION_NAMES = [
+    'send_message', 'react', 'create_channel', 'join_channel', 'send_dm',
+    'mark_read', 'pin_message', 'search', 'noop'
+]
+
+# Phases of a step, in the order they are marked
+STEP_PHASES = ['action', 'wait', 'reward', 'embedding', 'observation']
+
+# Timed calls nested inside the action phase
+IO_PHASES = ['http', 'socket_emit']
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed histogram of durations in seconds.
+
+    Buckets are spaced ``buckets_per_decade`` per factor of 10 between
+    min_value and max_value, so quantiles are accurate to one bucket
+    (about 12% with the defaults) at O(log n_buckets) per sample.
+
+    Args:
+        min_value: Upper bound of the first bucket (seconds)
+        max_value: Upper bound of the last finite bucket (seconds)
+        buckets_per_decade: Bucket resolution
+    """
+
+    def __init__(self, min_value: float = 1e-6, max_value: float = 100.0,
+                 buckets_per_decade: int = 20):
+        n = int(round(math.log10(max_value / min_value) * buckets_per_decade)) + 1
+        self.bounds: List[float] = np.geomspace(min_value, max_value, n).tolist()
+        self.counts = [0] * (n + 1)  # last bucket collects overflow
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (seconds)."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class StepProfiler:
+    """
+    Per-phase step timer with histograms and action counters.
+
+    The environment calls start_step(), then mark(phase) as each phase
+    finishes (each mark times the span since the previous one), add(phase,
+    seconds) for nested I/O, and end_step(action_type, success).
+
+    Args:
+        exporters: Objects with export(profiler), called every export_interval steps
+        export_interval: Steps between exports
+        quantiles: Quantiles reported by summary()
+    """
+
+    def __init__(self, exporters: Optional[Sequence] = None, export_interval: int = 1000,
+                 quantiles: Sequence[float] = (0.5, 0.95, 0.99)):
+        self.exporters = list(exporters or [])
+        self.export_interval = export_interval
+        self.quantiles = tuple(quantiles)
+
+        self.histograms: Dict[str, LatencyHistogram] = {
+            phase: LatencyHistogram() for phase in ['step'] + STEP_PHASES + IO_PHASES
+        }
+        self.action_counts = [0] * len(ACTION_NAMES)
+        self.failure_counts = [0] * len(ACTION_NAMES)
+        self.steps = 0
+        self.resets = 0
+
+        # Timings of the step in progress (seconds), returned by last_step()
+        self._current: Dict[str, float] = {}
+        self._step_start = 0.0
+        self._lap = 0.0
+        self._first_step: Optional[float] = None
+        self._last_step_end = 0.0
+
+    def start_step(self):
+        now = time.perf_counter()
+        self._current = {}
+        self._step_start = self._lap = now
+        if self._first_step is None:
+            self._first_step = now
+
+    def mark(self, phase: str):
+        """Time the span since the previous mark (or start_step) as phase."""
+        now = time.perf_counter()
+        self._current[phase] = self._current.get(phase, 0.0) + now - self._lap
+        self._lap = now
+
+    def add(self, phase: str, seconds: float):
+        """Add a separately timed duration (e.g. one HTTP request)."""
+        self._current[phase] = self._current.get(phase, 0.0) + seconds
+
+    def end_step(self, action_type: int, success: bool):
+        now = time.perf_counter()
+        self._current['step'] = now - self._step_start
+        self._last_step_end = now
+
+        histograms = self.histograms
+        for phase, seconds in self._current.items():
+            histogram = histograms.get(phase)
+            if histogram is None:
+                histogram = histograms[phase] = LatencyHistogram()
+            histogram.record(seconds)
+
+        self.steps += 1
+        if 0 <= action_type < len(ACTION_NAMES):
+            self.action_counts[action_type] += 1
+            if not success:
+                self.failure_counts[action_type] += 1
+
+        if self.exporters and self.steps % self.export_interval == 0:
+            self.export()
+
+    def count_reset(self):
+        self.resets += 1
+
+    def last_step(self) -> Dict[str, float]:
+        """Phase timings of the most recent step in milliseconds (for info)."""
+        return {phase: seconds * 1000.0 for phase, seconds in self._current.items()}
+
+    @property
+    def steps_per_sec(self) -> float:
+        """Steps per wall-clock second since the first step, policy time included."""
+        if self._first_step is None or self._last_step_end <= self._first_step:
+            return 0.0
+        return self.steps / (self._last_step_end - self._first_step)
+
+    def summary(self) -> Dict[str, float]:
+        """Flat metric dict, e.g. 'phase/action/p95_ms' or 'actions/send_message'."""
+        out = {
+            'steps': float(self.steps),
+            'resets': float(self.resets),
+            'steps_per_sec': self.steps_per_sec
+        }
+        for phase, histogram in self.histograms.items():
+            if histogram.count == 0:
+                continue
+            out[f'phase/{phase}/mean_ms'] = histogram.mean * 1000.0
+            for q in self.quantiles:
+                out[f'phase/{phase}/p{int(round(q * 100))}_ms'] = histogram.quantile(q) * 1000.0
+        for name, n, failed in zip(ACTION_NAMES, self.action_counts, self.failure_counts):
+            out[f'actions/{name}'] = float(n)
+            out[f'failures/{name}'] = float(failed)
+        return out
+
+    def export(self):
+        for exporter in self.exporters:
+            exporter.export(self)
+
+    def reset(self):
+        """Clear all statistics."""
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self.action_counts = [0] * len(ACTION_NAMES)
+        self.failure_counts = [0] * len(ACTION_NAMES)
+        self.steps = 0
+        self.resets = 0
+        self._first_step = None
+
+
+class PrometheusTextExporter:
+    """
+    Write profiler metrics in the Prometheus text exposition format.
+
+    The file is replaced atomically, so it can be served by the node
+    exporter's textfile collector.
+
+    Args:
+        path: Output file (conventionally ``*.prom``)
+        prefix: Metric name prefix
+        labels: Extra labels added to every sample, e.g. {'env': '3'}
+    """
+
+    def __init__(self, path: str, prefix: str = 'slack_env',
+                 labels: Optional[Dict[str, str]] = None):
+        self.path = path
+        self.prefix = prefix
+        self.labels = dict(labels or {})
+
+    def export(self, profiler: StepProfiler):
+        lines = self.render(profiler)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, self.path)
+
+    def render(self, profiler: StepProfiler) -> List[str]:
+        p = self.prefix
+        lines = [
+            f'# TYPE {p}_steps_total counter',
+            f'{p}_steps_total{self._labels()} {profiler.steps}',
+            f'# TYPE {p}_resets_total counter',
+            f'{p}_resets_total{self._labels()} {profiler.resets}',
+            f'# TYPE {p}_steps_per_second gauge',
+            f'{p}_steps_per_second{self._labels()} {profiler.steps_per_sec:.6g}',
+            f'# TYPE {p}_phase_seconds summary'
+        ]
+        for phase, histogram in profiler.histograms.items():
+            if histogram.count == 0:
+                continue
+            for q in profiler.quantiles:
+                labels = self._labels(phase=phase, quantile=f'{q:g}')
+                lines.append(f'{p}_phase_seconds{labels} {histogram.quantile(q):.6g}')
+            lines.append(f'{p}_phase_seconds_sum{self._labels(phase=phase)} {histogram.total:.6g}')
+            lines.append(f'{p}_phase_seconds_count{self._labels(phase=phase)} {histogram.count}')
+
+        for metric, counts in (('actions_total', profiler.action_counts),
+                               ('action_failures_total', profiler.failure_counts)):
+            lines.append(f'# TYPE {p}_{metric} counter')
+            for name, n in zip(ACTION_NAMES, counts):
+                lines.append(f'{p}_{metric}{self._labels(action=name)} {n}')
+        return lines
+
+    def _labels(self, **extra: str) -> str:
+        labels = dict(self.labels, **extra)
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}'
@@ -0,0 +1,485 @@
+"""
+Load Generator
+==============
+
+Drive the Slack backend with many simulated users over asyncio
+Socket.io clients, for realistic background traffic around an agent or
+as a capacity benchmark for ``server/index.js``.
+
+Every simulated user has its own account and socket. Users post to
+channels (Zipf-distributed popularity) and DMs, show typing indicators
+and react to messages they received, following a TrafficModel. Each sent
+message carries a token, so the end-to-end delay until its ``new-message``
+broadcast reaches the first client is measured.
+
+Example usage:
+    import asyncio
+    from rl_env.load_generator import LoadGenerator, TrafficModel
+
+    generator = LoadGenerator('http://localhost:3001', n_users=1000,
+                              traffic=TrafficModel(message_rate=0.1))
+    report = asyncio.run(generator.run(duration=60))
+    print(report['messages_per_sec'], report['latency_p99_ms'])
+
+    # or from the command line
+    python load_generator.py --users 1000 --duration 60 --json report.json
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+from socketio import AsyncClient as AsyncSocketIOClient
+
+try:
+    from .async_slack_env import make_http_session
+    from .instrumentation import LatencyHistogram
+    from .sim_backend import SIM_MESSAGES
+    from .slack_gym_env import EMOJI_MAP
+except ImportError:  # running from inside rl_env/
+    from async_slack_env import make_http_session
+    from instrumentation import LatencyHistogram
+    from sim_backend import SIM_MESSAGES
+    from slack_gym_env import EMOJI_MAP
+
+
+class TrafficModel:
+    """
+    What simulated users do and how often.
+
+    Each user acts as a Poisson process; every action is a DM with
+    probability dm_prob and a channel message otherwise, preceded by a
+    typing indicator with probability typing_prob. Independently, each
+    action reacts to a recently received message with probability
+    reaction_prob.
+
+    Args:
+        message_rate: Messages per user per second
+        n_channels: Channels in the load-test workspace
+        channel_zipf: Zipf exponent of channel popularity (0 = uniform)
+        reaction_prob: Chance of a reaction per action
+        dm_prob: Chance a message is a DM instead of a channel message
+        typing_prob: Chance of a typing indicator before a message
+        typing_time: Seconds between 'typing' and the message
+        seed: Seed for the traffic's random choices
+    """
+
+    def __init__(
+        self,
+        message_rate: float = 0.2,
+        n_channels: int = 10,
+        channel_zipf: float = 1.1,
+        reaction_prob: float = 0.1,
+        dm_prob: float = 0.05,
+        typing_prob: float = 0.5,
+        typing_time: float = 0.5,
+        seed: Optional[int] = None
+    ):
+        self.message_rate = message_rate
+        self.n_channels = n_channels
+        self.reaction_prob = reaction_prob
+        self.dm_prob = dm_prob
+        self.typing_prob = typing_prob
+        self.typing_time = typing_time
+        self.rng = np.random.default_rng(seed)
+
+        weights = 1.0 / np.arange(1, n_channels + 1) ** channel_zipf
+        self.channel_weights = weights / weights.sum()
+
+    def next_interval(self) -> float:
+        return float(self.rng.exponential(1.0 / self.message_rate))
+
+    def pick_channel(self) -> int:
+        return int(self.rng.choice(self.n_channels, p=self.channel_weights))
+
+    def chance(self, p: float) -> bool:
+        return bool(self.rng.random() < p)
+
+    def pick(self, n: int) -> int:
+        return int(self.rng.integers(n))
+
+
+class SimulatedUser:
+    """One load-test account and its socket."""
+
+    __slots__ = ('index', 'email', 'username', 'user_id', 'session_id', 'sio', 'dms')
+
+    def __init__(self, index: int, email: str, username: str):
+        self.index = index
+        self.email = email
+        self.username = username
+        self.user_id: Optional[str] = None
+        self.session_id: Optional[str] = None
+        self.sio: Optional[AsyncSocketIOClient] = None
+        self.dms: Dict[int, str] = {}  # other user index -> conversation id
+
+
+class LoadGenerator:
+    """
+    Many simulated users against one backend.
+
+    setup() registers (or logs in) the accounts, creates a workspace with
+    the model's channels, and connects every user's socket to all channels.
+    run() then generates traffic for a fixed duration and returns a report.
+    start()/stop() run the same loop on a background thread.
+
+    Args:
+        backend_url: Slack backend URL
+        n_users: Simulated users
+        traffic: TrafficModel (defaults if omitted)
+        password: Password of the load-test accounts
+        user_prefix: Accounts are <prefix><i>@loadtest.local
+        connect_concurrency: Accounts/sockets set up at the same time
+    """
+
+    def __init__(
+        self,
+        backend_url: str = "http://localhost:3001",
+        n_users: int = 100,
+        traffic: Optional[TrafficModel] = None,
+        password: str = "loadtest123",
+        user_prefix: str = "load_user",
+        connect_concurrency: int = 50
+    ):
+        self.backend_url = backend_url
+        self.traffic = traffic or TrafficModel()
+        self.password = password
+        self.connect_concurrency = connect_concurrency
+        self.users = [
+            SimulatedUser(i, f"{user_prefix}{i}@loadtest.local", f"{user_prefix}{i}")
+            for i in range(n_users)
+        ]
+
+        self.http = None
+        self.workspace_id: Optional[str] = None
+        self.channel_ids: List[str] = []
+
+        # Send time of messages whose first delivery is still pending
+        self._pending: Dict[str, float] = {}
+        self._recent_ids: Deque[str] = deque(maxlen=1000)
+        self._running = False
+        self._stop_event: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._report: Optional[Dict[str, Any]] = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.latency = LatencyHistogram()
+        self.counts = {
+            'messages_sent': 0, 'dms_sent': 0, 'deliveries': 0, 'reactions': 0,
+            'typing': 0, 'errors': 0
+        }
+        self._pending.clear()
+
+    # ==================== Setup ====================
+
+    async def setup(self):
+        """Create accounts, workspace and channels, and connect all sockets."""
+        start = time.perf_counter()
+        if self.http is None:
+            self.http = make_http_session(limit=self.connect_concurrency * 2)
+        limit = asyncio.Semaphore(self.connect_concurrency)
+
+        async def limited(coro):
+            async with limit:
+                return await coro
+
+        await asyncio.gather(*(limited(self._login(user)) for user in self.users))
+        await self._create_workspace()
+        await asyncio.gather(*(limited(self._connect(user)) for user in self.users))
+        self.setup_time = time.perf_counter() - start
+
+    async def _request(self, user: SimulatedUser, method: str, path: str, **kwargs):
+        headers = {'Authorization': f'Bearer {user.session_id}'} if user.session_id else {}
+        async with self.http.request(
+            method, f"{self.backend_url}{path}", headers=headers, **kwargs
+        ) as response:
+            data = await response.json() if response.content_type == 'application/json' else None
+            return response.status, data
+
+    async def _login(self, user: SimulatedUser):
+        status, data = await self._request(
+            user, 'POST', '/api/auth/register',
+            json={'username': user.username, 'email': user.email, 'password': self.password}
+        )
+        if status != 200:
+            status, data = await self._request(
+                user, 'POST', '/api/auth/login',
+                json={'email': user.email, 'password': self.password}
+            )
+        if status != 200:
+            raise RuntimeError(f"Could not log in {user.email}: {data}")
+        user.session_id = data['sessionId']
+        user.user_id = data['user']['id']
+
+    async def _create_workspace(self):
+        """The first user owns a fresh workspace with all users as members."""
+        owner = self.users[0]
+        status, data = await self._request(
+            owner, 'POST', '/api/workspaces',
+            json={'name': f"Load Test {uuid.uuid4().hex[:8]}"}
+        )
+        if status != 200:
+            raise RuntimeError(f"Could not create workspace: {data}")
+        self.workspace_id = data['id']
+
+        member_ids = [user.user_id for user in self.users[1:]]
+        for i in range(0, len(member_ids), 500):
+            await self._request(
+                owner, 'POST', f"/api/workspaces/{self.workspace_id}/members",
+                json={'userIds': member_ids[i:i + 500]}
+            )
+
+        self.channel_ids = []
+        for c in range(self.traffic.n_channels):
+            status, data = await self._request(
+                owner, 'POST', f"/api/workspaces/{self.workspace_id}/channels",
+                json={'name': f"load-{c}", 'isPrivate': False}
+            )
+            if status != 200:
+                raise RuntimeError(f"Could not create channel: {data}")
+            self.channel_ids.append(data['id'])
+
+    async def _connect(self, user: SimulatedUser):
+        sio = AsyncSocketIOClient(reconnection=False)
+        sio.on('new-message', self._on_new_message)
+        await sio.connect(self.backend_url, transports=['websocket'])
+        user.sio = sio
+        await sio.emit('user-online', {'userId': user.user_id, 'workspaceId': self.workspace_id})
+        for channel_id in self.channel_ids:
+            await sio.emit('join-channel', channel_id)
+
+    # ==================== Traffic ====================
+
+    async def run(self, duration: float = 60.0) -> Dict[str, Any]:
+        """
+        Set up if needed, generate traffic for duration seconds (or until
+        stop()), and return the report.
+        """
+        if self.workspace_id is None:
+            await self.setup()
+        self.reset_stats()
+        self._running = True
+        self._stop_event = asyncio.Event()
+
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future(self._user_loop(user)) for user in self.users]
+        try:
+            await asyncio.wait_for(
+                self._stop_event.wait(), timeout=None if np.isinf(duration) else duration
+            )
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._running = False
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        # Give in-flight broadcasts a moment to arrive
+        await asyncio.sleep(1.0)
+        return self.report(elapsed)
+
+    async def close(self):
+        await asyncio.gather(
+            *(user.sio.disconnect() for user in self.users if user.sio is not None),
+            return_exceptions=True
+        )
+        if self.http is not None:
+            await self.http.close()
+            self.http = None
+
+    async def _user_loop(self, user: SimulatedUser):
+        traffic = self.traffic
+        # Spread the first actions over one mean interval
+        await asyncio.sleep(traffic.rng.random() / traffic.message_rate)
+        while self._running:
+            try:
+                if traffic.chance(traffic.reaction_prob) and self._recent_ids:
+                    await self._react(user)
+                if traffic.chance(traffic.dm_prob) and len(self.users) > 1:
+                    await self._send_dm(user)
+                else:
+                    await self._send_channel_message(user)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.counts['errors'] += 1
+            await asyncio.sleep(traffic.next_interval())
+
+    async def _send_channel_message(self, user: SimulatedUser):
+        channel_id = self.channel_ids[self.traffic.pick_channel()]
+        await self._send(user, {'channelId': channel_id})
+
+    async def _send_dm(self, user: SimulatedUser):
+        other = self.users[self.traffic.pick(len(self.users))]
+        if other is user:
+            return
+        conversation_id = user.dms.get(other.index)
+        if conversation_id is None:
+            status, data = await self._request(
+                user, 'POST', '/api/dm-conversations', json={'userId': other.user_id}
+            )
+            if status != 200:
+                self.counts['errors'] += 1
+                return
+            conversation_id = data['id']
+            user.dms[other.index] = other.dms[user.index] = conversation_id
+            await user.sio.emit('join-dm', conversation_id)
+            await other.sio.emit('join-dm', conversation_id)
+        await self._send(user, {'dmConversationId': conversation_id})
+        self.counts['dms_sent'] += 1
+
+    async def _send(self, user: SimulatedUser, target: Dict[str, str]):
+        traffic = self.traffic
+        if traffic.chance(traffic.typing_prob):
+            await user.sio.emit('typing', dict(target, userId=user.user_id, username=user.username))
+            self.counts['typing'] += 1
+            await asyncio.sleep(traffic.typing_time)
+            await user.sio.emit('stop-typing', target)
+
+        token = uuid.uuid4().hex[:12]
+        content = f"{SIM_MESSAGES[traffic.pick(len(SIM_MESSAGES))]} #{token}"
+        self._pending[token] = time.perf_counter()
+        await user.sio.emit('send-message', dict(target, userId=user.user_id, content=content))
+        self.counts['messages_sent'] += 1
+
+    async def _react(self, user: SimulatedUser):
+        message_id = self._recent_ids[self.traffic.pick(len(self._recent_ids))]
+        emoji = EMOJI_MAP[self.traffic.pick(len(EMOJI_MAP))]
+        status, _ = await self._request(
+            user, 'POST', f"/api/messages/{message_id}/reactions", json={'emoji': emoji}
+        )
+        if status == 200:
+            self.counts['reactions'] += 1
+        else:
+            self.counts['errors'] += 1
+
+    async def _on_new_message(self, data: Dict[str, Any]):
+        self.counts['deliveries'] += 1
+        content = data.get('content') or ''
+        _, _, token = content.rpartition('#')
+        sent_at = self._pending.pop(token, None)
+        if sent_at is not None:
+            self.latency.record(time.perf_counter() - sent_at)
+            self._recent_ids.append(data.get('id'))
+
+    # ==================== Reporting ====================
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        """Throughput and first-delivery latency of the last run."""
+        counts = self.counts
+        latency = self.latency
+        return {
+            'users': len(self.users),
+            'channels': len(self.channel_ids),
+            'duration_s': elapsed,
+            'setup_s': getattr(self, 'setup_time', 0.0),
+            **counts,
+            'messages_per_sec': counts['messages_sent'] / elapsed if elapsed else 0.0,
+            'deliveries_per_sec': counts['deliveries'] / elapsed if elapsed else 0.0,
+            'delivered': latency.count,
+            'undelivered': len(self._pending),
+            'latency_mean_ms': latency.mean * 1000.0,
+            'latency_p50_ms': latency.quantile(0.5) * 1000.0,
+            'latency_p95_ms': latency.quantile(0.95) * 1000.0,
+            'latency_p99_ms': latency.quantile(0.99) * 1000.0,
+            'latency_max_ms': latency.max * 1000.0
+        }
+
+    # ==================== Background Mode ====================
+
+    def start(self):
+        """Set up, then generate traffic on a background thread until stop()."""
+        if self._thread is not None:
+            return
+        self._report = None
+        ready = threading.Event()
+        errors: List[BaseException] = []
+
+        async def main():
+            try:
+                await self.setup()
+            except Exception as e:
+                errors.append(e)
+                return
+            finally:
+                ready.set()
+            try:
+                self._report = await self.run(duration=float('inf'))
+            finally:
+                await self.close()
+
+        def target():
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(main())
+            finally:
+                self._loop.close()
+
+        self._thread = threading.Thread(target=target, name='load-generator', daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            self._thread.join()
+            self._thread = None
+            raise errors[0]
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        """Stop background traffic and return its report."""
+        if self._thread is None:
+            return None
+        self._loop.call_soon_threadsafe(lambda: self._stop_event.set())
+        self._thread.join()
+        self._thread = None
+        return self._report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate load against the Slack backend')
+    parser.add_argument('--url', type=str, default='http://localhost:3001', help='Backend URL')
+    parser.add_argument('--users', type=int, default=100, help='Simulated users')
+    parser.add_argument('--duration', type=float, default=60.0, help='Seconds of traffic')
+    parser.add_argument('--rate', type=float, default=0.2, help='Messages per user per second')
+    parser.add_argument('--channels', type=int, default=10, help='Channels in the workspace')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Channel popularity skew')
+    parser.add_argument('--reaction-prob', type=float, default=0.1, help='Reaction chance per action')
+    parser.add_argument('--dm-prob', type=float, default=0.05, help='DM chance per message')
+    parser.add_argument('--typing-prob', type=float, default=0.5, help='Typing indicator chance')
+    parser.add_argument('--seed', type=int, default=None, help='Traffic seed')
+    parser.add_argument('--json', type=str, default=None, help='Write the report to this file')
+    args = parser.parse_args()
+
+    traffic = TrafficModel(
+        message_rate=args.rate,
+        n_channels=args.channels,
+        channel_zipf=args.zipf,
+        reaction_prob=args.reaction_prob,
+        dm_prob=args.dm_prob,
+        typing_prob=args.typing_prob,
+        seed=args.seed
+    )
+    generator = LoadGenerator(args.url, n_users=args.users, traffic=traffic)
+
+    async def run():
+        try:
+            return await generator.run(duration=args.duration)
+        finally:
+            await generator.close()
+
+    report = asyncio.run(run())
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Message Store
+=============
+
+Fixed-capacity, thread-safe ring buffer of received messages.
+
+The Socket.io thread appends while step() reads, so every access goes
+through one lock. A condition variable on that lock is notified on every
+append, so step() can block until the messages it is waiting for arrive
+instead of sleeping a fixed time.
+
+Messages are kept as compact ``__slots__`` records. Their embeddings live
+in one preallocated (capacity, embedding_dim) array, indexed by each
+record's ring slot.
+
+Example usage:
+    store = MessageStore(capacity=50, embedding_dim=128)
+    store.append({'id': 'm1', 'content': 'hello', 'user_id': 'u1'})
+    print(store.last().content)
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+
+class MessageRecord:
+    """A received message. Supports dict-style .get() for compatibility."""
+
+    __slots__ = (
+        'seq', 'id', 'channel_id', 'dm_conversation_id', 'user_id', 'username',
+        'content', 'created_at', 'received_at', 'embedding_index'
+    )
+
+    def __init__(self, seq: int, data: Dict[str, Any], embedding_index: int):
+        self.seq = seq
+        self.id = data.get('id')
+        self.channel_id = data.get('channel_id')
+        self.dm_conversation_id = data.get('dm_conversation_id')
+        self.user_id = data.get('user_id')
+        self.username = data.get('username')
+        self.content = data.get('content') or ''
+        self.created_at = data.get('created_at')
+        self.received_at = time.monotonic()
+        self.embedding_index = embedding_index
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+    def __repr__(self) -> str:
+        return f"MessageRecord(id={self.id!r}, username={self.username!r}, content={self.content[:30]!r})"
+
+
+class MessageStore:
+    """
+    Ring buffer of the last ``capacity`` messages.
+
+    Every appended message gets a sequence number (1, 2, ...), so readers
+    can fetch only what arrived after the last sequence they saw.
+
+    Args:
+        capacity: Number of messages kept
+        embedding_dim: Width of the embeddings column (0 to disable)
+    """
+
+    def __init__(self, capacity: int = 50, embedding_dim: int = 0):
+        self.capacity = capacity
+        self._slots: List[Optional[MessageRecord]] = [None] * capacity
+        self._next_slot = 0
+        self._size = 0
+        self.total = 0
+        self.lock = threading.Lock()
+        # Notified on every append (see wait_for)
+        self.arrived = threading.Condition(self.lock)
+        self.embeddings = np.zeros((capacity, embedding_dim), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[MessageRecord]:
+        return iter(self.recent())
+
+    def append(self, data: Dict[str, Any]) -> MessageRecord:
+        """Store a 'new-message' payload, overwriting the oldest when full."""
+        with self.lock:
+            slot = self._next_slot
+            self.total += 1
+            record = MessageRecord(self.total, data, slot)
+            self._slots[slot] = record
+            self._next_slot = (slot + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            self.arrived.notify_all()
+            return record
+
+    def last(self) -> Optional[MessageRecord]:
+        """Most recent message, or None."""
+        with self.lock:
+            if self._size == 0:
+                return None
+            return self._slots[self._next_slot - 1]
+
+    def recent(self, n: Optional[int] = None) -> List[MessageRecord]:
+        """Up to n most recent messages, oldest first."""
+        with self.lock:
+            return self._tail(self._size if n is None else min(n, self._size))
+
+    def since(self, seq: int) -> List[MessageRecord]:
+        """Messages appended after sequence number seq that are still stored."""
+        with self.lock:
+            return self._tail(min(max(self.total - seq, 0), self._size))
+
+    def wait_for(self, predicate: Callable[[List[MessageRecord]], bool], since: int,
+                 timeout: Optional[float]) -> bool:
+        """
+        Block until predicate(messages appended after seq since) is true.
+
+        The predicate runs with the lock held, once now and again after
+        every append, so it must not call back into the store. Returns
+        False if it still fails after timeout seconds.
+        """
+        with self.arrived:
+            return self.arrived.wait_for(
+                lambda: predicate(self._tail(min(max(self.total - since, 0), self._size))),
+                timeout
+            )
+
+    def set_embeddings(self, records: Sequence[MessageRecord], vectors: np.ndarray):
+        """Store embeddings for records, skipping ones already overwritten."""
+        with self.lock:
+            for record, vector in zip(records, vectors):
+                if self._slots[record.embedding_index] is record:
+                    self.embeddings[record.embedding_index] = vector
+
+    def clear(self):
+        with self.lock:
+            self._slots = [None] * self.capacity
+            self._next_slot = 0
+            self._size = 0
+            self.total = 0
+
+    def _tail(self, n: int) -> List[MessageRecord]:
+        """Last n records, oldest first. Caller holds the lock."""
+        start = self._next_slot - n
+        if start >= 0:
+            return self._slots[start:self._next_slot]
+        return self._slots[start:] + self._slots[:self._next_slot]
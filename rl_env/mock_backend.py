@@ -0,0 +1,602 @@
+"""
+Mock Slack Backend
+==================
+
+A lightweight Python stand-in for ``server/index.js`` that speaks real
+HTTP and Socket.io, for hermetic tests and benchmarks of the HTTP
+environments without Node or SQLite.
+
+It serves the subset of the REST API and socket events the environments,
+the load generator and the workspace poller use, keeping all state in an
+in-memory SimSlackBackend. Every HTTP response and socket broadcast can be
+delayed by an injectable latency, so environment overhead can be measured
+separately from backend overhead.
+
+The server runs either in-process on a background thread (MockSlackServer)
+or as a separate process (MockBackendProcess), which keeps its event loop
+off the benchmark's GIL.
+
+Example usage:
+    from rl_env import make_slack_env
+    from rl_env.mock_backend import MockSlackServer
+
+    with MockSlackServer(latency=0.005) as server:
+        env = make_slack_env(backend_url=server.url)
+        obs, info = env.reset()
+
+    # or as a subprocess / from the command line
+    python mock_backend.py --port 3001 --latency 5
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Union
+
+import socketio
+from aiohttp import web
+
+try:
+    from .sim_backend import SIM_MESSAGES, SimSlackBackend
+except ImportError:  # running from inside rl_env/
+    from sim_backend import SIM_MESSAGES, SimSlackBackend
+
+
+# Printed by the subprocess once it is listening
+READY_PREFIX = 'MOCK_BACKEND_URL='
+
+
+def _error(status: int, message: str) -> web.Response:
+    return web.json_response({'error': message}, status=status)
+
+
+class MockSlackServer:
+    """
+    In-memory HTTP + Socket.io Slack backend.
+
+    Routes and payloads follow server/index.js: sessions are passed as
+    ``Authorization: Bearer <sessionId>``, ``new-message`` is broadcast to
+    the ``channel:<id>`` / ``dm:<id>`` rooms joined with ``join-channel``
+    / ``join-dm``, and ``send-message`` takes camelCase keys.
+
+    Unlike the Node server, new workspaces come with the default channels
+    and the simulated teammates of SimSlackBackend, who can post on their
+    own at message_rate.
+
+    All state lives on the server's event loop; read ``backend`` only
+    after stop() or from a handler.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free one, see ``url``)
+        latency: Seconds added to every HTTP response and socket broadcast,
+                 or a callable returning them
+        jitter: Extra uniform random delay in [0, jitter) seconds
+        message_rate: Teammate messages per second per workspace (0 = none)
+        n_sim_users: Number of simulated teammates
+        seed: Seed for teammate traffic and jitter
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: Union[float, Callable[[], float]] = 0.0,
+        jitter: float = 0.0,
+        message_rate: float = 0.0,
+        n_sim_users: int = 20,
+        seed: Optional[int] = None
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.message_rate = message_rate
+        self.rng = random.Random(seed)
+
+        self.backend = SimSlackBackend(
+            n_users=n_sim_users, message_rate=0.0, presence_flip_rate=0.0, seed=seed
+        )
+        self.requests = 0
+
+        self.sio = socketio.AsyncServer(async_mode='aiohttp', cors_allowed_origins='*')
+        self.app = web.Application(middlewares=[self._middleware])
+        self.sio.attach(self.app)
+        self._add_routes()
+        self._add_socket_handlers()
+
+        self._runner: Optional[web.AppRunner] = None
+        self._chatter: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # ==================== Lifecycle ====================
+
+    async def start_async(self) -> str:
+        """Start serving on the running event loop; returns the base URL."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.SockSite(self._runner, sock).start()
+        if self.message_rate > 0:
+            self._chatter = asyncio.ensure_future(self._run_chatter())
+        return self.url
+
+    async def stop_async(self):
+        if self._chatter is not None:
+            self._chatter.cancel()
+            self._chatter = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        # Socket.io ping and client tasks outlive the runner
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def start(self) -> str:
+        """Serve from a background thread; returns the base URL once listening."""
+        if self._thread is not None:
+            return self.url
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self.start_async())
+            except Exception as e:
+                errors.append(e)
+                ready.set()
+                return
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop_async())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name='mock-slack-backend', daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            self._thread = None
+            raise errors[0]
+        return self.url
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5.0)
+        self._thread = None
+
+    def serve_forever(self, on_ready: Optional[Callable[[str], None]] = None):
+        """Serve on the current thread until interrupted."""
+        async def main():
+            url = await self.start_async()
+            if on_ready is not None:
+                on_ready(url)
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await self.stop_async()
+
+        try:
+            asyncio.run(main())
+        except KeyboardInterrupt:
+            pass
+
+    def __enter__(self) -> 'MockSlackServer':
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ==================== HTTP ====================
+
+    def _add_routes(self):
+        add = self.app.router
+        add.add_post('/api/auth/register', self._signup)
+        add.add_post('/api/auth/login', self._login)
+        add.add_get('/api/workspaces', self._list_workspaces)
+        add.add_post('/api/workspaces', self._create_workspace)
+        add.add_get('/api/workspaces/{workspace_id}/members', self._list_members)
+        add.add_post('/api/workspaces/{workspace_id}/members', self._add_members)
+        add.add_get('/api/workspaces/{workspace_id}/channels', self._list_channels)
+        add.add_post('/api/workspaces/{workspace_id}/channels', self._create_channel)
+        add.add_get('/api/workspaces/{workspace_id}/unread-counts', self._unread_counts)
+        add.add_get('/api/workspaces/{workspace_id}/presence', self._presence)
+        add.add_get('/api/workspaces/{workspace_id}/search', self._search)
+        add.add_get('/api/channels/{channel_id}/messages', self._channel_messages)
+        add.add_post('/api/channels/{channel_id}/mark-read', self._mark_read)
+        add.add_post('/api/messages/{message_id}/reactions', self._react)
+        add.add_post('/api/messages/{message_id}/pin', self._pin)
+        add.add_post('/api/dm-conversations', self._open_dm)
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        if request.path.startswith('/socket.io'):
+            return await handler(request)
+        self.requests += 1
+        await self._delay()
+        return await handler(request)
+
+    def _user(self, request: web.Request) -> Optional[str]:
+        """User id of the request's session (Bearer token or x-session-id)."""
+        header = request.headers.get('Authorization', '')
+        session_id = header.split(' ')[1] if ' ' in header else request.headers.get('x-session-id')
+        return self.backend.sessions.get(session_id)
+
+    async def _signup(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        username, email, password = body.get('username'), body.get('email'), body.get('password')
+        if not username or not email or not password:
+            return _error(400, 'All fields are required')
+        if len(password) < 6:
+            return _error(400, 'Password must be at least 6 characters')
+        try:
+            return web.json_response(self.backend.signup(username, email, password))
+        except ValueError as e:
+            return _error(400, str(e))
+
+    async def _login(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if not body.get('email') or not body.get('password'):
+            return _error(400, 'Email and password are required')
+        data = self.backend.login(body['email'], body['password'])
+        if data is None:
+            return _error(401, 'Invalid credentials')
+        return web.json_response(data)
+
+    async def _list_workspaces(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if user_id is None:
+            return _error(401, 'Authentication required')
+        return web.json_response(self.backend.list_workspaces(user_id))
+
+    async def _create_workspace(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if user_id is None:
+            return _error(401, 'Authentication required')
+        body = await request.json()
+        if not body.get('name'):
+            return _error(400, 'Workspace name is required')
+        return web.json_response(self.backend.create_workspace(user_id, body['name']))
+
+    async def _list_members(self, request: web.Request) -> web.Response:
+        if self._user(request) is None:
+            return _error(401, 'Authentication required')
+        return web.json_response(self.backend.list_members(request.match_info['workspace_id']))
+
+    async def _add_members(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if user_id is None:
+            return _error(401, 'Authentication required')
+        workspace = self.backend.workspaces.get(request.match_info['workspace_id'])
+        if workspace is None or user_id not in workspace['members']:
+            return _error(403, 'Not a member of this workspace')
+        body = await request.json()
+        added = self.backend.add_members(workspace['id'], body.get('userIds') or [])
+        return web.json_response({'added': added})
+
+    async def _list_channels(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if user_id is None:
+            return _error(401, 'Authentication required')
+        workspace = self.backend.workspaces.get(request.match_info['workspace_id'])
+        if workspace is None or user_id not in workspace['members']:
+            return _error(403, 'Not a member of this workspace')
+        return web.json_response(self.backend.list_channels(workspace['id'], user_id))
+
+    async def _create_channel(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if user_id is None:
+            return _error(401, 'Authentication required')
+        workspace = self.backend.workspaces.get(request.match_info['workspace_id'])
+        if workspace is None or user_id not in workspace['members']:
+            return _error(403, 'Not a member of this workspace')
+        body = await request.json()
+        if not body.get('name'):
+            return _error(400, 'Channel name is required')
+        channel = self.backend.create_channel(workspace['id'], user_id, body['name'])
+        return web.json_response(dict(channel, description=body.get('description', ''),
+                                      is_private=bool(body.get('isPrivate'))))
+
+    async def _unread_counts(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if user_id is None:
+            return _error(401, 'Authentication required')
+        return web.json_response(
+            self.backend.unread_counts(request.match_info['workspace_id'], user_id)
+        )
+
+    async def _presence(self, request: web.Request) -> web.Response:
+        if self._user(request) is None:
+            return _error(401, 'Authentication required')
+        return web.json_response(
+            self.backend.workspace_presence(request.match_info['workspace_id'])
+        )
+
+    async def _search(self, request: web.Request) -> web.Response:
+        if self._user(request) is None:
+            return _error(401, 'Authentication required')
+        results = self.backend.search(
+            request.match_info['workspace_id'], request.query.get('q', '')
+        )
+        channels = self.backend.channels
+        return web.json_response([
+            dict(m, channel_name=channels[m['channel_id']]['name']) for m in results
+        ])
+
+    async def _channel_messages(self, request: web.Request) -> web.Response:
+        if self._user(request) is None:
+            return _error(401, 'Authentication required')
+        channel = self.backend.channels.get(request.match_info['channel_id'])
+        if channel is None:
+            return _error(404, 'Channel not found')
+        return web.json_response(list(channel['messages']))
+
+    async def _mark_read(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if user_id is None:
+            return _error(401, 'Authentication required')
+        self.backend.mark_read(request.match_info['channel_id'], user_id)
+        return web.json_response({'success': True})
+
+    async def _react(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if user_id is None:
+            return _error(401, 'Authentication required')
+        body = await request.json()
+        emoji = body.get('emoji')
+        if not emoji:
+            return _error(400, 'Emoji is required')
+        message_id = request.match_info['message_id']
+        added = self.backend.toggle_reaction(message_id, user_id, emoji)
+        if added is None:
+            return _error(404, 'Message not found')
+        if not added:
+            return web.json_response({'removed': True})
+        return web.json_response({'message_id': message_id, 'user_id': user_id, 'emoji': emoji})
+
+    async def _pin(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if user_id is None:
+            return _error(401, 'Authentication required')
+        body = await request.json()
+        message_id = request.match_info['message_id']
+        message = self.backend.messages.get(message_id)
+        if message is None:
+            return _error(404, 'Message not found')
+        self.backend.pin_message(message_id, body.get('channelId') or message['channel_id'])
+        return web.json_response({
+            'message_id': message_id,
+            'pinned_by': self.backend.users[user_id]['username']
+        })
+
+    async def _open_dm(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if user_id is None:
+            return _error(401, 'Authentication required')
+        body = await request.json()
+        other_id = body.get('userId')
+        if not other_id or other_id == user_id or other_id not in self.backend.users:
+            return _error(400, 'Invalid user ID')
+        return web.json_response(self.backend.open_dm(user_id, other_id))
+
+    # ==================== Socket.io ====================
+
+    def _add_socket_handlers(self):
+        sio = self.sio
+        sio.on('user-online', self._on_user_online)
+        sio.on('join-channel', self._on_join_channel)
+        sio.on('leave-channel', self._on_leave_channel)
+        sio.on('join-dm', self._on_join_dm)
+        sio.on('send-message', self._on_send_message)
+        sio.on('typing', self._on_typing)
+        sio.on('stop-typing', self._on_stop_typing)
+
+    async def _on_user_online(self, sid: str, data: Dict[str, Any]):
+        user_id = data.get('userId')
+        if user_id not in self.backend.users:
+            return
+        self.backend.set_presence(user_id, 'online')
+        await self._delay()
+        await self.sio.emit('presence-update', {'user_id': user_id, 'status': 'online'},
+                            room=f"workspace:{data.get('workspaceId')}")
+
+    async def _on_join_channel(self, sid: str, channel_id: str):
+        await self.sio.enter_room(sid, f"channel:{channel_id}")
+
+    async def _on_leave_channel(self, sid: str, channel_id: str):
+        await self.sio.leave_room(sid, f"channel:{channel_id}")
+
+    async def _on_join_dm(self, sid: str, conversation_id: str):
+        await self.sio.enter_room(sid, f"dm:{conversation_id}")
+
+    async def _on_send_message(self, sid: str, data: Dict[str, Any]):
+        user_id = data.get('userId')
+        if not user_id:
+            return await self.sio.emit(
+                'error', {'message': 'Invalid message data - missing userId'}, to=sid
+            )
+        if not data.get('content'):
+            return await self.sio.emit(
+                'error', {'message': 'Invalid message data - no content and no file'}, to=sid
+            )
+        if user_id not in self.backend.users:
+            return await self.sio.emit('error', {'message': 'User not found'}, to=sid)
+
+        await self._post(user_id, data['content'], data.get('channelId'),
+                         data.get('dmConversationId'))
+
+    async def _on_typing(self, sid: str, data: Dict[str, Any]):
+        await self.sio.emit(
+            'user-typing', {'userId': data.get('userId'), 'username': data.get('username')},
+            room=self._room(data), skip_sid=sid
+        )
+
+    async def _on_stop_typing(self, sid: str, data: Dict[str, Any]):
+        await self.sio.emit('user-stop-typing', {'userId': data.get('userId')},
+                            room=self._room(data), skip_sid=sid)
+
+    # ==================== Private Methods ====================
+
+    async def _delay(self):
+        latency = self.latency() if callable(self.latency) else self.latency
+        if self.jitter > 0:
+            latency += self.rng.random() * self.jitter
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+    @staticmethod
+    def _room(data: Dict[str, Any]) -> str:
+        if data.get('channelId'):
+            return f"channel:{data['channelId']}"
+        return f"dm:{data.get('dmConversationId')}"
+
+    async def _post(self, user_id: str, content: str, channel_id: Optional[str] = None,
+                    dm_conversation_id: Optional[str] = None):
+        """Store a message and broadcast 'new-message' to its room."""
+        # Simulated clock in wall-clock seconds, so search orders by time
+        self.backend.clock = time.time()
+        message = self.backend.send_message(
+            user_id, content, channel_id=channel_id, dm_conversation_id=dm_conversation_id
+        )
+        if message is None:
+            return
+        await self._delay()
+        room = f"channel:{channel_id}" if channel_id else f"dm:{dm_conversation_id}"
+        await self.sio.emit('new-message', dict(message, thread_id=None), room=room)
+
+    async def _run_chatter(self):
+        """Simulated teammates post to random channels of every workspace."""
+        backend = self.backend
+        while True:
+            n_workspaces = len(backend.workspaces)
+            if n_workspaces == 0:
+                await asyncio.sleep(0.1)
+                continue
+            await asyncio.sleep(self.rng.expovariate(self.message_rate * n_workspaces))
+            workspace = self.rng.choice(list(backend.workspaces.values()))
+            if workspace['channel_ids'] and backend.sim_user_ids:
+                await self._post(self.rng.choice(backend.sim_user_ids),
+                                 self.rng.choice(SIM_MESSAGES),
+                                 channel_id=self.rng.choice(workspace['channel_ids']))
+
+
+class MockBackendProcess:
+    """
+    MockSlackServer in a child process.
+
+    Args:
+        port: Port to bind (0 picks a free one, see ``url``)
+        latency: Seconds added to every HTTP response and socket broadcast
+        jitter: Extra uniform random delay in [0, jitter) seconds
+        message_rate: Teammate messages per second per workspace
+        startup_timeout: Seconds to wait for the child to listen
+    """
+
+    def __init__(self, port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 message_rate: float = 0.0, startup_timeout: float = 30.0):
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.message_rate = message_rate
+        self.startup_timeout = startup_timeout
+        self.url: Optional[str] = None
+        self.process: Optional[subprocess.Popen] = None
+
+    def start(self) -> str:
+        """Spawn the server; returns its base URL once it is listening."""
+        if self.process is not None:
+            return self.url
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__),
+             '--port', str(self.port),
+             '--latency', str(self.latency * 1000.0),
+             '--jitter', str(self.jitter * 1000.0),
+             '--message-rate', str(self.message_rate)],
+            stdout=subprocess.PIPE, text=True
+        )
+
+        timer = threading.Timer(self.startup_timeout, self.process.kill)
+        timer.start()
+        try:
+            for line in self.process.stdout:
+                if line.startswith(READY_PREFIX):
+                    self.url = line[len(READY_PREFIX):].strip()
+                    break
+        finally:
+            timer.cancel()
+        if self.url is None:
+            self.stop()
+            raise RuntimeError("Mock backend failed to start")
+        return self.url
+
+    def stop(self):
+        if self.process is None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5.0)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+        self.process = None
+
+    def __enter__(self) -> 'MockBackendProcess':
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the in-memory mock Slack backend')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=3001, help='Port (0 = any free port)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Added delay per response/broadcast (ms)')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Extra uniform random delay (ms)')
+    parser.add_argument('--message-rate', type=float, default=0.0,
+                        help='Teammate messages per second per workspace')
+    parser.add_argument('--sim-users', type=int, default=20, help='Simulated teammates')
+    parser.add_argument('--seed', type=int, default=None, help='Traffic seed')
+    args = parser.parse_args()
+
+    logging.getLogger('aiohttp').setLevel(logging.WARNING)
+    server = MockSlackServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency / 1000.0,
+        jitter=args.jitter / 1000.0,
+        message_rate=args.message_rate,
+        n_sim_users=args.sim_users,
+        seed=args.seed
+    )
+    server.serve_forever(lambda url: print(f"{READY_PREFIX}{url}", flush=True))
+
+
+if __name__ == "__main__":
+    main()
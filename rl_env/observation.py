@@ -0,0 +1,137 @@
+"""
+Incremental Observation Builder
+===============================
+
+Keeps the message part of the observation (message_history and
+conversation_context) up to date in place, so a step only pays for the
+messages that arrived since the previous step.
+
+The history is a ring buffer stored twice back to back (rows [0, K) are
+mirrored in [K, 2K)). The last K messages, oldest first, are therefore
+always the contiguous slice [head, head + K) and can be handed out as a
+view without copying.
+
+ObservationLayout maps the Dict observation onto one flat float32 vector
+at fixed offsets, for policies that take a single Box input.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+import numpy as np
+from gymnasium import spaces
+
+
+class ObservationBuilder:
+    """
+    Ring-buffer backed message_history / conversation_context.
+
+    Views returned by observe() are read-only and stay valid until the next
+    push(). reset() switches to fresh buffers, so views from a finished
+    episode (e.g. a terminal observation) are never overwritten.
+
+    Args:
+        embedding_dim: Message embedding dimension
+        history_len: Number of messages in message_history
+    """
+
+    def __init__(self, embedding_dim: int = 128, history_len: int = 10):
+        self.embedding_dim = embedding_dim
+        self.history_len = history_len
+        self.reset()
+
+    def reset(self):
+        """Start an empty history in new buffers."""
+        self._history = np.zeros((2 * self.history_len, self.embedding_dim), dtype=np.float32)
+        self._context = np.zeros(self.embedding_dim, dtype=np.float32)
+        self._head = 0
+        self.count = 0
+
+    def push(self, embeddings: np.ndarray):
+        """Append a (n, embedding_dim) batch of message embeddings, oldest first."""
+        k = self.history_len
+        # Older rows would be overwritten anyway
+        embeddings = embeddings[-k:]
+        for row in embeddings:
+            self._history[self._head] = row
+            self._history[self._head + k] = row
+            self._head = (self._head + 1) % k
+        if len(embeddings):
+            self._context[:] = embeddings[-1]
+            self.count += len(embeddings)
+
+    def observe(self) -> Dict[str, np.ndarray]:
+        """Read-only views of message_history (oldest first) and conversation_context."""
+        history = self._history[self._head:self._head + self.history_len]
+        history.flags.writeable = False
+        context = self._context.view()
+        context.flags.writeable = False
+        return {
+            'message_history': history,
+            'conversation_context': context
+        }
+
+
+class ObservationLayout:
+    """
+    Fixed offsets of every Dict observation field in one flat float32 vector.
+
+    Fields are laid out in the order of the Dict space. ``views(x)`` slices
+    a flat vector, or a batch of them along the last axis, into per-field
+    arrays of the original shapes without copying; it works on NumPy arrays
+    and torch tensors alike, so a policy can split its input the same way.
+
+    Args:
+        observation_space: Dict observation space to flatten
+    """
+
+    def __init__(self, observation_space: spaces.Dict):
+        self.spaces = OrderedDict(observation_space.spaces)
+        self.fields: Dict[str, Tuple[int, int, Tuple[int, ...]]] = OrderedDict()
+        offset = 0
+        for key, space in self.spaces.items():
+            size = int(np.prod(space.shape))
+            self.fields[key] = (offset, size, tuple(space.shape))
+            offset += size
+        self.size = offset
+
+    @property
+    def slices(self) -> Dict[str, slice]:
+        """Field name -> slice of the flat vector."""
+        return {key: slice(offset, offset + size) for key, (offset, size, _) in self.fields.items()}
+
+    def flat_space(self) -> spaces.Box:
+        """Box space of the flat vector, with the fields' bounds."""
+        low = np.concatenate([
+            np.broadcast_to(space.low, space.shape).ravel() for space in self.spaces.values()
+        ]).astype(np.float32)
+        high = np.concatenate([
+            np.broadcast_to(space.high, space.shape).ravel() for space in self.spaces.values()
+        ]).astype(np.float32)
+        return spaces.Box(low=low, high=high, dtype=np.float32)
+
+    def views(self, flat: Any) -> Dict[str, Any]:
+        """Per-field views of flat (..., size) data, shaped (..., *field_shape)."""
+        batch_shape = tuple(flat.shape[:-1])
+        return {
+            key: flat[..., offset:offset + size].reshape(batch_shape + shape)
+            for key, (offset, size, shape) in self.fields.items()
+        }
+
+    def flatten(self, observation: Dict[str, np.ndarray], out: np.ndarray = None) -> np.ndarray:
+        """Write a Dict observation (optionally batched) into a flat vector."""
+        if out is None:
+            key, (_, _, shape) = next(iter(self.fields.items()))
+            value_shape = np.shape(observation[key])
+            batch_shape = value_shape[:len(value_shape) - len(shape)]
+            out = np.empty(batch_shape + (self.size,), dtype=np.float32)
+        for key, view in self.views(out).items():
+            np.copyto(view, observation[key], casting='unsafe')
+        return out
+
+    def unflatten(self, flat: np.ndarray) -> Dict[str, np.ndarray]:
+        """Dict observation with the original dtypes (copies)."""
+        return {
+            key: view.astype(self.spaces[key].dtype)
+            for key, view in self.views(flat).items()
+        }
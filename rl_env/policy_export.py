@@ -0,0 +1,500 @@
+"""
+Policy Export
+=============
+
+Exports a trained Stable-Baselines3 policy to a single ``.npz`` file and
+runs it with NumPy only, so bot processes start without importing torch.
+
+The file holds what ``predict(deterministic=True)`` uses: the order in
+which the features extractor flattens observation keys, the weights of
+the policy MLP and the action head, and the VecNormalize observation
+statistics the model was trained with.
+``NumpyPolicy`` replays that forward pass. Given raw observations, it
+returns the same actions as ``model.predict(vec_normalize.normalize_obs(obs),
+deterministic=True)``.
+
+With ``quantize='int8'`` every weight matrix is stored as int8 with one
+float32 scale per output row, which makes the file about 4x smaller. The
+weights are expanded back to float32 when the file is loaded.
+
+Supported: PPO/A2C (MlpPolicy, MultiInputPolicy), SAC and DQN, with
+flattened Box observations and Discrete, MultiDiscrete or Box actions.
+
+Example usage:
+    python policy_export.py --model models/PPO_conversation_final.zip \\
+        --vecnormalize models/PPO_conversation_vecnormalize.pkl \\
+        --out models/PPO_conversation_policy.npz --quantize int8 --check --benchmark
+
+    policy = NumpyPolicy('models/PPO_conversation_policy.npz')
+    action, _ = policy.predict(obs, deterministic=True)
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# Activation modules -> (name, parameters kept)
+_ACTIVATION_PARAMS = {
+    'Tanh': (),
+    'ReLU': (),
+    'Sigmoid': (),
+    'SiLU': (),
+    'ELU': ('alpha',),
+    'LeakyReLU': ('negative_slope',),
+    'Hardtanh': ('min_val', 'max_val'),
+}
+
+
+def _activation(spec: Dict[str, Any]) -> Callable[[np.ndarray], np.ndarray]:
+    kind = spec['type']
+    if kind == 'Tanh':
+        return lambda x: np.tanh(x, out=x)
+    if kind == 'ReLU':
+        return lambda x: np.maximum(x, 0, out=x)
+    if kind == 'Sigmoid':
+        return lambda x: 1.0 / (1.0 + np.exp(-x))
+    if kind == 'SiLU':
+        return lambda x: x / (1.0 + np.exp(-x))
+    if kind == 'ELU':
+        alpha = np.float32(spec['alpha'])
+        return lambda x: np.where(x > 0, x, alpha * np.expm1(x))
+    if kind == 'LeakyReLU':
+        slope = np.float32(spec['negative_slope'])
+        return lambda x: np.where(x > 0, x, slope * x)
+    if kind == 'Hardtanh':
+        return lambda x: np.clip(x, spec['min_val'], spec['max_val'], out=x)
+    raise ValueError(f"Unknown activation: {kind}")
+
+
+# ==================== Export ====================
+
+def load_model(path: str, algorithm: str = 'PPO') -> Any:
+    """Load a saved stable-baselines3 model on CPU."""
+    import stable_baselines3
+
+    return getattr(stable_baselines3, algorithm).load(path, device='cpu')
+
+
+def export_policy(
+    model: Any,
+    path: str,
+    vecnormalize: Optional[Union[str, Any]] = None,
+    quantize: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Write the deterministic policy of model to path (.npz).
+
+    Args:
+        model: Trained stable-baselines3 model (PPO, A2C, SAC or DQN)
+        path: Output file
+        vecnormalize: VecNormalize (or the path it was saved to) whose
+                      observation statistics are baked into the file
+        quantize: None (float32 weights) or 'int8'
+
+    Returns the metadata stored in the file.
+    """
+    if quantize not in (None, 'int8'):
+        raise ValueError(f"Unknown quantization: {quantize}")
+
+    policy = model.policy
+    arrays: Dict[str, np.ndarray] = {}
+
+    def add_layers(name: str, module: Any) -> List[Dict[str, Any]]:
+        specs = []
+        for layer in _flatten_modules(module):
+            kind = type(layer).__name__
+            if kind == 'Linear':
+                key = f"{name}.{len(specs)}"
+                weight = layer.weight.detach().cpu().numpy().astype(np.float32)
+                if quantize == 'int8':
+                    scale = np.abs(weight).max(axis=1) / 127.0
+                    scale[scale == 0] = 1.0
+                    arrays[f"{key}.weight"] = np.round(weight / scale[:, None]).astype(np.int8)
+                    arrays[f"{key}.scale"] = scale.astype(np.float32)
+                else:
+                    arrays[f"{key}.weight"] = weight
+                if layer.bias is not None:
+                    arrays[f"{key}.bias"] = layer.bias.detach().cpu().numpy().astype(np.float32)
+                specs.append({'type': 'Linear', 'key': key})
+            elif kind in _ACTIVATION_PARAMS:
+                spec = {'type': kind}
+                spec.update({p: float(getattr(layer, p)) for p in _ACTIVATION_PARAMS[kind]})
+                specs.append(spec)
+            elif kind not in ('Identity', 'Dropout'):
+                raise ValueError(f"Cannot export layer {kind} of {name}")
+        return specs
+
+    kind = type(policy).__name__
+    if hasattr(policy, 'mlp_extractor'):
+        # ActorCriticPolicy: extractor -> policy_net -> action_net
+        extractor = getattr(policy, 'pi_features_extractor', policy.features_extractor)
+        layers = add_layers('pi', policy.mlp_extractor.policy_net) + add_layers('action', policy.action_net)
+        head = _distribution_head(policy.action_dist, policy.squash_output)
+    elif hasattr(policy, 'actor') and hasattr(policy.actor, 'mu'):
+        # SAC: extractor -> latent_pi -> mu, tanh-squashed
+        extractor = policy.actor.features_extractor
+        layers = add_layers('pi', policy.actor.latent_pi) + add_layers('action', policy.actor.mu)
+        head = {'type': 'gaussian', 'squash': True}
+    elif hasattr(policy, 'q_net'):
+        # DQN: extractor -> q_net, greedy
+        extractor = policy.q_net.features_extractor
+        layers = add_layers('q', policy.q_net.q_net)
+        head = {'type': 'categorical'}
+    else:
+        raise ValueError(f"Cannot export policy {kind}")
+
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'algorithm': type(model).__name__,
+        'policy': kind,
+        'quantize': quantize,
+        'observation': _observation_meta(policy.observation_space, extractor),
+        'action': _action_meta(policy.action_space, head),
+        'layers': layers,
+        'normalization': None,
+    }
+
+    if isinstance(vecnormalize, str):
+        try:
+            from .evaluation import load_normalizer
+        except ImportError:  # running from inside rl_env/
+            from evaluation import load_normalizer
+        vecnormalize = load_normalizer(vecnormalize)
+    if vecnormalize is not None and vecnormalize.norm_obs:
+        meta['normalization'] = _normalization_meta(vecnormalize, meta['observation'], arrays)
+
+    arrays['meta'] = np.array(json.dumps(meta))
+    np.savez_compressed(path, **arrays)
+    return meta
+
+
+def _flatten_modules(module: Any) -> List[Any]:
+    """Leaf modules of nested nn.Sequential containers, in call order."""
+    if type(module).__name__ == 'Sequential':
+        return [leaf for child in module for leaf in _flatten_modules(child)]
+    return [module]
+
+
+def _distribution_head(dist: Any, squash_output: bool) -> Dict[str, Any]:
+    kind = type(dist).__name__
+    if kind == 'CategoricalDistribution':
+        return {'type': 'categorical'}
+    if kind == 'MultiCategoricalDistribution':
+        return {'type': 'multi_categorical', 'nvec': [int(n) for n in dist.action_dims]}
+    if kind in ('DiagGaussianDistribution', 'StateDependentNoiseDistribution'):
+        return {'type': 'gaussian', 'squash': bool(squash_output)}
+    raise ValueError(f"Cannot export action distribution {kind}")
+
+
+def _observation_meta(space: Any, extractor: Any) -> Dict[str, Any]:
+    """Key order and shapes the features extractor flattens and concatenates."""
+    kind = type(extractor).__name__
+    if kind == 'CombinedExtractor':
+        for key, sub in extractor.extractors.items():
+            if type(sub).__name__ != 'Flatten':
+                raise ValueError(f"Cannot export {type(sub).__name__} extractor of '{key}'")
+        return {
+            'keys': list(space.spaces),
+            'shapes': [list(s.shape) for s in space.spaces.values()],
+        }
+    if kind == 'FlattenExtractor':
+        return {'keys': None, 'shapes': [list(space.shape)]}
+    raise ValueError(f"Cannot export features extractor {kind}")
+
+
+def _action_meta(space: Any, head: Dict[str, Any]) -> Dict[str, Any]:
+    meta = dict(head, shape=list(space.shape))
+    if head['type'] == 'gaussian':
+        meta['low'] = np.asarray(space.low, dtype=np.float32).ravel().tolist()
+        meta['high'] = np.asarray(space.high, dtype=np.float32).ravel().tolist()
+    return meta
+
+
+def _normalization_meta(vecnormalize: Any, observation: Dict[str, Any],
+                        arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Store obs_rms mean/var and return the constants VecNormalize.normalize_obs uses."""
+    if observation['keys'] is None:
+        keys = [None]
+        stats = {None: vecnormalize.obs_rms}
+    else:
+        keys = list(vecnormalize.norm_obs_keys)
+        stats = vecnormalize.obs_rms
+    for key in keys:
+        suffix = '' if key is None else f".{key}"
+        arrays[f"obs_mean{suffix}"] = np.asarray(stats[key].mean, dtype=np.float64)
+        arrays[f"obs_var{suffix}"] = np.asarray(stats[key].var, dtype=np.float64)
+    return {
+        'keys': keys,
+        'clip_obs': float(vecnormalize.clip_obs),
+        'epsilon': float(vecnormalize.epsilon),
+    }
+
+
+# ==================== Runtime ====================
+
+class NumpyPolicy:
+    """
+    NumPy-only runtime of a policy written by export_policy.
+
+    Drop-in for model.predict() on raw (unnormalized) observations, batched
+    or single, e.g. as the model of PolicyServer or run_episode. Only
+    deterministic actions are available.
+
+    Args:
+        path: File written by export_policy
+    """
+
+    def __init__(self, path: str):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        self.meta = json.loads(str(arrays.pop('meta')))
+        if self.meta['format_version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported policy format {self.meta['format_version']}")
+
+        observation = self.meta['observation']
+        self.obs_keys: Optional[List[str]] = observation['keys']
+        self.obs_shapes = [tuple(s) for s in observation['shapes']]
+
+        self._normalize: Dict[Optional[str], Tuple[np.ndarray, np.ndarray]] = {}
+        normalization = self.meta['normalization']
+        if normalization is not None:
+            self.clip_obs = normalization['clip_obs']
+            for key in normalization['keys']:
+                suffix = '' if key is None else f".{key}"
+                std = np.sqrt(arrays[f"obs_var{suffix}"] + normalization['epsilon'])
+                self._normalize[key] = (arrays[f"obs_mean{suffix}"], std)
+
+        self._weights: List[np.ndarray] = []
+        self._layers = [self._build_layer(spec, arrays) for spec in self.meta['layers']]
+
+        action = self.meta['action']
+        self.action_shape = tuple(action['shape'])
+        self._head = action['type']
+        if self._head == 'multi_categorical':
+            self._splits = np.cumsum(action['nvec'])[:-1]
+        elif self._head == 'gaussian':
+            self._squash = action['squash']
+            self._low = np.asarray(action['low'], dtype=np.float32)
+            self._high = np.asarray(action['high'], dtype=np.float32)
+
+    def predict(
+        self,
+        observation: Union[np.ndarray, Dict[str, np.ndarray]],
+        state: Any = None,
+        episode_start: Any = None,
+        deterministic: bool = True
+    ) -> Tuple[np.ndarray, Any]:
+        """Actions for raw observations; same signature as BasePolicy.predict."""
+        if not deterministic:
+            raise ValueError("NumpyPolicy only computes deterministic actions")
+
+        first = observation if self.obs_keys is None else observation[self.obs_keys[0]]
+        vectorized = np.ndim(first) > len(self.obs_shapes[0])
+        x = self._features(observation, vectorized)
+        for layer in self._layers:
+            x = layer(x)
+        actions = self._actions(x).reshape((-1, *self.action_shape))
+        if not vectorized:
+            actions = actions.squeeze(axis=0)
+        return actions, state
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of the loaded weights."""
+        return sum(a.nbytes for a in self._weights)
+
+    # ==================== Private Methods ====================
+
+    def _build_layer(self, spec: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        if spec['type'] != 'Linear':
+            return _activation(spec)
+        key = spec['key']
+        weight = arrays[f"{key}.weight"].astype(np.float32)
+        if f"{key}.scale" in arrays:
+            weight *= arrays[f"{key}.scale"][:, None]
+        # x @ W.T as a contiguous (in, out) matrix
+        weight_t = np.ascontiguousarray(weight.T)
+        bias = arrays.get(f"{key}.bias")
+        self._weights.append(weight_t)
+        if bias is None:
+            return lambda x: x @ weight_t
+        return lambda x: np.add(x @ weight_t, bias)
+
+    def _normalized(self, key: Optional[str], obs: np.ndarray) -> np.ndarray:
+        if key not in self._normalize:
+            return np.asarray(obs, dtype=np.float32)
+        mean, std = self._normalize[key]
+        return np.clip((obs - mean) / std, -self.clip_obs, self.clip_obs).astype(np.float32)
+
+    def _features(self, observation: Any, vectorized: bool) -> np.ndarray:
+        """Normalize, flatten and concatenate like the features extractor."""
+        if self.obs_keys is None:
+            obs = self._normalized(None, observation)
+            return obs.reshape(len(obs) if vectorized else 1, -1)
+        parts = []
+        for key in self.obs_keys:
+            obs = self._normalized(key, observation[key])
+            parts.append(obs.reshape(len(obs) if vectorized else 1, -1))
+        return np.concatenate(parts, axis=1)
+
+    def _actions(self, out: np.ndarray) -> np.ndarray:
+        if self._head == 'categorical':
+            return out.argmax(axis=1)
+        if self._head == 'multi_categorical':
+            return np.stack([part.argmax(axis=1) for part in np.split(out, self._splits, axis=1)], axis=1)
+        if self._squash:
+            # Mode of the tanh-squashed Gaussian, rescaled to the action bounds
+            return self._low + 0.5 * (np.tanh(out) + 1.0) * (self._high - self._low)
+        return np.clip(out, self._low, self._high)
+
+
+# ==================== Parity & Latency ====================
+
+def sample_observations(space: Any, n: int, seed: int = 0) -> Union[np.ndarray, Dict[str, np.ndarray]]:
+    """n observations sampled from space, stacked into one batch."""
+    space.seed(seed)
+    samples = [space.sample() for _ in range(n)]
+    if isinstance(samples[0], dict):
+        return {key: np.stack([s[key] for s in samples]) for key in samples[0]}
+    return np.stack(samples)
+
+
+def check_parity(
+    model: Any,
+    policy: NumpyPolicy,
+    observations: Optional[Any] = None,
+    normalizer: Optional[Any] = None,
+    n_samples: int = 1000,
+    atol: Optional[float] = None,
+    min_agreement: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Compare NumpyPolicy with the torch model on the same raw observations.
+
+    The torch path sees normalizer.normalize_obs(obs), as in evaluation and
+    serving. Discrete actions must agree on at least min_agreement of the
+    observations; continuous ones must be within atol, in units of half
+    the action range (where it is bounded). Both default to
+    exact parity up to float rounding (1.0 and 1e-4), loosened to 0.95
+    and 0.1 for int8 weights, which flip near-tied logits.
+
+    Returns a dict with 'passed', 'n' and 'agreement' or 'max_abs_diff'.
+    """
+    quantized = policy.meta['quantize'] is not None
+    if atol is None:
+        atol = 0.1 if quantized else 1e-4
+    if min_agreement is None:
+        min_agreement = 0.95 if quantized else 1.0
+    if observations is None:
+        observations = sample_observations(model.observation_space, n_samples)
+    torch_obs = normalizer.normalize_obs(observations) if normalizer is not None else observations
+    expected, _ = model.predict(torch_obs, deterministic=True)
+    actual, _ = policy.predict(observations, deterministic=True)
+
+    result: Dict[str, Any] = {'n': len(expected)}
+    if policy.meta['action']['type'] == 'gaussian':
+        diff = np.abs(np.asarray(expected, dtype=np.float64) - actual).reshape(len(actual), -1)
+        half_range = (policy._high - policy._low) / 2.0
+        scale = np.where(np.isfinite(half_range), half_range, 1.0)
+        result['max_abs_diff'] = float(diff.max())
+        result['passed'] = bool((diff / scale).max() <= atol)
+    else:
+        expected = np.asarray(expected).reshape(len(expected), -1)
+        agreement = float(np.mean(np.all(expected == actual.reshape(len(actual), -1), axis=1)))
+        result['agreement'] = agreement
+        result['passed'] = agreement >= min_agreement
+    return result
+
+
+def benchmark_latency(
+    model: Any,
+    policy: NumpyPolicy,
+    normalizer: Optional[Any] = None,
+    batch_sizes: Sequence[int] = (1, 8, 64),
+    n_iters: int = 200
+) -> List[Dict[str, float]]:
+    """
+    Median predict() latency of the torch and NumPy paths per batch size.
+
+    The torch path includes normalizer.normalize_obs, which the NumPy
+    runtime does inside predict().
+    """
+    def median_seconds(fn: Callable[[], Any]) -> float:
+        for _ in range(5):
+            fn()
+        times = []
+        for _ in range(n_iters):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return float(np.median(times))
+
+    def torch_predict(obs):
+        if normalizer is not None:
+            obs = normalizer.normalize_obs(obs)
+        return model.predict(obs, deterministic=True)
+
+    rows = []
+    for batch in batch_sizes:
+        obs = sample_observations(model.observation_space, batch)
+        torch_s = median_seconds(lambda: torch_predict(obs))
+        numpy_s = median_seconds(lambda: policy.predict(obs))
+        rows.append({
+            'batch': batch,
+            'torch_ms': torch_s * 1e3,
+            'numpy_ms': numpy_s * 1e3,
+            'speedup': torch_s / numpy_s,
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description='Export a trained Slack agent for NumPy inference')
+    parser.add_argument('--model', type=str, required=True, help='Saved model (.zip)')
+    parser.add_argument('--algorithm', type=str, default='PPO', choices=['PPO', 'A2C', 'SAC', 'DQN'])
+    parser.add_argument('--vecnormalize', type=str, default=None,
+                        help='VecNormalize statistics saved with the model')
+    parser.add_argument('--out', type=str, default=None,
+                        help='Output file (default: <model>_policy.npz)')
+    parser.add_argument('--quantize', type=str, default=None, choices=['int8'],
+                        help='Store weights as int8 with per-row scales')
+    parser.add_argument('--check', action='store_true',
+                        help='Compare actions with the torch model')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Compare predict() latency with the torch model')
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 8, 64])
+
+    args = parser.parse_args()
+    out = args.out or f"{os.path.splitext(args.model)[0]}_policy.npz"
+
+    start = time.perf_counter()
+    model = load_model(args.model, args.algorithm)
+    torch_load = time.perf_counter() - start
+    try:
+        from .evaluation import load_normalizer
+    except ImportError:  # running from inside rl_env/
+        from evaluation import load_normalizer
+    normalizer = load_normalizer(args.vecnormalize)
+
+    meta = export_policy(model, out, normalizer, quantize=args.quantize)
+    start = time.perf_counter()
+    policy = NumpyPolicy(out)
+    numpy_load = time.perf_counter() - start
+    print(f"Exported {meta['algorithm']} {meta['policy']} to {out} "
+          f"({os.path.getsize(out) / 1024:.1f} KiB, weights {args.quantize or 'float32'})")
+    print(f"Load time: torch {torch_load * 1e3:.1f} ms, numpy {numpy_load * 1e3:.1f} ms")
+
+    if args.check:
+        parity = check_parity(model, policy, normalizer=normalizer)
+        print(f"Parity: {'passed' if parity['passed'] else 'FAILED'} {parity}")
+    if args.benchmark:
+        print(f"{'batch':>6} {'torch ms':>10} {'numpy ms':>10} {'speedup':>8}")
+        for row in benchmark_latency(model, policy, normalizer, args.batch_sizes):
+            print(f"{row['batch']:>6} {row['torch_ms']:>10.3f} {row['numpy_ms']:>10.3f} {row['speedup']:>7.1f}x")
@@ -0,0 +1,397 @@
+"""
+Slack Replay Buffer
+===================
+
+Off-policy replay buffer (SAC, ...) for Slack dict observations that
+stores each message embedding once.
+
+A stock DictReplayBuffer keeps every observation's ``(10, D)``
+message_history and ``(D,)`` conversation_context twice (obs and
+next_obs), although consecutive observations share 9 of 10 history rows.
+Here those fields are replaced by int32 ids into an EmbeddingStore that
+deduplicates rows by fingerprint, optionally quantizes them to float16 or
+int8 and can live in a memory-mapped file. Sampling rebuilds the batch
+with one vectorized gather per field.
+
+Unrelated to traces.ReplaySlackEnv, which replays recorded backend traffic.
+
+Example usage:
+    from stable_baselines3 import SAC
+    from rl_env.replay_buffer import SlackReplayBuffer
+
+    model = SAC(
+        'MultiInputPolicy', env, buffer_size=100000,
+        replay_buffer_class=SlackReplayBuffer,
+        replay_buffer_kwargs={'embedding_dtype': 'int8', 'storage_path': '/tmp/msgs.bin'}
+    )
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from gymnasium import spaces
+
+try:
+    from stable_baselines3.common.buffers import DictReplayBuffer, ReplayBuffer
+    from stable_baselines3.common.type_aliases import DictReplayBufferSamples
+except ImportError:  # stable-baselines3 is optional
+    DictReplayBuffer = ReplayBuffer = object
+
+
+# Observation keys holding message embeddings
+EMBEDDING_KEYS = ('message_history', 'conversation_context')
+
+# Storage dtype -> scale applied before storing (embeddings lie in [-1, 1])
+EMBEDDING_DTYPES = {
+    'float32': (np.float32, 1.0),
+    'float16': (np.float16, 1.0),
+    'int8': (np.int8, 127.0),
+}
+
+
+class EmbeddingStore:
+    """
+    Reference-counted, deduplicated store of embedding rows.
+
+    Rows are keyed by a 64-bit fingerprint of their float32 bits, so an
+    identical row (e.g. a message seen in ten consecutive histories) gets
+    the same id. Ids are freed for reuse once nothing references them, and
+    the store doubles when it runs out of ids.
+
+    Args:
+        dim: Embedding dimension
+        dtype: Storage dtype name ('float32', 'float16' or 'int8')
+        capacity: Initial number of rows
+        path: File to memory-map the rows into (default: in memory)
+    """
+
+    def __init__(self, dim: int, dtype: str = 'float32', capacity: int = 4096,
+                 path: Optional[str] = None):
+        if dtype not in EMBEDDING_DTYPES:
+            raise ValueError(f"Unknown embedding dtype: {dtype!r} (choose from {list(EMBEDDING_DTYPES)})")
+        self.dim = dim
+        self.dtype, self.scale = EMBEDDING_DTYPES[dtype]
+        self.path = path
+        self.capacity = 0
+        self.rows = self._allocate(max(int(capacity), 1))
+        self.refcount = np.zeros(self.capacity, dtype=np.int64)
+        self.fingerprints = np.zeros(self.capacity, dtype=np.uint64)
+        self._index: Dict[int, int] = {}
+        self._free: List[int] = list(range(self.capacity - 1, -1, -1))
+        # Odd multipliers per 32-bit word; the weighted sum wraps mod 2**64
+        rng = np.random.default_rng(0x51ACC)
+        self._multipliers = rng.integers(1, 2**63, size=dim, dtype=np.uint64) * 2 + 1
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def nbytes(self) -> int:
+        return self.rows.nbytes + self.refcount.nbytes + self.fingerprints.nbytes
+
+    def fingerprint(self, rows: np.ndarray) -> np.ndarray:
+        """64-bit fingerprints of float32 rows (shape (..., dim))."""
+        bits = np.ascontiguousarray(rows, dtype=np.float32).view(np.uint32)
+        return (bits.astype(np.uint64) * self._multipliers).sum(axis=-1, dtype=np.uint64)
+
+    def intern(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Ids of rows (shape (..., dim)), storing the ones not seen before.
+
+        Ids are not referenced yet; call acquire() for every place that
+        keeps them.
+        """
+        keys = self.fingerprint(rows)
+        unique, first, inverse = np.unique(keys.ravel(), return_index=True, return_inverse=True)
+        flat_rows = rows.reshape(-1, self.dim)
+        ids = np.empty(len(unique), dtype=np.int32)
+        new_slots, new_rows = [], []
+        for i, key in enumerate(unique.tolist()):
+            row_id = self._index.get(key)
+            if row_id is None:
+                if not self._free:
+                    self._grow()
+                row_id = self._free.pop()
+                self._index[key] = row_id
+                self.fingerprints[row_id] = key
+                new_slots.append(row_id)
+                new_rows.append(first[i])
+            ids[i] = row_id
+        if new_slots:
+            self._write(np.array(new_slots), flat_rows[new_rows])
+        return ids[inverse].reshape(keys.shape)
+
+    def acquire(self, ids: np.ndarray):
+        """Add one reference to each id (repeats count)."""
+        np.add.at(self.refcount, ids.ravel(), 1)
+
+    def release(self, ids: np.ndarray):
+        """Drop one reference per id; ids left unreferenced become free."""
+        flat = ids.ravel()
+        np.subtract.at(self.refcount, flat, 1)
+        freed = np.unique(flat[self.refcount[flat] == 0])
+        for row_id in freed.tolist():
+            del self._index[int(self.fingerprints[row_id])]
+            self._free.append(row_id)
+
+    def gather(self, ids: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Float32 rows for ids, shape ids.shape + (dim,)."""
+        rows = self.rows[ids]
+        if out is None:
+            out = np.empty(ids.shape + (self.dim,), dtype=np.float32)
+        if self.scale == 1.0:
+            out[...] = rows
+        else:
+            np.multiply(rows, np.float32(1.0 / self.scale), out=out)
+        return out
+
+    def flush(self):
+        if isinstance(self.rows, np.memmap):
+            self.rows.flush()
+
+    # ==================== Private Methods ====================
+
+    def _write(self, slots: np.ndarray, rows: np.ndarray):
+        if self.scale == 1.0:
+            self.rows[slots] = rows
+        else:
+            self.rows[slots] = np.rint(np.clip(rows, -1.0, 1.0) * self.scale)
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        """Row array of the given capacity, keeping existing rows."""
+        old, old_capacity = getattr(self, 'rows', None), self.capacity
+        if self.path is None:
+            rows = np.zeros((capacity, self.dim), dtype=self.dtype)
+            if old is not None:
+                rows[:old_capacity] = old
+        else:
+            # Extend the file in place; existing rows stay where they are
+            if old is not None:
+                old.flush()
+                del old
+            mode = 'r+' if old_capacity else 'w+'
+            if old_capacity:
+                with open(self.path, 'r+b') as f:
+                    f.truncate(capacity * self.dim * np.dtype(self.dtype).itemsize)
+            rows = np.memmap(self.path, dtype=self.dtype, mode=mode, shape=(capacity, self.dim))
+        self.capacity = capacity
+        return rows
+
+    def _grow(self):
+        old_capacity = self.capacity
+        self.rows = self._allocate(old_capacity * 2)
+        self.refcount = np.concatenate([self.refcount, np.zeros(old_capacity, dtype=np.int64)])
+        self.fingerprints = np.concatenate([self.fingerprints, np.zeros(old_capacity, dtype=np.uint64)])
+        self._free.extend(range(self.capacity - 1, old_capacity - 1, -1))
+
+
+class SlackReplayBuffer(DictReplayBuffer):
+    """
+    DictReplayBuffer that keeps message embeddings in an EmbeddingStore.
+
+    Embedding fields (EMBEDDING_KEYS present in the observation space) of
+    obs and next_obs are stored as int32 ids; all other fields, actions,
+    rewards and dones are stored like DictReplayBuffer does. Pass it as
+    ``replay_buffer_class`` to SAC/TD3/DQN.
+
+    Without stable-baselines3 the buffer still works on NumPy arrays
+    through add() and sample_arrays().
+
+    Args:
+        buffer_size: Max number of transitions (across all envs)
+        observation_space: Dict observation space of the env
+        action_space: Action space of the env
+        device: Torch device of sampled batches
+        n_envs: Number of parallel envs
+        optimize_memory_usage: Not supported (embedding dedup supersedes it)
+        handle_timeout_termination: Don't treat time-limit truncation as termination
+        embedding_dtype: 'float32', 'float16' or 'int8' storage of embeddings
+        storage_path: File to memory-map the embedding store into
+        embedding_capacity: Initial embedding store rows (grows as needed)
+    """
+
+    def __init__(
+        self,
+        buffer_size: int,
+        observation_space: spaces.Dict,
+        action_space: spaces.Space,
+        device: Any = 'auto',
+        n_envs: int = 1,
+        optimize_memory_usage: bool = False,
+        handle_timeout_termination: bool = True,
+        embedding_dtype: str = 'float32',
+        storage_path: Optional[str] = None,
+        embedding_capacity: int = 4096
+    ):
+        if not isinstance(observation_space, spaces.Dict):
+            raise ValueError("SlackReplayBuffer needs a Dict observation space "
+                             "(use DictReplayBuffer/ReplayBuffer for flat observations)")
+        if optimize_memory_usage:
+            raise ValueError("optimize_memory_usage is not supported by SlackReplayBuffer")
+
+        if ReplayBuffer is object:
+            self.buffer_size = max(buffer_size // n_envs, 1)
+            self.observation_space = observation_space
+            self.action_space = action_space
+            self.action_dim = spaces.flatdim(action_space)
+            self.pos = 0
+            self.full = False
+            self.n_envs = n_envs
+        else:
+            # Skip DictReplayBuffer.__init__, which preallocates every field
+            super(ReplayBuffer, self).__init__(
+                buffer_size, observation_space, action_space, device, n_envs=n_envs
+            )
+        self.optimize_memory_usage = False
+        self.handle_timeout_termination = handle_timeout_termination
+
+        size, n = self.buffer_size, self.n_envs
+        self.embedding_keys = tuple(k for k in EMBEDDING_KEYS if k in observation_space.spaces)
+        self.dense_keys = tuple(k for k in observation_space.spaces if k not in self.embedding_keys)
+        self.embedding_shapes = {k: observation_space[k].shape for k in self.embedding_keys}
+        dims = {shape[-1] for shape in self.embedding_shapes.values()}
+        if len(dims) > 1:
+            raise ValueError(f"Embedding fields must share one dimension, got {sorted(dims)}")
+
+        self.store = EmbeddingStore(
+            dims.pop() if dims else 1, embedding_dtype, embedding_capacity, storage_path
+        )
+
+        # Embedding rows per observation: all embedding fields back to back
+        self._row_slices: Dict[str, Tuple[slice, Tuple[int, ...]]] = {}
+        start = 0
+        for key in self.embedding_keys:
+            rows_shape = self.embedding_shapes[key][:-1]
+            count = int(np.prod(rows_shape, dtype=np.int64))
+            self._row_slices[key] = (slice(start, start + count), rows_shape)
+            start += count
+        self.rows_per_obs = start
+
+        # Ids of the obs and next_obs rows of every transition
+        self.observation_ids = np.zeros((size, n, start), dtype=np.int32)
+        self.next_observation_ids = np.zeros((size, n, start), dtype=np.int32)
+
+        self.observations = {
+            key: np.zeros((size, n) + observation_space[key].shape, dtype=observation_space[key].dtype)
+            for key in self.dense_keys
+        }
+        self.next_observations = {
+            key: np.zeros_like(value) for key, value in self.observations.items()
+        }
+        action_dtype = action_space.dtype if action_space.dtype is not None else np.float32
+        self.actions = np.zeros((size, n, self.action_dim), dtype=action_dtype)
+        self.rewards = np.zeros((size, n), dtype=np.float32)
+        self.dones = np.zeros((size, n), dtype=np.float32)
+        self.timeouts = np.zeros((size, n), dtype=np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the buffer, including the embedding store."""
+        arrays = [self.observation_ids, self.next_observation_ids, self.actions,
+                  self.rewards, self.dones, self.timeouts]
+        arrays += list(self.observations.values()) + list(self.next_observations.values())
+        return sum(a.nbytes for a in arrays) + self.store.nbytes
+
+    def add(
+        self,
+        obs: Dict[str, np.ndarray],
+        next_obs: Dict[str, np.ndarray],
+        action: np.ndarray,
+        reward: np.ndarray,
+        done: np.ndarray,
+        infos: List[Dict[str, Any]]
+    ):
+        """Store one transition per env, interning its embedding rows."""
+        pos = self.pos
+        obs_ids = self._intern(obs)
+        next_ids = self._intern(next_obs)
+        self.store.acquire(obs_ids)
+        self.store.acquire(next_ids)
+        if self.full:
+            self.store.release(self.observation_ids[pos])
+            self.store.release(self.next_observation_ids[pos])
+        self.observation_ids[pos] = obs_ids
+        self.next_observation_ids[pos] = next_ids
+
+        for key in self.dense_keys:
+            self.observations[key][pos] = np.asarray(obs[key]).reshape(self.observations[key].shape[1:])
+            self.next_observations[key][pos] = np.asarray(next_obs[key]).reshape(self.observations[key].shape[1:])
+        self.actions[pos] = np.asarray(action).reshape((self.n_envs, self.action_dim))
+        self.rewards[pos] = np.asarray(reward)
+        self.dones[pos] = np.asarray(done)
+        if self.handle_timeout_termination:
+            self.timeouts[pos] = [info.get('TimeLimit.truncated', False) for info in infos]
+
+        self.pos += 1
+        if self.pos == self.buffer_size:
+            self.full = True
+            self.pos = 0
+
+    def reset(self):
+        """Drop all transitions and release their embeddings."""
+        if self.full or self.pos:
+            end = self.buffer_size if self.full else self.pos
+            self.store.release(self.observation_ids[:end])
+            self.store.release(self.next_observation_ids[:end])
+        self.pos = 0
+        self.full = False
+
+    def sample_arrays(self, batch_size: int) -> Dict[str, Any]:
+        """Random batch as NumPy arrays (no normalization, no torch)."""
+        upper = self.buffer_size if self.full else self.pos
+        batch_inds = np.random.randint(0, upper, size=batch_size)
+        env_indices = np.random.randint(0, self.n_envs, size=batch_size)
+        return self._gather(batch_inds, env_indices)
+
+    def _get_samples(self, batch_inds: np.ndarray, env: Optional[Any] = None) -> 'DictReplayBufferSamples':
+        env_indices = np.random.randint(0, high=self.n_envs, size=(len(batch_inds),))
+        batch = self._gather(batch_inds, env_indices)
+        obs = self._normalize_obs(batch['observations'], env)
+        next_obs = self._normalize_obs(batch['next_observations'], env)
+        return DictReplayBufferSamples(
+            observations={key: self.to_torch(value) for key, value in obs.items()},
+            actions=self.to_torch(batch['actions']),
+            next_observations={key: self.to_torch(value) for key, value in next_obs.items()},
+            dones=self.to_torch(batch['dones']).reshape(-1, 1),
+            rewards=self.to_torch(self._normalize_reward(batch['rewards'].reshape(-1, 1), env)),
+        )
+
+    def close(self):
+        """Flush the memory-mapped embedding store, if any."""
+        self.store.flush()
+
+    # ==================== Private Methods ====================
+
+    def _intern(self, obs: Dict[str, np.ndarray]) -> np.ndarray:
+        """(n_envs, rows_per_obs) ids of an observation's embedding rows."""
+        rows = np.concatenate([
+            np.asarray(obs[key], dtype=np.float32).reshape(self.n_envs, -1, self.store.dim)
+            for key in self.embedding_keys
+        ], axis=1)
+        return self.store.intern(rows)
+
+    def _gather(self, batch_inds: np.ndarray, env_indices: np.ndarray) -> Dict[str, Any]:
+        """Rebuild observations of the sampled transitions."""
+        batch_size = len(batch_inds)
+
+        def observations(ids: np.ndarray, dense: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+            rows = self.store.gather(ids[batch_inds, env_indices])
+            out = {}
+            for key in self.observation_space.spaces:
+                if key in self._row_slices:
+                    rows_slice, _ = self._row_slices[key]
+                    out[key] = rows[:, rows_slice].reshape((batch_size,) + self.embedding_shapes[key])
+                else:
+                    out[key] = dense[key][batch_inds, env_indices]
+            return out
+
+        dones = self.dones[batch_inds, env_indices]
+        if self.handle_timeout_termination:
+            dones = dones * (1 - self.timeouts[batch_inds, env_indices])
+        return {
+            'observations': observations(self.observation_ids, self.observations),
+            'next_observations': observations(self.next_observation_ids, self.next_observations),
+            'actions': self.actions[batch_inds, env_indices],
+            'rewards': self.rewards[batch_inds, env_indices],
+            'dones': dones,
+        }
@@ -0,0 +1,408 @@
+"""
+Reward Kernels
+==============
+
+Per-task reward functions that score a whole batch of transitions at once.
+
+A transition batch is a dict of equally long 1-D arrays (see
+TRANSITION_FIELDS): the action taken, whether it succeeded, and features
+of the incoming message it answers (pending, latency, ground-truth label,
+channel it belongs in) plus the relevance of the agent's reply. SlackGymEnv
+fills a batch of one per step; SlackVecEnv fills one row per environment.
+
+- ConversationKernel: reply to pending messages, relevantly and quickly.
+- ModerationKernel: dismiss spam and inappropriate messages instead of
+  engaging with them.
+- RoutingKernel: move conversations to the channel they belong in.
+
+Weights and kernel parameters come from a config dict or JSON/YAML file
+layered over DEFAULT_REWARD_CONFIG.
+
+Example usage:
+    from rl_env.rewards import load_reward_config, make_reward_kernel, make_transitions
+
+    kernel = make_reward_kernel('moderation', load_reward_config('rewards.json'))
+    batch = make_transitions(256)
+    batch['action_type'][:] = actions
+    ...
+    rewards = kernel(batch)                              # (256,) float32
+"""
+
+import copy
+import json
+import math
+import re
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+# Label codes of an incoming message
+LABEL_UNKNOWN = -1
+LABEL_OK = 0
+LABEL_SPAM = 1
+LABEL_INAPPROPRIATE = 2
+LABEL_CODES = {'ok': LABEL_OK, 'spam': LABEL_SPAM, 'inappropriate': LABEL_INAPPROPRIATE}
+
+# Action types (see SlackGymEnv.action_space)
+SEND_MESSAGE, REACT, CREATE_CHANNEL, JOIN_CHANNEL, SEND_DM, MARK_READ, PIN, SEARCH, NO_ACTION = range(9)
+
+# Actions that deal with the pending incoming message
+HANDLING_ACTIONS = (SEND_MESSAGE, JOIN_CHANNEL, SEND_DM, MARK_READ)
+
+# Actions that engage with a message (replying, reacting, pinning)
+ENGAGING_ACTIONS = (SEND_MESSAGE, REACT, PIN)
+
+
+def action_mask(actions: Sequence[int]) -> np.ndarray:
+    """Boolean lookup table over action types; mask[action_type] is a cheap isin()."""
+    mask = np.zeros(NO_ACTION + 1, dtype=bool)
+    mask[list(actions)] = True
+    return mask
+
+# Transition arrays read by the kernels, with their dtype and fill value
+TRANSITION_FIELDS = {
+    'action_type': (np.int64, NO_ACTION),
+    'success': (np.bool_, False),
+    'pending': (np.bool_, False),          # An incoming message is not handled yet
+    'latency': (np.float32, 0.0),          # Steps since that message arrived
+    'relevance': (np.float32, 0.0),        # Cosine(reply, message) for sends
+    'label': (np.int8, LABEL_UNKNOWN),     # LABEL_* of that message
+    'target_channel': (np.int64, -1),      # Channel slot it belongs in (-1: unknown)
+    'current_channel': (np.int64, -1),     # Agent's channel slot after the action
+}
+
+DEFAULT_REWARD_CONFIG = {
+    'common': {
+        'success_bonus': 0.1,
+        'action_cost': 0.01
+    },
+    'conversation': {
+        'reward_weights': {
+            'response_relevance': 0.4,
+            'timeliness': 0.3,
+            'engagement': 0.3
+        },
+        'params': {
+            'timeliness_horizon': 5.0,
+            'unprompted_penalty': 0.05
+        }
+    },
+    'moderation': {
+        'reward_weights': {
+            'spam_detection': 0.5,
+            'inappropriate_content': 0.5
+        },
+        'params': {
+            'false_positive_penalty': 0.2
+        }
+    },
+    'routing': {
+        'reward_weights': {
+            'correct_channel': 0.7,
+            'message_clarity': 0.3
+        },
+        'params': {
+            'wrong_channel_penalty': 0.5
+        }
+    }
+}
+
+
+def load_reward_config(source: Optional[Union[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    DEFAULT_REWARD_CONFIG with overrides from a dict or a .json/.yaml file.
+
+    Overrides are merged key by key, so a file only needs the values it
+    changes, e.g. {"moderation": {"reward_weights": {"spam_detection": 0.8}}}.
+    """
+    config = copy.deepcopy(DEFAULT_REWARD_CONFIG)
+    if source is None:
+        return config
+    if isinstance(source, str):
+        with open(source, encoding='utf-8') as f:
+            if source.endswith(('.yaml', '.yml')):
+                try:
+                    import yaml
+                except ImportError as e:
+                    raise ImportError("YAML reward configs require PyYAML: pip install pyyaml") from e
+                source = yaml.safe_load(f) or {}
+            else:
+                source = json.load(f)
+    _merge(config, source)
+    return config
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]):
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = value
+
+
+def make_transitions(n: int) -> Dict[str, np.ndarray]:
+    """Transition batch of n rows, filled with each field's default."""
+    return {
+        key: np.full(n, fill, dtype=dtype)
+        for key, (dtype, fill) in TRANSITION_FIELDS.items()
+    }
+
+
+class RewardKernel:
+    """
+    Base kernel: success bonus minus a small cost for every non-wait action.
+
+    Subclasses add task_rewards(); ``fields`` lists the transition arrays
+    they read, so environments can skip computing the others.
+
+    Args:
+        reward_weights: Task weights (see DEFAULT_REWARD_CONFIG)
+        success_bonus: Reward for any successful action
+        action_cost: Penalty for any action other than waiting
+        **params: Task parameters
+    """
+
+    fields: Tuple[str, ...] = ('action_type', 'success')
+
+    def __init__(self, reward_weights: Optional[Dict[str, float]] = None,
+                 success_bonus: float = 0.1, action_cost: float = 0.01, **params):
+        self.weights = dict(reward_weights or {})
+        self.success_bonus = success_bonus
+        self.action_cost = action_cost
+        self.params = params
+
+    def __call__(self, batch: Dict[str, np.ndarray]) -> np.ndarray:
+        """Rewards (float32) for every row of the batch."""
+        rewards = batch['success'] * np.float32(self.success_bonus)
+        rewards -= (batch['action_type'] != NO_ACTION) * np.float32(self.action_cost)
+        rewards += self.task_rewards(batch)
+        return rewards.astype(np.float32, copy=False)
+
+    def task_rewards(self, batch: Dict[str, np.ndarray]) -> Union[np.ndarray, float]:
+        return 0.0
+
+    def score(self, action_type: int, success: bool, pending: bool = False,
+              latency: float = 0.0, relevance: float = 0.0, label: int = LABEL_UNKNOWN,
+              target_channel: int = -1, current_channel: int = -1) -> float:
+        """
+        Reward of one transition, in plain Python floats.
+
+        Same result as __call__ on a one-row batch (up to float32 rounding)
+        without building arrays; single environments score every step here.
+        """
+        reward = self.success_bonus if success else 0.0
+        if action_type != NO_ACTION:
+            reward -= self.action_cost
+        if pending and success:
+            reward += self.task_score(action_type, latency, relevance, label,
+                                      target_channel, current_channel)
+        elif success:
+            reward += self.unpending_score(action_type)
+        return reward
+
+    def task_score(self, action_type: int, latency: float, relevance: float, label: int,
+                   target_channel: int, current_channel: int) -> float:
+        """Task reward of a successful action while a message is pending."""
+        return 0.0
+
+    def unpending_score(self, action_type: int) -> float:
+        """Task reward of a successful action with nothing pending."""
+        return 0.0
+
+
+class ConversationKernel(RewardKernel):
+    """
+    Reward replies to pending messages.
+
+    A successful send to a pending message earns relevance (cosine between
+    reply and message), timeliness (exp(-latency / timeliness_horizon)) and
+    engagement; a send with nothing pending costs unprompted_penalty.
+    """
+
+    fields = ('action_type', 'success', 'pending', 'latency', 'relevance')
+
+    def task_rewards(self, batch: Dict[str, np.ndarray]) -> np.ndarray:
+        w = self.weights
+        horizon = self.params.get('timeliness_horizon', 5.0)
+        sent = (batch['action_type'] == SEND_MESSAGE) & batch['success']
+        replied = sent & batch['pending']
+
+        unprompted = np.float32(self.params.get('unprompted_penalty', 0.0))
+
+        relevance = np.clip(batch['relevance'], 0.0, 1.0)
+        timeliness = np.exp(batch['latency'] * np.float32(-1.0 / horizon))
+        reply_value = (
+            np.float32(w.get('response_relevance', 0.0)) * relevance
+            + np.float32(w.get('timeliness', 0.0)) * timeliness
+            + np.float32(w.get('engagement', 0.0)) + unprompted
+        )
+        # Every send pays unprompted_penalty; replies to pending messages get it back
+        return reply_value * replied - unprompted * sent
+
+    def task_score(self, action_type, latency, relevance, label, target_channel, current_channel):
+        if action_type != SEND_MESSAGE:
+            return 0.0
+        w = self.weights
+        horizon = self.params.get('timeliness_horizon', 5.0)
+        return (
+            w.get('response_relevance', 0.0) * min(max(relevance, 0.0), 1.0)
+            + w.get('timeliness', 0.0) * math.exp(-latency / horizon)
+            + w.get('engagement', 0.0)
+        )
+
+    def unpending_score(self, action_type):
+        if action_type != SEND_MESSAGE:
+            return 0.0
+        return -self.params.get('unprompted_penalty', 0.0)
+
+
+class ModerationKernel(RewardKernel):
+    """
+    Reward dismissing (mark-read) pending spam and inappropriate messages.
+
+    Engaging with them (reply, react, pin) costs the same weight; dismissing
+    a pending clean message costs false_positive_penalty. Messages without
+    a label are ignored.
+    """
+
+    fields = ('action_type', 'success', 'pending', 'label')
+
+    def __init__(self, *args, **kwargs):
+        super(ModerationKernel, self).__init__(*args, **kwargs)
+        # Weight of dismissing a message, indexed by label + 1 (LABEL_UNKNOWN = -1)
+        self._weights = np.zeros(len(LABEL_CODES) + 1, dtype=np.float32)
+        self._weights[LABEL_SPAM + 1] = self.weights.get('spam_detection', 0.0)
+        self._weights[LABEL_INAPPROPRIATE + 1] = self.weights.get('inappropriate_content', 0.0)
+        self._weights[LABEL_OK + 1] = -self.params.get('false_positive_penalty', 0.0)
+        self._engaging = action_mask(ENGAGING_ACTIONS)
+
+    def task_rewards(self, batch: Dict[str, np.ndarray]) -> np.ndarray:
+        action_type = batch['action_type']
+        active = batch['pending'] & batch['success']
+        weight = self._weights[batch['label'] + 1]
+        dismissed = active & (action_type == MARK_READ)
+        # Engaging with a clean message is neither rewarded nor penalized
+        engaged = active & self._engaging[action_type]
+        return weight * dismissed - np.maximum(weight, 0.0) * engaged
+
+    def task_score(self, action_type, latency, relevance, label, target_channel, current_channel):
+        weight = float(self._weights[label + 1])
+        if action_type == MARK_READ:
+            return weight
+        if action_type in ENGAGING_ACTIONS:
+            return -max(weight, 0.0)
+        return 0.0
+
+
+class RoutingKernel(RewardKernel):
+    """
+    Reward moving a pending message's conversation to the channel it belongs in.
+
+    Joining that channel earns correct_channel, replying there earns
+    message_clarity scaled by relevance; doing either in another channel
+    costs wrong_channel_penalty times the weight. Messages without a
+    target channel are ignored.
+    """
+
+    fields = ('action_type', 'success', 'pending', 'relevance', 'target_channel', 'current_channel')
+
+    def task_rewards(self, batch: Dict[str, np.ndarray]) -> np.ndarray:
+        w = self.weights
+        penalty = self.params.get('wrong_channel_penalty', 0.5)
+        action_type = batch['action_type']
+        target = batch['target_channel']
+        active = batch['pending'] & batch['success'] & (target >= 0)
+        correct = batch['current_channel'] == target
+
+        joined = active & (action_type == JOIN_CHANNEL)
+        sent = active & (action_type == SEND_MESSAGE)
+        w_channel = np.float32(w.get('correct_channel', 0.0))
+        w_clarity = np.float32(w.get('message_clarity', 0.0))
+
+        channel_score = np.where(correct, w_channel, np.float32(-penalty) * w_channel)
+        clarity = w_clarity * np.clip(batch['relevance'], 0.0, 1.0)
+        clarity_score = np.where(correct, clarity, np.float32(-penalty) * w_clarity)
+        return channel_score * joined + clarity_score * sent
+
+    def task_score(self, action_type, latency, relevance, label, target_channel, current_channel):
+        if target_channel < 0 or action_type not in (JOIN_CHANNEL, SEND_MESSAGE):
+            return 0.0
+        penalty = self.params.get('wrong_channel_penalty', 0.5)
+        correct = current_channel == target_channel
+        if action_type == JOIN_CHANNEL:
+            weight = self.weights.get('correct_channel', 0.0)
+            return weight if correct else -penalty * weight
+        weight = self.weights.get('message_clarity', 0.0)
+        return weight * min(max(relevance, 0.0), 1.0) if correct else -penalty * weight
+
+
+REWARD_KERNELS = {
+    'conversation': ConversationKernel,
+    'moderation': ModerationKernel,
+    'routing': RoutingKernel,
+}
+
+
+def make_reward_kernel(task: str, config: Optional[Dict[str, Any]] = None) -> RewardKernel:
+    """
+    Kernel for a task, configured from a reward config (see load_reward_config).
+
+    Unknown tasks get the base kernel (success bonus and action cost only).
+    """
+    config = config if config is not None else DEFAULT_REWARD_CONFIG
+    task_config = config.get(task, {})
+    return REWARD_KERNELS.get(task, RewardKernel)(
+        reward_weights=task_config.get('reward_weights'),
+        **config.get('common', {}),
+        **task_config.get('params', {})
+    )
+
+
+class MessageLabeler:
+    """
+    Ground-truth labels of incoming messages for the reward kernels.
+
+    Messages in ``known`` (e.g. the simulated backend's SIM_LABELS) use
+    their recorded label; others fall back to keyword rules.
+
+    Args:
+        known: text -> (label name, channel name)
+        channel_keywords: channel name -> keywords that route a message there
+    """
+
+    SPAM_PATTERN = re.compile(
+        r"\b(free|click here|buy now|giveaway|limited offer|winner|crypto|promo code)\b|https?://",
+        re.IGNORECASE
+    )
+    INAPPROPRIATE_PATTERN = re.compile(
+        r"\b(idiots?|stupid|shut up|dumb|hate (you|this team)|useless)\b", re.IGNORECASE
+    )
+    DEFAULT_CHANNEL_KEYWORDS = {
+        'engineering': ('build', 'deploy', 'pr', 'staging', 'migration', 'bug', 'release'),
+        'support': ('down', 'error', 'help', 'broken', 'docs', 'ticket'),
+        'random': ('lunch', 'coffee', 'weekend'),
+        'announcements': ('standup', 'meeting', 'moving', 'schedule'),
+    }
+
+    def __init__(self, known: Optional[Dict[str, Tuple[str, Optional[str]]]] = None,
+                 channel_keywords: Optional[Dict[str, Sequence[str]]] = None):
+        self.known = {
+            text: (LABEL_CODES[label], channel) for text, (label, channel) in (known or {}).items()
+        }
+        self.channel_keywords = channel_keywords or self.DEFAULT_CHANNEL_KEYWORDS
+
+    def label(self, text: str) -> Tuple[int, Optional[str]]:
+        """(LABEL_* code, channel name or None) of a message."""
+        known = self.known.get(text)
+        if known is not None:
+            return known
+        if self.SPAM_PATTERN.search(text):
+            return LABEL_SPAM, None
+        if self.INAPPROPRIATE_PATTERN.search(text):
+            return LABEL_INAPPROPRIATE, None
+        words = set(re.findall(r"[a-z0-9']+", text.lower()))
+        for channel, keywords in self.channel_keywords.items():
+            if words.intersection(keywords):
+                return LABEL_OK, channel
+        return LABEL_OK, 'general'
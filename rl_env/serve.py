@@ -0,0 +1,366 @@
+"""
+Policy Serving
+==============
+
+Runs a trained policy as a bot in many channels at once.
+
+Every channel is served by an AsyncSlackEnv session on one event loop, so
+hundreds of channels share one process and one connection pool. A
+teammate's message in a channel makes that channel a pending request.
+The server collects pending requests into a micro-batch: it waits until
+max_batch channels are pending or the oldest request has waited
+max_wait. It then builds their observations, runs a single
+``model.predict`` for the whole batch (through the frozen VecNormalize
+statistics saved with the model), and dispatches the actions
+concurrently. The sessions of a workspace share one AsyncWorkspacePoller,
+so channel info, presence and unread counts are filled as in training.
+
+Request latency runs from the message arriving on the socket until the
+bot's action has been sent. Its quantiles, the batch sizes and the
+throughput are reported every report_interval seconds.
+
+Example usage:
+    python serve.py --model models/PPO_conversation_final.zip \\
+        --vecnormalize models/PPO_conversation_vecnormalize.pkl \\
+        --workspaces 50 --channels 4 --max-batch 64 --max-wait-ms 20
+
+    # exported policy, no torch in the bot process
+    python serve.py --model models/PPO_conversation_policy.npz --workspaces 50 --channels 4
+
+    # or from code
+    server = PolicyServer(envs, model, normalizer=load_normalizer(path))
+    await server.start(channels=[0, 1, 2, 3] * 50)
+    await server.run(duration=60)
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .async_slack_env import AsyncSlackEnv, make_http_session
+    from .evaluation import load_normalizer
+    from .instrumentation import LatencyHistogram
+    from .message_store import MessageRecord
+    from .policy_export import NumpyPolicy
+except ImportError:  # running from inside rl_env/
+    from async_slack_env import AsyncSlackEnv, make_http_session
+    from evaluation import load_normalizer
+    from instrumentation import LatencyHistogram
+    from message_store import MessageRecord
+    from policy_export import NumpyPolicy
+
+
+class PolicyServer:
+    """
+    Micro-batched policy inference over many live channel sessions.
+
+    Requests from the same channel coalesce: a channel with several new
+    messages gets one action, computed from its latest observation, and
+    its latency counts from the oldest of those messages.
+
+    Args:
+        envs: One AsyncSlackEnv per served channel
+        model: Anything with predict(batched_obs, deterministic=...) -> (actions, state)
+        normalizer: Frozen VecNormalize for observations (see evaluation.load_normalizer)
+        max_batch: Most requests per predict() call
+        max_wait: Seconds the oldest pending request may wait for the batch to fill
+        deterministic: Use the deterministic policy action
+        action_fn: Maps (batched actions, row) to one env action
+                   (default: row of each array in a dict of actions)
+        report_interval: Seconds between printed reports (0 disables)
+    """
+
+    def __init__(
+        self,
+        envs: Sequence[AsyncSlackEnv],
+        model: Any,
+        normalizer: Optional[Any] = None,
+        max_batch: int = 64,
+        max_wait: float = 0.02,
+        deterministic: bool = True,
+        action_fn: Optional[Callable[[Any, int], Dict[str, Any]]] = None,
+        report_interval: float = 10.0
+    ):
+        self.envs = list(envs)
+        self.model = model
+        self.normalizer = normalizer
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.deterministic = deterministic
+        self.action_fn = action_fn or _dict_row
+        self.report_interval = report_interval
+
+        # env index -> arrival time of its oldest unserved message
+        self._pending: Dict[int, float] = {}
+        self._arrived: Optional[asyncio.Event] = None
+        self._running = False
+
+        self.latency = LatencyHistogram()
+        self.inference = LatencyHistogram()
+        self.requests = 0
+        self.batches = 0
+        self.failures = 0
+        self._started_at = 0.0
+
+    async def start(self, channels: Optional[Sequence[int]] = None,
+                    seeds: Optional[Sequence[Optional[int]]] = None):
+        """
+        Connect every session and subscribe to its channel.
+
+        Args:
+            channels: Workspace channel index served by each env (default:
+                      the workspace's first channel)
+            seeds: reset() seeds per env
+        """
+        self._arrived = asyncio.Event()
+        seeds = [None] * len(self.envs) if seeds is None else seeds
+        # One session per agent account logs in (and signs up) first; the
+        # other sessions of that account then reuse it from the session cache
+        first: Dict[Any, int] = {}
+        for i, env in enumerate(self.envs):
+            first.setdefault(env._session_key(), i)
+        for group in (set(first.values()), set(range(len(self.envs))) - set(first.values())):
+            await asyncio.gather(*(self.envs[i].reset(seed=seeds[i]) for i in sorted(group)))
+        if channels is not None:
+            await asyncio.gather(*(
+                self._move_to_channel(env, index) for env, index in zip(self.envs, channels)
+            ))
+        for i, env in enumerate(self.envs):
+            env.message_listener = lambda record, i=i: self._on_message(i, record)
+
+    async def run(self, duration: Optional[float] = None):
+        """Serve requests until stop() or for duration seconds."""
+        self._running = True
+        self._started_at = time.monotonic()
+        stop_at = None if duration is None else self._started_at + duration
+        next_report = self._started_at + self.report_interval
+
+        while self._running:
+            now = time.monotonic()
+            if stop_at is not None and now >= stop_at:
+                break
+            if self.report_interval and now >= next_report:
+                self.report()
+                next_report = now + self.report_interval
+
+            timeout = 0.5 if stop_at is None else min(0.5, stop_at - now)
+            if not await self._collect(timeout):
+                continue
+            await self._serve(self._take_batch())
+
+        self._running = False
+        if self.report_interval:
+            self.report()
+
+    def stop(self):
+        self._running = False
+
+    async def close(self):
+        for env in self.envs:
+            env.message_listener = None
+        await asyncio.gather(*(env.close() for env in self.envs))
+
+    def stats(self) -> Dict[str, float]:
+        """Throughput, batch sizes and latency quantiles so far."""
+        elapsed = max(time.monotonic() - self._started_at, 1e-9)
+        return {
+            'requests': self.requests,
+            'failures': self.failures,
+            'batches': self.batches,
+            'mean_batch': self.requests / self.batches if self.batches else 0.0,
+            'requests_per_sec': self.requests / elapsed,
+            'pending': len(self._pending),
+            'latency_p50_ms': self.latency.quantile(0.50) * 1e3,
+            'latency_p95_ms': self.latency.quantile(0.95) * 1e3,
+            'latency_p99_ms': self.latency.quantile(0.99) * 1e3,
+            'latency_max_ms': self.latency.max * 1e3,
+            'inference_p50_ms': self.inference.quantile(0.50) * 1e3,
+            'inference_p99_ms': self.inference.quantile(0.99) * 1e3,
+        }
+
+    def report(self):
+        s = self.stats()
+        print(f"[serve] {s['requests']} requests ({s['requests_per_sec']:.1f}/s), "
+              f"{s['batches']} batches (mean {s['mean_batch']:.1f}), "
+              f"latency p50 {s['latency_p50_ms']:.1f} ms p99 {s['latency_p99_ms']:.1f} ms, "
+              f"inference p50 {s['inference_p50_ms']:.2f} ms, failures {s['failures']}")
+
+    # ==================== Private Methods ====================
+
+    def _on_message(self, index: int, record: MessageRecord):
+        """Socket handler hook: a teammate's message makes the channel pending."""
+        if record.user_id == self.envs[index].user_id:
+            return  # The bot's own echo
+        if index not in self._pending:
+            self._pending[index] = record.received_at
+        self._arrived.set()
+
+    async def _collect(self, timeout: float) -> bool:
+        """
+        Wait for a micro-batch: max_batch requests or max_wait past the oldest.
+
+        Returns False if nothing arrived within timeout.
+        """
+        if not self._pending:
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), timeout)
+            except asyncio.TimeoutError:
+                return False
+        deadline = min(self._pending.values()) + self.max_wait
+        while len(self._pending) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return True
+
+    def _take_batch(self) -> List[int]:
+        """Up to max_batch pending envs, oldest request first."""
+        batch = sorted(self._pending, key=self._pending.get)[:self.max_batch]
+        return batch
+
+    async def _serve(self, batch: List[int]):
+        arrivals = [self._pending.pop(i) for i in batch]
+        observations = [self.envs[i]._get_observation() for i in batch]
+        if isinstance(observations[0], dict):
+            obs = {key: np.stack([o[key] for o in observations]) for key in observations[0]}
+        else:
+            obs = np.stack(observations)
+        if self.normalizer is not None:
+            obs = self.normalizer.normalize_obs(obs)
+
+        start = time.perf_counter()
+        actions, _ = self.model.predict(obs, deterministic=self.deterministic)
+        self.inference.record(time.perf_counter() - start)
+
+        results = await asyncio.gather(*(
+            self.envs[i]._execute_action(self.action_fn(actions, row))
+            for row, i in enumerate(batch)
+        ))
+        done = time.monotonic()
+        for arrival, result in zip(arrivals, results):
+            self.latency.record(done - arrival)
+            if not result['success']:
+                self.failures += 1
+        self.requests += len(batch)
+        self.batches += 1
+
+    @staticmethod
+    async def _move_to_channel(env: AsyncSlackEnv, index: int):
+        """Leave the default channel's room and serve channel number index instead."""
+        channel_ids = await env._workspace_channels()
+        if not channel_ids or env.sio_client is None:
+            return
+        channel_id = channel_ids[index % len(channel_ids)]
+        if channel_id == env.current_channel_id:
+            return
+        await env._join_room(channel_id)
+        env.current_channel_id = channel_id
+
+
+def _dict_row(actions: Any, row: int) -> Dict[str, Any]:
+    if isinstance(actions, dict):
+        return {key: value[row] for key, value in actions.items()}
+    return actions[row]
+
+
+async def serve_model(
+    model_path: str,
+    algorithm: str = 'PPO',
+    vecnormalize_path: Optional[str] = None,
+    backend_url: str = "http://localhost:3001",
+    n_workspaces: int = 1,
+    channels_per_workspace: int = 1,
+    duration: Optional[float] = None,
+    env_kwargs: Optional[Dict[str, Any]] = None,
+    **server_kwargs
+) -> Dict[str, float]:
+    """
+    Load a saved model and serve it in n_workspaces x channels_per_workspace channels.
+
+    Workspace i is the one of agent account rl_bot{i}@slack.ai; its
+    channels 0 .. channels_per_workspace - 1 each get their own session.
+    A policy exported to .npz (see policy_export.py) runs on NumPy and
+    carries its own normalization. Returns the final stats().
+    """
+    if model_path.endswith('.npz'):
+        model, normalizer = NumpyPolicy(model_path), None
+    else:
+        import stable_baselines3
+
+        model = getattr(stable_baselines3, algorithm).load(model_path, device='cpu')
+        normalizer = load_normalizer(vecnormalize_path)
+    session = make_http_session(limit=n_workspaces * channels_per_workspace + 16)
+    envs, channels = [], []
+    for w in range(n_workspaces):
+        for c in range(channels_per_workspace):
+            envs.append(AsyncSlackEnv(
+                session=session,
+                backend_url=backend_url,
+                agent_email=f"rl_bot{w}@slack.ai",
+                **(env_kwargs or {})
+            ))
+            channels.append(c)
+
+    server = PolicyServer(envs, model, normalizer=normalizer, **server_kwargs)
+    try:
+        await server.start(channels=channels)
+        print(f"Serving {algorithm} model in {len(envs)} channels "
+              f"({n_workspaces} workspaces x {channels_per_workspace})")
+        await server.run(duration)
+    finally:
+        await server.close()
+        await session.close()
+    return server.stats()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve a trained Slack agent as a live bot')
+    parser.add_argument('--model', type=str, required=True,
+                        help='Saved model (.zip) or exported policy (.npz)')
+    parser.add_argument('--algorithm', type=str, default='PPO', choices=['PPO', 'A2C', 'SAC'])
+    parser.add_argument('--vecnormalize', type=str, default=None,
+                        help='VecNormalize statistics saved with the model (.zip only)')
+    parser.add_argument('--task', type=str, default='conversation',
+                        choices=['conversation', 'moderation', 'routing'])
+    parser.add_argument('--flat-obs', action='store_true',
+                        help='The model was trained on flat Box observations')
+    parser.add_argument('--backend-url', type=str, default='http://localhost:3001')
+    parser.add_argument('--workspaces', type=int, default=1,
+                        help='Agent accounts (one workspace each)')
+    parser.add_argument('--channels', type=int, default=1,
+                        help='Channels served per workspace')
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=20.0,
+                        help='Max time a request waits for its batch to fill')
+    parser.add_argument('--duration', type=float, default=None,
+                        help='Seconds to serve (default: until interrupted)')
+    parser.add_argument('--report-interval', type=float, default=10.0)
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve_model(
+            args.model,
+            algorithm=args.algorithm,
+            vecnormalize_path=args.vecnormalize,
+            backend_url=args.backend_url,
+            n_workspaces=args.workspaces,
+            channels_per_workspace=args.channels,
+            duration=args.duration,
+            env_kwargs={'task': args.task, 'flat_observations': args.flat_obs},
+            max_batch=args.max_batch,
+            max_wait=args.max_wait_ms / 1e3,
+            report_interval=args.report_interval
+        ))
+    except KeyboardInterrupt:
+        print("\nStopped")
@@ -0,0 +1,399 @@
+"""
+Shared-Memory Parallel Slack Environments
+=========================================
+
+Runs Slack environments in a pool of worker processes. Each worker owns a
+contiguous block of environments and writes their observations straight
+into ``multiprocessing.shared_memory`` buffers laid out to match the
+observation space, so the trainer reads zero-copy NumPy views instead of
+unpickling observation dicts from a pipe.
+
+Only actions, infos and control messages travel through the pipes.
+
+Example usage:
+    from rl_env import make_slack_env
+    from rl_env.shm_vec_env import SharedMemoryVecEnv
+
+    # Workers copy observations into shared memory, so the envs can reuse theirs
+    env_fns = [lambda: make_slack_env(backend='sim', reuse_observations=True) for _ in range(64)]
+    env = SharedMemoryVecEnv(env_fns, n_workers=8)
+    obs = env.reset()
+"""
+
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    import cloudpickle as _pickle
+except ImportError:  # lambdas then need the 'fork' start method
+    import pickle as _pickle
+
+try:
+    from stable_baselines3.common.vec_env import VecEnv
+except ImportError:  # stable-baselines3 is optional
+    VecEnv = object
+
+try:
+    from .action_batcher import ActionBatcher
+except ImportError:  # running from inside rl_env/
+    from action_batcher import ActionBatcher
+
+
+class _FnWrapper:
+    """Pickle env factories with cloudpickle so lambdas survive spawn."""
+
+    def __init__(self, fns: Sequence[Callable]):
+        self.fns = fns
+
+    def __getstate__(self):
+        return _pickle.dumps(self.fns)
+
+    def __setstate__(self, state):
+        self.fns = _pickle.loads(state)
+
+
+class SharedObservationBuffer:
+    """
+    Ring of observation slots in shared memory.
+
+    Every key of the observation space gets one shared block of shape
+    ``(n_slots, num_envs, *space.shape)``; a Box space (flat observations)
+    gets a single block. Rewards and dones get blocks of shape
+    ``(n_slots, num_envs)``.
+
+    Args:
+        observation_space: gymnasium Dict or Box observation space
+        num_envs: Total number of environments across all workers
+        n_slots: Ring depth; a returned view stays valid for n_slots - 1 steps
+        names: Existing block names to attach to (workers), or None to create
+    """
+
+    def __init__(self, observation_space, num_envs: int, n_slots: int = 2,
+                 names: Optional[Dict[str, str]] = None):
+        self.num_envs = num_envs
+        self.n_slots = n_slots
+        self.owner = names is None
+
+        # A Box space is stored under a single key and read/written as an array
+        fields = getattr(observation_space, 'spaces', None)
+        self.flat = fields is None
+        if self.flat:
+            fields = {'obs': observation_space}
+        layout = {
+            key: ((n_slots, num_envs) + tuple(space.shape), np.dtype(space.dtype))
+            for key, space in fields.items()
+        }
+        layout['_rewards'] = ((n_slots, num_envs), np.dtype(np.float32))
+        layout['_dones'] = ((n_slots, num_envs), np.dtype(bool))
+
+        self.blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self.arrays: Dict[str, np.ndarray] = {}
+        for key, (shape, dtype) in layout.items():
+            size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+            if self.owner:
+                block = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                block = shared_memory.SharedMemory(name=names[key])
+            self.blocks[key] = block
+            self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    @property
+    def names(self) -> Dict[str, str]:
+        return {key: block.name for key, block in self.blocks.items()}
+
+    def observation(self, slot: int) -> Union[Dict[str, np.ndarray], np.ndarray]:
+        """Read-only views of every observation field for one slot."""
+        if self.flat:
+            view = self.arrays['obs'][slot]
+            view.flags.writeable = False
+            return view
+        views = {}
+        for key, array in self.arrays.items():
+            if key.startswith('_'):
+                continue
+            view = array[slot]
+            view.flags.writeable = False
+            views[key] = view
+        return views
+
+    def write(self, slot: int, env_idx: int, obs: Union[Dict[str, np.ndarray], np.ndarray]):
+        """Copy one environment's observation into the ring."""
+        if self.flat:
+            self.arrays['obs'][slot, env_idx] = obs
+            return
+        for key, value in obs.items():
+            self.arrays[key][slot, env_idx] = value
+
+    def close(self):
+        self.arrays.clear()
+        for block in self.blocks.values():
+            try:
+                block.close()
+            except BufferError:
+                # Views handed out to the caller are still alive; the
+                # mapping is released when they are garbage collected
+                pass
+            if self.owner:
+                block.unlink()
+        self.blocks.clear()
+
+
+def _worker(remote, parent_remote, env_fns: _FnWrapper, start: int,
+            observation_space, num_envs: int, n_slots: int, names: Dict[str, str],
+            threads: int = 1):
+    """Own envs [start, start + len(env_fns)) and serve commands from the trainer."""
+    parent_remote.close()
+    envs = [fn() for fn in env_fns.fns]
+    buffer = SharedObservationBuffer(observation_space, num_envs, n_slots, names)
+    # Step the block concurrently so its HTTP calls overlap
+    batcher = ActionBatcher(envs, max_workers=threads) if threads > 1 else None
+
+    try:
+        while True:
+            cmd, data = remote.recv()
+
+            if cmd == 'step':
+                slot, actions = data
+                if batcher is not None:
+                    results = batcher.step(actions)
+                else:
+                    results = [env.step(action) for env, action in zip(envs, actions)]
+                infos = []
+                for i, (env, (obs, reward, terminated, truncated, info)) in enumerate(
+                        zip(envs, results)):
+                    done = terminated or truncated
+                    if done:
+                        # SB3 VecEnv conventions for auto-reset
+                        info['terminal_observation'] = obs
+                        info['TimeLimit.truncated'] = truncated and not terminated
+                        obs, _ = env.reset()
+                    buffer.write(slot, start + i, obs)
+                    buffer.arrays['_rewards'][slot, start + i] = reward
+                    buffer.arrays['_dones'][slot, start + i] = done
+                    infos.append(info)
+                remote.send(infos)
+
+            elif cmd == 'reset':
+                slot, seeds = data
+                if batcher is not None:
+                    results = batcher.reset(seeds=seeds)
+                else:
+                    results = [env.reset(seed=seed) for env, seed in zip(envs, seeds)]
+                for i, (obs, _) in enumerate(results):
+                    buffer.write(slot, start + i, obs)
+                remote.send([info for _, info in results])
+
+            elif cmd == 'get_attr':
+                name, local = data
+                remote.send([getattr(envs[i], name) for i in local])
+
+            elif cmd == 'set_attr':
+                name, value, local = data
+                for i in local:
+                    setattr(envs[i], name, value)
+                remote.send([None] * len(local))
+
+            elif cmd == 'env_method':
+                name, args, kwargs, local = data
+                remote.send([getattr(envs[i], name)(*args, **kwargs) for i in local])
+
+            elif cmd == 'close':
+                for env in envs:
+                    env.close()
+                remote.send(None)
+                break
+
+            else:
+                raise NotImplementedError(f"Unknown command: {cmd}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if batcher is not None:
+            batcher.close()
+        buffer.close()
+        remote.close()
+
+
+class SharedMemoryVecEnv(VecEnv):
+    """
+    Process-pool VecEnv with shared-memory observation buffers.
+
+    Environments are split into n_workers contiguous blocks. On every step
+    the workers write observations, rewards and dones into the next slot of
+    a shared ring, and step_wait() returns read-only views of that slot.
+    A view is overwritten n_slots steps later, so copy it if it must live
+    longer (SB3 rollout buffers already copy).
+
+    Args:
+        env_fns: Callables that each build one environment
+        n_workers: Worker processes (default: one per CPU, at most one per env)
+        n_slots: Depth of the observation ring
+        start_method: multiprocessing start method ('fork', 'spawn', ...)
+        threads_per_worker: Envs each worker steps concurrently (see ActionBatcher);
+                            useful for HTTP-backed envs
+    """
+
+    def __init__(
+        self,
+        env_fns: List[Callable],
+        n_workers: Optional[int] = None,
+        n_slots: int = 2,
+        start_method: Optional[str] = None,
+        threads_per_worker: int = 1
+    ):
+        num_envs = len(env_fns)
+        n_workers = min(n_workers or mp.cpu_count(), num_envs)
+
+        # Spaces come from a throwaway instance in the parent
+        probe = env_fns[0]()
+        observation_space, action_space = probe.observation_space, probe.action_space
+        probe.close()
+
+        if VecEnv is object:
+            self.num_envs = num_envs
+            self.observation_space = observation_space
+            self.action_space = action_space
+        else:
+            super(SharedMemoryVecEnv, self).__init__(num_envs, observation_space, action_space)
+
+        self.n_slots = n_slots
+        self.slot = 0
+        self.buffer = SharedObservationBuffer(observation_space, num_envs, n_slots)
+
+        # Contiguous blocks of envs per worker
+        bounds = np.linspace(0, num_envs, n_workers + 1).astype(int)
+        self._bounds = bounds
+        self.worker_slices = [slice(bounds[w], bounds[w + 1]) for w in range(n_workers)]
+
+        ctx = mp.get_context(start_method)
+        self.remotes, self.processes = [], []
+        for env_slice in self.worker_slices:
+            remote, work_remote = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(work_remote, remote, _FnWrapper(env_fns[env_slice]), env_slice.start,
+                      observation_space, num_envs, n_slots, self.buffer.names,
+                      threads_per_worker),
+                daemon=True
+            )
+            process.start()
+            work_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+
+        self.waiting = False
+        self.closed = False
+        self._seeds: List[Optional[int]] = [None] * num_envs
+        self.reset_infos: List[Dict[str, Any]] = [{} for _ in range(num_envs)]
+
+    # ==================== VecEnv API ====================
+
+    def reset(self) -> Dict[str, np.ndarray]:
+        """Reset all environments (with seeds from seed(), once) and return views of the new slot."""
+        self.slot = (self.slot + 1) % self.n_slots
+        for remote, env_slice in zip(self.remotes, self.worker_slices):
+            remote.send(('reset', (self.slot, self._seeds[env_slice])))
+        self.reset_infos = []
+        for remote in self.remotes:
+            self.reset_infos.extend(remote.recv())
+        self._seeds = [None] * self.num_envs
+        return self.buffer.observation(self.slot)
+
+    def seed(self, seed: Optional[int] = None) -> List[Optional[int]]:
+        """Seed env i with seed + i on the next reset()."""
+        self._seeds = [None if seed is None else seed + i for i in range(self.num_envs)]
+        return self._seeds
+
+    def step_async(self, actions):
+        """Send each worker the actions for its block of environments."""
+        self.slot = (self.slot + 1) % self.n_slots
+        for remote, env_slice in zip(self.remotes, self.worker_slices):
+            remote.send(('step', (self.slot, self._split_actions(actions, env_slice))))
+        self.waiting = True
+
+    def step_wait(self):
+        """Wait for all workers and return zero-copy views of the slot."""
+        infos = []
+        for remote in self.remotes:
+            infos.extend(remote.recv())
+        self.waiting = False
+
+        rewards = self.buffer.arrays['_rewards'][self.slot].copy()
+        dones = self.buffer.arrays['_dones'][self.slot].copy()
+        return self.buffer.observation(self.slot), rewards, dones, infos
+
+    def step(self, actions):
+        """Step all environments with a batch of actions."""
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        """Stop the workers and release the shared memory."""
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for remote in self.remotes:
+            remote.recv()
+        for process in self.processes:
+            process.join()
+        self.buffer.close()
+        self.closed = True
+
+    def get_attr(self, attr_name: str, indices=None) -> List[Any]:
+        return self._gather('get_attr', (attr_name,), indices)
+
+    def set_attr(self, attr_name: str, value: Any, indices=None):
+        self._gather('set_attr', (attr_name, value), indices)
+
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs) -> List[Any]:
+        return self._gather('env_method', (method_name, method_args, method_kwargs), indices)
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> List[bool]:
+        return [False] * len(self._indices(indices))
+
+    # ==================== Private Methods ====================
+
+    def _indices(self, indices) -> Sequence[int]:
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def _gather(self, cmd: str, args: tuple, indices) -> List[Any]:
+        """Run cmd on the selected envs only, in their workers; results in indices order."""
+        indices = [int(i) for i in self._indices(indices)]
+        # Local indices per owning worker (blocks are contiguous)
+        targets: Dict[int, List[int]] = {}
+        for i in sorted(set(indices)):
+            worker = int(np.searchsorted(self._bounds, i, side='right')) - 1
+            targets.setdefault(worker, []).append(i - self.worker_slices[worker].start)
+        for worker, local in targets.items():
+            self.remotes[worker].send((cmd, args + (local,)))
+        results = {}
+        for worker, local in targets.items():
+            start = self.worker_slices[worker].start
+            for i, result in zip(local, self.remotes[worker].recv()):
+                results[start + i] = result
+        return [results[i] for i in indices]
+
+    @staticmethod
+    def _split_actions(actions, env_slice: slice) -> List[Dict[str, Any]]:
+        """Per-env action dicts for one worker's block."""
+        if isinstance(actions, dict):
+            return [
+                {k: v[i] for k, v in actions.items()}
+                for i in range(env_slice.start, env_slice.stop)
+            ]
+        return list(actions[env_slice])
+
+    def __del__(self):
+        if not getattr(self, 'closed', True):
+            self.close()
@@ -0,0 +1,679 @@
+"""
+Simulated Slack Backend
+=======================
+
+A pure-Python, in-memory stand-in for the Express/Socket.io backend in
+``server/index.js``. It keeps workspaces, channels, messages, reactions,
+pins, unread counts and presence in plain dicts so that training can run
+without any HTTP or WebSocket round trips.
+
+Example usage:
+    from rl_env import make_slack_env
+
+    env = make_slack_env(task='conversation', backend='sim')
+    obs, info = env.reset(seed=0)
+"""
+
+import itertools
+import random
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .rewards import MessageLabeler
+    from .slack_gym_env import EMOJI_MAP, SlackGymEnv
+except ImportError:  # running from inside rl_env/
+    from rewards import MessageLabeler
+    from slack_gym_env import EMOJI_MAP, SlackGymEnv
+
+
+# Messages posted by simulated teammates, with their ground-truth labels
+# for the reward kernels: 'ok', 'spam' or 'inappropriate', and the channel
+# the conversation belongs in
+SIM_LABELS = {
+    "Has anyone looked at the latest build?": ('ok', 'engineering'),
+    "Standup in 5 minutes!": ('ok', 'announcements'),
+    "Can someone review my PR?": ('ok', 'engineering'),
+    "The deploy went out fine.": ('ok', 'engineering'),
+    "I'm seeing errors in the staging logs.": ('ok', 'engineering'),
+    "Who owns the onboarding docs?": ('ok', 'support'),
+    "Lunch anyone?": ('ok', 'random'),
+    "Great work on the release everyone!": ('ok', 'general'),
+    "Is the API down for anyone else?": ('ok', 'support'),
+    "Moving the sync to tomorrow.": ('ok', 'announcements'),
+    "Thanks for the quick fix!": ('ok', 'general'),
+    "Can we get a status update on the migration?": ('ok', 'engineering'),
+    "Click here to claim your free gift card!!!": ('spam', None),
+    "Buy cheap crypto now, limited offer": ('spam', None),
+    "Whoever broke the build is an idiot.": ('inappropriate', None),
+    "Shut up, nobody asked you.": ('inappropriate', None),
+}
+SIM_MESSAGES = list(SIM_LABELS)
+
+DEFAULT_CHANNELS = ['general', 'random', 'engineering', 'support', 'announcements']
+
+# Unique per backend instance; unlike id(), never reused after garbage collection
+_BACKEND_TOKENS = itertools.count(1)
+
+
+class SimSlackBackend:
+    """
+    In-memory Slack state engine.
+
+    Mirrors the subset of the REST API and Socket.io events used by
+    SlackGymEnv. Every method works on local dicts, so a full step costs a
+    few microseconds instead of a network round trip.
+
+    Simulated teammates post messages and change presence in ``tick()``,
+    which the environment calls once per step. Time is measured in ticks.
+    """
+
+    def __init__(
+        self,
+        n_users: int = 20,
+        message_rate: float = 0.3,
+        presence_flip_rate: float = 0.01,
+        history_limit: int = 200,
+        seed: Optional[int] = None
+    ):
+        self.n_users = n_users
+        self.message_rate = message_rate
+        self.presence_flip_rate = presence_flip_rate
+        self.history_limit = history_limit
+        self.rng = random.Random(seed)
+
+        self.clock = 0.0
+        self._ids = itertools.count(1)
+        # Namespaces cached agent sessions (see SimSlackGymEnv._session_key)
+        self.token = next(_BACKEND_TOKENS)
+
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.users_by_email: Dict[str, str] = {}
+        self.usernames: set = set()
+        self.sessions: Dict[str, str] = {}
+        self.workspaces: Dict[str, Dict[str, Any]] = {}
+        self.channels: Dict[str, Dict[str, Any]] = {}
+        self.messages: Dict[str, Dict[str, Any]] = {}
+        # workspace_id -> content -> {message_id: message} of its channel messages
+        self._content_index: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]] = {}
+        self.dm_conversations: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+        # message_id -> emoji -> set of user ids
+        self.reactions: Dict[str, Dict[str, set]] = {}
+        # (user_id, channel_id) -> unread message count
+        self.unread: Dict[Tuple[str, str], int] = {}
+        # user_id -> 'online' | 'away' | 'offline'
+        self.presence: Dict[str, str] = {}
+        # Bumped on every presence change so readers can cache features
+        self.presence_version = 0
+        # Bumped when a channel is created or gains a member
+        self.topology_version = 0
+
+        # channel_id -> callbacks receiving 'new-message' payloads
+        self.subscribers: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+
+        # Simulated teammates
+        self.sim_user_ids = []
+        for i in range(n_users):
+            user = self.signup(f'sim_user_{i}', f'sim_user_{i}@slack.ai', 'sim')['user']
+            self.sim_user_ids.append(user['id'])
+            self.presence[user['id']] = 'online' if self.rng.random() < 0.7 else 'offline'
+
+    # ==================== Auth ====================
+
+    def signup(self, username: str, email: str, password: str) -> Dict[str, Any]:
+        """Create a user and a session."""
+        # Emails and usernames are both unique, as in the server's users table
+        if email in self.users_by_email or username in self.usernames:
+            raise ValueError("Email or username already exists")
+
+        user_id = self._new_id('u')
+        self.users[user_id] = {
+            'id': user_id,
+            'username': username,
+            'email': email,
+            'password': password
+        }
+        self.users_by_email[email] = user_id
+        self.usernames.add(username)
+        return self._new_session(user_id)
+
+    def login(self, email: str, password: str) -> Optional[Dict[str, Any]]:
+        """Return a new session, or None for invalid credentials."""
+        user_id = self.users_by_email.get(email)
+        if user_id is None or self.users[user_id]['password'] != password:
+            return None
+        return self._new_session(user_id)
+
+    # ==================== Workspaces & Channels ====================
+
+    def list_workspaces(self, user_id: str) -> List[Dict[str, Any]]:
+        """Workspaces the user is a member of, oldest first."""
+        return [
+            self._public(ws) for ws in self.workspaces.values()
+            if user_id in ws['members']
+        ]
+
+    def create_workspace(self, user_id: str, name: str) -> Dict[str, Any]:
+        """Create a workspace with the default channels and teammates."""
+        workspace_id = self._new_id('w')
+        workspace = {
+            'id': workspace_id,
+            'name': name,
+            'slug': name.lower().replace(' ', '-'),
+            'owner_id': user_id,
+            'members': {user_id, *self.sim_user_ids},
+            'channel_ids': []
+        }
+        self.workspaces[workspace_id] = workspace
+
+        for channel_name in DEFAULT_CHANNELS:
+            channel = self.create_channel(workspace_id, user_id, channel_name)
+            self.channels[channel['id']]['members'].update(self.sim_user_ids)
+
+        return self._public(workspace)
+
+    def list_members(self, workspace_id: str) -> List[Dict[str, Any]]:
+        """Members of the workspace with their role."""
+        workspace = self.workspaces.get(workspace_id)
+        if workspace is None:
+            return []
+        return [
+            {'user_id': uid, 'username': self.users[uid]['username'],
+             'role': 'owner' if uid == workspace['owner_id'] else 'member'}
+            for uid in workspace['members']
+        ]
+
+    def add_members(self, workspace_id: str, user_ids: List[str]) -> int:
+        """Add existing users to a workspace; returns how many were new."""
+        workspace = self.workspaces.get(workspace_id)
+        if workspace is None:
+            return 0
+        new_ids = {uid for uid in user_ids if uid in self.users} - workspace['members']
+        workspace['members'].update(new_ids)
+        return len(new_ids)
+
+    def list_channels(self, workspace_id: str, user_id: str) -> List[Dict[str, Any]]:
+        """Public channels of the workspace, oldest first."""
+        workspace = self.workspaces.get(workspace_id)
+        if workspace is None or user_id not in workspace['members']:
+            return []
+        return [self._public(self.channels[cid]) for cid in workspace['channel_ids']]
+
+    def create_channel(self, workspace_id: str, user_id: str, name: str) -> Dict[str, Any]:
+        """Create a public channel with the creator as its only member."""
+        channel_id = self._new_id('c')
+        self.channels[channel_id] = {
+            'id': channel_id,
+            'workspace_id': workspace_id,
+            'name': name,
+            'created_by': user_id,
+            'members': {user_id},
+            'messages': deque(maxlen=self.history_limit),
+            'pinned': set()
+        }
+        self.workspaces[workspace_id]['channel_ids'].append(channel_id)
+        self.topology_version += 1
+        return self._public(self.channels[channel_id])
+
+    def join_channel(self, channel_id: str, user_id: str) -> bool:
+        """Add the user to a channel."""
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            return False
+        if user_id not in channel['members']:
+            channel['members'].add(user_id)
+            self.topology_version += 1
+        return True
+
+    def open_dm(self, user_id: str, other_user_id: str) -> Dict[str, Any]:
+        """Get or create the DM conversation between two users."""
+        key = tuple(sorted((user_id, other_user_id)))
+        conversation = self.dm_conversations.get(key)
+        if conversation is None:
+            conversation = {
+                'id': self._new_id('d'),
+                'user1_id': key[0],
+                'user2_id': key[1],
+                'messages': deque(maxlen=self.history_limit)
+            }
+            self.dm_conversations[key] = conversation
+        return self._public(conversation)
+
+    # ==================== Messages ====================
+
+    def send_message(
+        self,
+        user_id: str,
+        content: str,
+        channel_id: Optional[str] = None,
+        dm_conversation_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Store a message and broadcast it to channel subscribers."""
+        if not content or user_id not in self.users:
+            return None
+
+        message = {
+            'id': self._new_id('m'),
+            'channel_id': channel_id,
+            'dm_conversation_id': dm_conversation_id,
+            'user_id': user_id,
+            'username': self.users[user_id]['username'],
+            'content': content,
+            'created_at': self.clock
+        }
+
+        if channel_id is not None:
+            channel = self.channels.get(channel_id)
+            if channel is None:
+                return None
+            index = self._content_index.setdefault(channel['workspace_id'], {})
+            if len(channel['messages']) == channel['messages'].maxlen:
+                evicted = channel['messages'][0]
+                self.messages.pop(evicted['id'], None)
+                same_content = index[evicted['content']]
+                del same_content[evicted['id']]
+                if not same_content:
+                    del index[evicted['content']]
+            channel['messages'].append(message)
+            index.setdefault(content, {})[message['id']] = message
+            for member_id in channel['members']:
+                if member_id != user_id:
+                    key = (member_id, channel_id)
+                    self.unread[key] = self.unread.get(key, 0) + 1
+        elif dm_conversation_id is not None:
+            conversation = self._find_dm(dm_conversation_id)
+            if conversation is None:
+                return None
+            if len(conversation['messages']) == conversation['messages'].maxlen:
+                self.messages.pop(conversation['messages'][0]['id'], None)
+            conversation['messages'].append(message)
+        else:
+            return None
+
+        self.messages[message['id']] = message
+
+        for callback in self.subscribers.get(channel_id or dm_conversation_id, ()):
+            callback(message)
+
+        return message
+
+    def toggle_reaction(self, message_id: str, user_id: str, emoji: str) -> Optional[bool]:
+        """Add or remove a reaction. Returns True if added, None if no such message."""
+        if message_id not in self.messages:
+            return None
+        users = self.reactions.setdefault(message_id, {}).setdefault(emoji, set())
+        if user_id in users:
+            users.discard(user_id)
+            return False
+        users.add(user_id)
+        return True
+
+    def pin_message(self, message_id: str, channel_id: str) -> bool:
+        """Pin a message in a channel."""
+        channel = self.channels.get(channel_id)
+        if channel is None or message_id not in self.messages:
+            return False
+        channel['pinned'].add(message_id)
+        return True
+
+    def mark_read(self, channel_id: str, user_id: str) -> bool:
+        """Reset the user's unread count for a channel."""
+        if channel_id not in self.channels:
+            return False
+        self.unread[(user_id, channel_id)] = 0
+        return True
+
+    def search(self, workspace_id: str, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Case-insensitive substring search, newest first."""
+        workspace = self.workspaces.get(workspace_id)
+        if workspace is None or not query.strip():
+            return []
+        query = query.lower()
+        # Contents repeat a lot, so only each distinct one is matched
+        results = []
+        for content, messages in self._content_index.get(workspace_id, {}).items():
+            if query in content.lower():
+                results.extend(messages.values())
+        results.sort(key=lambda m: m['created_at'], reverse=True)
+        return results[:limit]
+
+    # ==================== Presence & Unread ====================
+
+    def set_presence(self, user_id: str, status: str = 'online'):
+        """Update a user's presence status."""
+        self.presence[user_id] = status
+        self.presence_version += 1
+
+    def unread_counts(self, workspace_id: str, user_id: str) -> List[Dict[str, Any]]:
+        """Unread counts for every channel of the workspace."""
+        workspace = self.workspaces.get(workspace_id)
+        if workspace is None:
+            return []
+        return [
+            {'channel_id': cid, 'unread_count': self.unread.get((user_id, cid), 0)}
+            for cid in workspace['channel_ids']
+        ]
+
+    def workspace_presence(self, workspace_id: str) -> List[Dict[str, Any]]:
+        """Presence status of every workspace member."""
+        workspace = self.workspaces.get(workspace_id)
+        if workspace is None:
+            return []
+        return [
+            {'id': uid, 'username': self.users[uid]['username'],
+             'status': self.presence.get(uid, 'offline')}
+            for uid in workspace['members']
+        ]
+
+    # ==================== Real-time ====================
+
+    def subscribe(self, room_id: str, callback: Callable[[Dict[str, Any]], None]):
+        """Receive 'new-message' payloads for a channel or DM conversation."""
+        self.subscribers.setdefault(room_id, []).append(callback)
+
+    def unsubscribe(self, room_id: str, callback: Callable[[Dict[str, Any]], None]):
+        """Stop receiving messages for a room."""
+        callbacks = self.subscribers.get(room_id, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def tick(self, workspace_id: Optional[str] = None):
+        """
+        Advance simulated time by one step.
+
+        Simulated teammates may post a message into one of the workspace
+        channels and flip their presence.
+        """
+        self.clock += 1.0
+        rng = self.rng
+
+        if workspace_id is not None and rng.random() < self.message_rate:
+            channel_ids = self.workspaces[workspace_id]['channel_ids']
+            self.send_message(
+                rng.choice(self.sim_user_ids),
+                rng.choice(SIM_MESSAGES),
+                channel_id=rng.choice(channel_ids)
+            )
+
+        if rng.random() < self.presence_flip_rate * self.n_users:
+            user_id = rng.choice(self.sim_user_ids)
+            self.set_presence(
+                user_id, 'offline' if self.presence[user_id] == 'online' else 'online'
+            )
+
+    # ==================== Helpers ====================
+
+    def _new_id(self, prefix: str) -> str:
+        return f"{prefix}{next(self._ids)}"
+
+    def _new_session(self, user_id: str) -> Dict[str, Any]:
+        session_id = self._new_id('s')
+        self.sessions[session_id] = user_id
+        user = self.users[user_id]
+        return {
+            'user': {'id': user_id, 'username': user['username'], 'email': user['email']},
+            'sessionId': session_id
+        }
+
+    def _find_dm(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        for conversation in self.dm_conversations.values():
+            if conversation['id'] == conversation_id:
+                return conversation
+        return None
+
+    @staticmethod
+    def _public(record: Dict[str, Any]) -> Dict[str, Any]:
+        """Strip the internal bookkeeping fields from a record."""
+        return {
+            k: v for k, v in record.items()
+            if k not in ('members', 'messages', 'pinned', 'channel_ids', 'password')
+        }
+
+
+class SimSlackGymEnv(SlackGymEnv):
+    """
+    SlackGymEnv running against an in-process SimSlackBackend.
+
+    Keeps the observation, action and reward logic of SlackGymEnv and only
+    replaces the I/O methods (_authenticate, _setup_environment,
+    _connect_socket, _execute_action, _workspace_features).
+
+    ``reset(seed=...)`` rebuilds a private backend from that seed, so the
+    episode is reproducible. A shared backend is never reseeded.
+
+    Args:
+        backend: Shared SimSlackBackend. A private one is created if omitted.
+        n_sim_users: Number of simulated teammates
+        message_rate: Probability that a teammate posts on each step
+        seed: Seed for the simulated traffic
+    """
+
+    _synchronous_events = True
+
+    def __init__(
+        self,
+        backend: Optional[SimSlackBackend] = None,
+        n_sim_users: int = 20,
+        message_rate: float = 0.3,
+        seed: Optional[int] = None,
+        **kwargs
+    ):
+        kwargs.setdefault('backend_url', 'sim://local')
+        super(SimSlackGymEnv, self).__init__(**kwargs)
+
+        self.n_sim_users = n_sim_users
+        self.message_rate = message_rate
+        self._owns_backend = backend is None
+        self.backend = backend or SimSlackBackend(
+            n_users=n_sim_users,
+            message_rate=message_rate,
+            seed=seed
+        )
+        self._subscribed_room = None
+        self._presence_cache = (-1, None)
+        self._channel_cache = (-1, None, None)
+        # Simulated messages carry their ground-truth labels
+        self.labeler = MessageLabeler(known=SIM_LABELS)
+
+    def reset(
+        self,
+        seed: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Reset; a seed starts a fresh private backend seeded with it."""
+        if seed is not None and self._owns_backend:
+            self._subscribe(None)
+            self._presence_cache = (-1, None)
+            self._channel_cache = (-1, None, None)
+            self._invalidate_session()
+            self.backend = SimSlackBackend(
+                n_users=self.n_sim_users,
+                message_rate=self.message_rate,
+                seed=seed
+            )
+        return super(SimSlackGymEnv, self).reset(seed=seed, options=options)
+
+    def close(self):
+        """Unsubscribe from the simulated backend and forget its session."""
+        if self._subscribed_room is not None:
+            self.backend.unsubscribe(self._subscribed_room, self._on_new_message)
+            self._subscribed_room = None
+        self._invalidate_session()
+        self._presence_cache = (-1, None)
+        self._channel_cache = (-1, None, None)
+        self.http.close()
+        if self.trace_recorder is not None:
+            self.trace_recorder.close()
+
+    # ==================== Private Methods ====================
+
+    def _authenticate(self):
+        """Log in to the simulated backend, signing up on first use."""
+        data = self.backend.login(self.agent_email, self.agent_password)
+        if data is None:
+            data = self.backend.signup(self._agent_username(), self.agent_email, self.agent_password)
+        self.session_id = data['sessionId']
+        self.user_id = data['user']['id']
+        self.backend.set_presence(self.user_id, 'online')
+
+    def _setup_environment(self):
+        """Use the agent's first workspace, creating one if needed."""
+        workspaces = self.backend.list_workspaces(self.user_id)
+        if workspaces:
+            self.workspace_id = workspaces[0]['id']
+        else:
+            self.workspace_id = self.backend.create_workspace(
+                self.user_id, 'RL Training Space'
+            )['id']
+
+        channels = self.backend.list_channels(self.workspace_id, self.user_id)
+        if channels:
+            self.current_channel_id = channels[0]['id']
+            self.backend.join_channel(self.current_channel_id, self.user_id)
+
+    def _connect_socket(self):
+        """Subscribe to new messages in the current channel."""
+        self._subscribe(self.current_channel_id)
+
+    def _start_poller(self):
+        # Features are read straight from the simulated backend
+        pass
+
+    def _session_key(self) -> Tuple[str, str, str]:
+        # Sessions are only valid within one simulated backend
+        return (f"sim://{self.backend.token}", self.agent_email, self.agent_password)
+
+    def _subscribe(self, room_id: Optional[str]):
+        if room_id == self._subscribed_room:
+            return
+        if self._subscribed_room is not None:
+            self.backend.unsubscribe(self._subscribed_room, self._on_new_message)
+        if room_id is not None:
+            self.backend.subscribe(room_id, self._on_new_message)
+        self._subscribed_room = room_id
+
+    def _execute_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the action to the simulated backend, then advance time."""
+        result = self._apply_action(action)
+        # Let simulated teammates act before the next observation
+        self.backend.tick(self.workspace_id)
+        return result
+
+    def _apply_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        action_type = int(action['action_type'])
+        backend = self.backend
+        last_msg = self.messages.last()
+        last_msg_id = last_msg.id if last_msg is not None else None
+
+        if action_type == 0:  # Send message
+            message_text = self._decode_message(action['message_embedding'])
+            sent = backend.send_message(
+                self.user_id, message_text, channel_id=self.current_channel_id
+            )
+            return {'success': sent is not None, 'message': 'Message sent', 'content': message_text}
+
+        if action_type == 1:  # React to message
+            if last_msg_id is None:
+                return {'success': False, 'message': 'No message to react to'}
+            emoji = EMOJI_MAP[int(action['emoji']) % len(EMOJI_MAP)]
+            added = backend.toggle_reaction(last_msg_id, self.user_id, emoji)
+            return {'success': added is not None,
+                    'message': 'Reaction removed' if added is False else 'Reaction added'}
+
+        if action_type == 2:  # Create channel
+            channel = backend.create_channel(
+                self.workspace_id, self.user_id,
+                f"rl-channel-{int(action['target_id'])}"
+            )
+            return {'success': True, 'message': 'Channel created', 'channel_id': channel['id']}
+
+        if action_type == 3:  # Join channel
+            channel_ids = backend.workspaces[self.workspace_id]['channel_ids']
+            channel_id = channel_ids[int(action['target_id']) % len(channel_ids)]
+            backend.join_channel(channel_id, self.user_id)
+            self.current_channel_id = channel_id
+            self._subscribe(channel_id)
+            return {'success': True, 'message': 'Joined channel'}
+
+        if action_type == 4:  # Send DM
+            other_id = backend.sim_user_ids[int(action['target_id']) % len(backend.sim_user_ids)]
+            conversation = backend.open_dm(self.user_id, other_id)
+            message_text = self._decode_message(action['message_embedding'])
+            sent = backend.send_message(
+                self.user_id, message_text, dm_conversation_id=conversation['id']
+            )
+            return {'success': sent is not None, 'message': 'DM sent', 'content': message_text}
+
+        if action_type == 5:  # Mark as read
+            success = backend.mark_read(self.current_channel_id, self.user_id)
+            return {'success': success, 'message': 'Marked as read'}
+
+        if action_type == 6:  # Pin message
+            if last_msg_id is None:
+                return {'success': False, 'message': 'No message to pin'}
+            success = backend.pin_message(last_msg_id, self.current_channel_id)
+            return {'success': success, 'message': 'Message pinned'}
+
+        if action_type == 7:  # Search messages
+            words = last_msg.content.split() if last_msg is not None else []
+            query = words[0] if words else ''
+            results = backend.search(self.workspace_id, query)
+            return {'success': bool(results), 'message': f'{len(results)} results'}
+
+        # No action
+        return {'success': True, 'message': 'No action taken'}
+
+    def _channel_names(self) -> Dict[str, str]:
+        backend = self.backend
+        return {
+            cid: backend.channels[cid]['name']
+            for cid in backend.workspaces[self.workspace_id]['channel_ids']
+        }
+
+    def _workspace_features(self, out: Dict[str, np.ndarray]):
+        """Write channel, presence and unread features from simulated state."""
+        backend = self.backend
+        workspace = backend.workspaces[self.workspace_id]
+        channel_ids = workspace['channel_ids']
+
+        # 1.0 for the current channel, 0.5 for other joined channels; only
+        # rebuilt when the agent moves or the channel topology changes
+        version, current, channel_info = self._channel_cache
+        if version != backend.topology_version or current != self.current_channel_id:
+            channel_info = np.zeros(20, dtype=np.float32)
+            for i, cid in enumerate(channel_ids[:20]):
+                if cid == self.current_channel_id:
+                    channel_info[i] = 1.0
+                elif self.user_id in backend.channels[cid]['members']:
+                    channel_info[i] = 0.5
+            self._channel_cache = (backend.topology_version, self.current_channel_id, channel_info)
+        np.copyto(out['channel_info'], channel_info)
+
+        # 1.0 online, 0.5 away, 0.0 offline; presence changes rarely, so
+        # only rebuild it when the backend reports a change
+        version, user_presence = self._presence_cache
+        if version != backend.presence_version:
+            presence_values = {'online': 1.0, 'away': 0.5}
+            user_presence = np.zeros(50, dtype=np.float32)
+            for i, uid in enumerate(backend.sim_user_ids[:50]):
+                user_presence[i] = presence_values.get(backend.presence.get(uid), 0.0)
+            self._presence_cache = (backend.presence_version, user_presence)
+        np.copyto(out['user_presence'], user_presence)
+
+        unread = backend.unread
+        user_id = self.user_id
+        counts = [unread.get((user_id, cid), 0) for cid in channel_ids[:10]]
+        unread_counts = out['unread_counts']
+        unread_counts[len(counts):] = 0
+        unread_counts[:len(counts)] = counts
+        np.minimum(unread_counts, 100, out=unread_counts)
+
+        last_msg = self.messages.last()
+        if last_msg is not None:
+            elapsed = backend.clock - last_msg.created_at
+        else:
+            elapsed = 0.0
+        out['time_since_last_message'][0] = min(elapsed, 3600.0)
@@ -27,6 +27,7 @@ class SimpleSlackEnv:
         self.workspace_id = None
         self.channel_id = None
         self.user_token = None
+        self.rng = random.Random()
         
         # Action space: simple integer actions
         self.action_space_size = 5
@@ -46,9 +47,11 @@ class SimpleSlackEnv:
         print(f"   Task: {task}")
         print(f"   Actions: {list(self.actions.values())}")
     
-    def reset(self) -> Tuple[List[float], Dict]:
-        """Reset the environment to initial state."""
+    def reset(self, seed: Optional[int] = None, options: Optional[Dict] = None) -> Tuple[List[float], Dict]:
+        """Reset the environment to initial state (seed makes the placeholder features repeatable)."""
         self.current_step = 0
+        if seed is not None:
+            self.rng.seed(seed)
         
         # Try to authenticate and get workspace
         try:
@@ -132,15 +135,15 @@ class SimpleSlackEnv:
         """
         obs = [
             self.current_step / self.max_steps,  # Normalized step count
-            random.random(),  # Placeholder features
-            random.random(),
-            random.random(),
-            random.random(),
-            random.random(),
-            random.random(),
-            random.random(),
-            random.random(),
-            random.random()
+            self.rng.random(),  # Placeholder features
+            self.rng.random(),
+            self.rng.random(),
+            self.rng.random(),
+            self.rng.random(),
+            self.rng.random(),
+            self.rng.random(),
+            self.rng.random(),
+            self.rng.random()
         ]
         return obs
     
@@ -150,7 +153,7 @@ class SimpleSlackEnv:
     
     def sample_action(self) -> int:
         """Sample a random action from the action space."""
-        return random.randint(0, self.action_space_size - 1)
+        return self.rng.randint(0, self.action_space_size - 1)
 
 
 def make_simple_slack_env(backend_url="http://localhost:3001", task="conversation"):
@@ -18,11 +18,90 @@ from gymnasium import spaces
 import numpy as np
 import requests
 import json
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Callable, Dict, List, Tuple, Any, Optional, Union
 import time
 import socket
+import threading
 from socketio import Client as SocketIOClient
 
+try:
+    from .decoder import MessageDecoder, ResponseBank, make_decoder
+    from .encoders import EmbeddingCache, MessageEncoder, make_encoder
+    from .observation import ObservationBuilder, ObservationLayout
+    from .message_store import MessageRecord, MessageStore
+    from .rewards import (
+        HANDLING_ACTIONS, LABEL_UNKNOWN, MessageLabeler, RewardKernel, load_reward_config,
+        make_reward_kernel
+    )
+    from .workspace_poller import WorkspacePoller
+except ImportError:  # running from inside rl_env/
+    from decoder import MessageDecoder, ResponseBank, make_decoder
+    from encoders import EmbeddingCache, MessageEncoder, make_encoder
+    from observation import ObservationBuilder, ObservationLayout
+    from message_store import MessageRecord, MessageStore
+    from rewards import (
+        HANDLING_ACTIONS, LABEL_UNKNOWN, MessageLabeler, RewardKernel, load_reward_config,
+        make_reward_kernel
+    )
+    from workspace_poller import WorkspacePoller
+
+
+# Trace event kinds (see traces.py)
+KIND_HTTP = 0
+KIND_SOCKET = 1
+KIND_META = 2
+KIND_POLL = 3
+
+# Emoji reactions indexed by action['emoji']
+EMOJI_MAP = ['👍', '❤️', '😄', '🎉', '👏', '🚀', '✅', '⭐', '🔥', '💯']
+
+
+class SessionCache:
+    """
+    Process-wide cache of agent sessions and workspace topology.
+    
+    Entries are keyed by (backend_url, agent_email, agent_password) and
+    hold the session id, user id, workspace id and default channel id, so
+    reset() only has to log in and list workspaces/channels once per TTL.
+    """
+    
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        """Return the cached entry, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry['expires_at'] <= time.monotonic():
+                del self._entries[key]
+                return None
+            return dict(entry)
+    
+    def put(self, key: Tuple[str, str, str], ttl: float, **entry):
+        """Store an entry that expires after ttl seconds."""
+        with self._lock:
+            self._entries[key] = dict(entry, expires_at=time.monotonic() + ttl)
+    
+    def invalidate(self, key: Tuple[str, str, str]):
+        """Drop an entry, e.g. after the backend answered 401."""
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by every environment in the process
+SESSION_CACHE = SessionCache()
+
+# Default-bank decoders by (decoder, encoder, embedding_dim), shared by every
+# environment in the process so the response bank is embedded once
+_DEFAULT_DECODERS: Dict[Tuple[str, str, int], MessageDecoder] = {}
+
 
 class SlackGymEnv(gym.Env):
     """
@@ -54,6 +133,10 @@ class SlackGymEnv(gym.Env):
     
     metadata = {'render.modes': ['human', 'ansi']}
     
+    # True where messages are delivered inside step() itself, so there is
+    # never anything to wait for (simulated and replayed backends)
+    _synchronous_events = False
+    
     def __init__(
         self,
         backend_url: str = "http://localhost:3001",
@@ -61,7 +144,23 @@ class SlackGymEnv(gym.Env):
         agent_password: str = "agent123",
         task: str = "conversation",
         max_steps: int = 100,
-        embedding_dim: int = 128
+        embedding_dim: int = 128,
+        session_ttl: float = 3600.0,
+        session_cache: Optional[SessionCache] = None,
+        encoder: Union[str, MessageEncoder] = 'hashed',
+        embedding_cache_size: int = 4096,
+        message_capacity: int = 50,
+        trace_recorder: Optional['TraceRecorder'] = None,
+        profiler: Optional['StepProfiler'] = None,
+        poll_interval: float = 2.0,
+        reuse_observations: bool = False,
+        flat_observations: bool = False,
+        decoder: Union[str, MessageDecoder] = 'auto',
+        response_bank: Optional[Union[ResponseBank, List[str]]] = None,
+        wait_for: Optional[Union[str, int, Callable[[List[MessageRecord]], bool]]] = None,
+        wait_timeout: float = 1.0,
+        reward_config: Optional[Union[str, Dict[str, Any]]] = None,
+        reward_kernel: Optional[RewardKernel] = None
     ):
         super(SlackGymEnv, self).__init__()
         
@@ -72,19 +171,69 @@ class SlackGymEnv(gym.Env):
         self.max_steps = max_steps
         self.embedding_dim = embedding_dim
         
+        # Message embeddings, cached so each message is encoded once
+        self.embedder = EmbeddingCache(
+            make_encoder(encoder, embedding_dim), capacity=embedding_cache_size
+        )
+        
+        # message_embedding action -> closest reply in the response bank
+        self.decoder = self._build_decoder(decoder, response_bank, encoder)
+        
+        # Sessions and workspace topology are reused across reset() calls
+        self.session_ttl = session_ttl
+        self.session_cache = session_cache if session_cache is not None else SESSION_CACHE
+        
         # Authentication
         self.session_id = None
         self.user_id = None
         self.workspace_id = None
         self.current_channel_id = None
         
-        # Socket.io client for real-time updates
+        # Keep-alive HTTP connection pool shared by all API calls
+        self.http = requests.Session()
+        
+        # Socket.io client for real-time updates, and the channel room it is in
         self.sio_client = None
-        self.recent_messages = []
+        self._room: Optional[str] = None
+        
+        # Background fetch of unread counts and presence (0 disables), over
+        # its own connection pool: requests.Session is not thread-safe
+        self.poll_interval = poll_interval
+        self.poller: Optional[WorkspacePoller] = None
+        self._poll_http: Optional[requests.Session] = None
+        
+        # Channel and member ids used by join/DM actions, fetched on demand
+        self._channel_ids: Optional[List[str]] = None
+        self._channel_names_by_id: Dict[str, str] = {}
+        self._member_ids: Optional[List[str]] = None
+        
+        # Received messages; written by the socket thread, read by step()
+        self.messages = MessageStore(message_capacity, embedding_dim)
+        # Sequence number of the newest message already in the observation
+        self._observed_seq = 0
+        # Optional callback(record) for every stored message (see serve.py)
+        self.message_listener: Optional[Callable[[MessageRecord], None]] = None
+        
+        # Event-driven steps: after acting, block until wait_for holds for
+        # the messages that arrived during the step, or wait_timeout passes.
+        # 'ack' waits for the echo of the message sent this step, an int N
+        # for N new messages, a callable(records) -> bool for anything else
+        if not (wait_for is None or wait_for == 'ack' or callable(wait_for)
+                or isinstance(wait_for, int)):
+            raise ValueError(f"Unknown wait_for condition: {wait_for!r}")
+        self.wait_for = wait_for
+        self.wait_timeout = wait_timeout
+        self.observation_builder = ObservationBuilder(embedding_dim, history_len=10)
         
         # Step counter
         self.current_step = 0
         
+        # Optional recording of HTTP responses and socket events (see traces.py)
+        self.trace_recorder = trace_recorder
+        
+        # Optional step timers and counters (see instrumentation.py)
+        self.profiler = profiler
+        
         # Define action space
         # 0: Send message (with text embedding)
         # 1: React to last message
@@ -128,49 +277,82 @@ class SlackGymEnv(gym.Env):
             )
         })
         
-        # Task-specific configurations
-        self.task_configs = {
-            'conversation': {
-                'reward_weights': {
-                    'response_relevance': 0.4,
-                    'timeliness': 0.3,
-                    'engagement': 0.3
-                }
-            },
-            'moderation': {
-                'reward_weights': {
-                    'spam_detection': 0.5,
-                    'inappropriate_content': 0.5
-                }
-            },
-            'routing': {
-                'reward_weights': {
-                    'correct_channel': 0.7,
-                    'message_clarity': 0.3
-                }
-            }
-        }
+        # Fixed offsets of every field in the flat observation vector; in flat
+        # mode the env returns that vector (a Box) instead of the dict
+        self.observation_layout = ObservationLayout(self.observation_space)
+        self.flat_observations = flat_observations
+        if flat_observations:
+            self.observation_space = self.observation_layout.flat_space()
         
-    def reset(self) -> Dict[str, np.ndarray]:
-        """Reset the environment and return initial observation."""
-        self.current_step = 0
-        self.recent_messages = []
+        # Preallocated observation (see _allocate_observation). By default
+        # every call returns copies, as Gymnasium >= 1.0's check_env expects;
+        # reuse_observations=True returns the buffers themselves, for callers
+        # that copy the observation out before the next step anyway
+        self.reuse_observations = reuse_observations
+        self._allocate_observation()
+        
+        # Reward kernel for the task, configured from reward_config (a dict
+        # or JSON/YAML path layered over rewards.DEFAULT_REWARD_CONFIG)
+        self.reward_config = load_reward_config(reward_config)
+        self.task_configs = {k: v for k, v in self.reward_config.items() if k != 'common'}
+        self.reward_kernel = reward_kernel or make_reward_kernel(task, self.reward_config)
+        # Ground-truth labels and target channels of incoming messages
+        self.labeler = MessageLabeler()
+        # Channel id/name -> index maps for the kernel, built once per episode
+        self._channel_maps: Optional[Tuple[Dict[str, int], Dict[str, int]]] = None
+        # Newest message from someone else as (record, step it arrived), and
+        # the sequence number of the newest one the agent has handled
+        self._last_incoming: Optional[Tuple[MessageRecord, int]] = None
+        self._handled_seq = 0
         
-        # Authenticate agent
-        self._authenticate()
+    def reset(
+        self,
+        seed: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        Reset the environment and return the initial observation and info.
+        
+        Args:
+            seed: Seeds ``np_random`` (subclasses also reseed their simulated traffic)
+            options: Unused; accepted for the Gymnasium API
+        """
+        super(SlackGymEnv, self).reset(seed=seed)
+        self._start_episode()
+        if self.profiler is not None:
+            self.profiler.count_reset()
         
-        # Setup workspace and channel
-        self._setup_environment()
+        # Authenticate and setup workspace, unless a cached session is still valid
+        if not self._restore_session():
+            self._authenticate()
+            self._setup_environment()
+            self._store_session()
         
-        # Connect to WebSocket
+        # Connect to WebSocket (reuses a live connection)
         self._connect_socket()
+        self._start_poller()
+        self._record_episode_start()
         
         # Return initial observation
-        return self._get_observation()
+        return self._get_observation(), self._reset_info()
     
-    def step(self, action: Dict[str, Any]) -> Tuple[Dict, float, bool, Dict]:
+    def soft_reset(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
         """
-        Execute action and return observation, reward, done, info.
+        Start a new episode without touching the session or socket.
+        
+        Only clears per-episode state. Requires a prior reset().
+        """
+        self._start_episode()
+        self._record_episode_start()
+        return self._get_observation(), self._reset_info()
+    
+    def step(self, action: Dict[str, Any]) -> Tuple[Dict, float, bool, bool, Dict]:
+        """
+        Execute action and return observation, reward, terminated, truncated, info.
+        
+        The observation is a fresh copy unless reuse_observations is set;
+        then the dict and its arrays are the same objects for every step of
+        an episode and are updated in place.
         
         Args:
             action: Dict containing action_type and parameters
@@ -178,19 +360,41 @@ class SlackGymEnv(gym.Env):
         Returns:
             observation: Current state
             reward: Reward for the action
-            done: Whether episode is finished
+            terminated: Always False; episodes have no terminal state
+            truncated: Whether max_steps was reached
             info: Additional information
         """
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start_step()
+        
         self.current_step += 1
+        seq_before = self.messages.total
+        # The message this action answers (later arrivals are for the next step)
+        reply_to = self._last_incoming
         
         # Execute action
+        if self.trace_recorder is not None:
+            # Replay delivers events recorded before this mark ahead of the action
+            self.trace_recorder.record(KIND_META, 'act', self.current_step)
         action_result = self._execute_action(action)
+        if profiler is not None:
+            profiler.mark('action')
+        
+        # Event-driven mode: let the step's socket events arrive
+        wait = None
+        if self.wait_for is not None and not self._synchronous_events:
+            wait = self._wait_for_events(action_result, seq_before)
+            if profiler is not None:
+                profiler.mark('wait')
         
         # Calculate reward
-        reward = self._calculate_reward(action, action_result)
+        reward = self._calculate_reward(action, action_result, reply_to)
+        if profiler is not None:
+            profiler.mark('reward')
         
-        # Check if episode is done
-        done = self.current_step >= self.max_steps
+        # Episodes end only by the step limit
+        truncated = self.current_step >= self.max_steps
         
         # Get new observation
         observation = self._get_observation()
@@ -198,11 +402,24 @@ class SlackGymEnv(gym.Env):
         # Additional info
         info = {
             'action_success': action_result['success'],
-            'messages_received': len(self.recent_messages),
+            'messages_received': len(self.messages),
             'current_step': self.current_step
         }
+        if self.poller is not None:
+            info['feature_staleness'] = self.poller.staleness()
+        if wait is not None:
+            info['wait'] = wait
+        
+        if profiler is not None:
+            profiler.end_step(int(action['action_type']), action_result['success'])
+            info['profile'] = profiler.last_step()
         
-        return observation, reward, done, info
+        return observation, reward, False, truncated, info
+    
+    @property
+    def recent_messages(self) -> List[MessageRecord]:
+        """Stored messages, oldest first (a snapshot)."""
+        return self.messages.recent()
     
     def render(self, mode='human'):
         """Render the environment."""
@@ -210,27 +427,261 @@ class SlackGymEnv(gym.Env):
             print(f"\n=== Slack RL Environment (Step {self.current_step}) ===")
             print(f"Workspace: {self.workspace_id}")
             print(f"Current Channel: {self.current_channel_id}")
-            print(f"Recent Messages: {len(self.recent_messages)}")
-            if self.recent_messages:
+            print(f"Recent Messages: {len(self.messages)}")
+            if len(self.messages):
                 print("\nLast 3 Messages:")
-                for msg in self.recent_messages[-3:]:
-                    print(f"  [{msg.get('username', 'Unknown')}]: {msg.get('content', '')[:50]}")
+                for msg in self.messages.recent(3):
+                    print(f"  [{msg.get('username', 'Unknown')}]: {msg.content[:50]}")
         elif mode == 'ansi':
-            return f"Step: {self.current_step}, Messages: {len(self.recent_messages)}"
+            return f"Step: {self.current_step}, Messages: {len(self.messages)}"
     
     def close(self):
         """Clean up resources."""
+        if self.poller is not None:
+            self.poller.stop()
+            self.poller = None
+        if self._poll_http is not None:
+            self._poll_http.close()
+            self._poll_http = None
         if self.sio_client:
             self.sio_client.disconnect()
+        self.http.close()
+        if self.trace_recorder is not None:
+            self.trace_recorder.close()
     
     # ==================== Private Methods ====================
     
+    def _start_episode(self):
+        """Clear per-episode state."""
+        self.current_step = 0
+        self.messages.clear()
+        self._observed_seq = 0
+        self._last_incoming = None
+        self._handled_seq = 0
+        self._channel_maps = None
+        self.observation_builder.reset()
+        self._allocate_observation()
+        if self.trace_recorder is not None:
+            self.trace_recorder.begin_episode()
+    
+    def _allocate_observation(self):
+        """
+        Fresh observation buffers for an episode.
+        
+        They are filled in place on every step, and replaced per episode so
+        a terminal observation survives the next reset(). In flat mode the
+        per-field buffers are views into one float32 vector.
+        """
+        if self.flat_observations:
+            flat = np.zeros(self.observation_layout.size, dtype=np.float32)
+            self._obs_buffers = self.observation_layout.views(flat)
+            self._obs = flat.view()
+            self._obs.flags.writeable = False
+            return
+        self._obs_buffers = {
+            key: np.zeros(space.shape, dtype=space.dtype)
+            for key, space in self.observation_layout.spaces.items()
+        }
+        self._obs = {}
+        for key, buffer in self._obs_buffers.items():
+            view = buffer.view()
+            view.flags.writeable = False
+            self._obs[key] = view
+    
+    def _reset_info(self) -> Dict[str, Any]:
+        return {'workspace_id': self.workspace_id, 'channel_id': self.current_channel_id}
+    
+    def _record_episode_start(self):
+        """Write the episode's session and topology to the trace."""
+        if self.trace_recorder is not None:
+            self.trace_recorder.record(KIND_META, 'episode', self.current_step, {
+                'session_id': self.session_id,
+                'user_id': self.user_id,
+                'workspace_id': self.workspace_id,
+                'channel_id': self.current_channel_id,
+                'workspace': self.poller.snapshot() if self.poller is not None else None
+            })
+    
+    def _on_new_message(self, data: Dict[str, Any]):
+        """Record a 'new-message' event; may run on the socket thread."""
+        if self.trace_recorder is not None:
+            self.trace_recorder.record(KIND_SOCKET, 'new-message', self.current_step, data)
+        record = self.messages.append(data)
+        if record.user_id != self.user_id:
+            self._last_incoming = (record, self.current_step)
+        if self.poller is not None:
+            self.poller.on_message(data, self.current_channel_id)
+        if self.message_listener is not None:
+            self.message_listener(record)
+    
+    def _wait_for_events(self, action_result: Dict[str, Any], since: int) -> Optional[Dict[str, Any]]:
+        """
+        Block until the wait_for condition holds for messages after seq since.
+        
+        Returns {'satisfied', 'seconds'}, or None if there was nothing to
+        wait for ('ack' after a step that sent no message).
+        """
+        predicate = self._wait_predicate(action_result)
+        if predicate is None:
+            return None
+        start = time.monotonic()
+        satisfied = self.messages.wait_for(predicate, since, self.wait_timeout)
+        return {'satisfied': satisfied, 'seconds': time.monotonic() - start}
+    
+    def _wait_predicate(self, action_result: Dict[str, Any]) -> Optional[Callable[[List[MessageRecord]], bool]]:
+        """wait_for as a predicate over the step's new messages (None: don't wait)."""
+        condition = self.wait_for
+        if condition == 'ack':
+            content = action_result.get('content')
+            if content is None:
+                return None
+            user_id = self.user_id
+            return lambda records: any(
+                r.user_id == user_id and r.content == content for r in records
+            )
+        if callable(condition):
+            return condition
+        return lambda records: len(records) >= condition
+    
+    def _start_poller(self):
+        """Start (or retarget) the background workspace poller."""
+        if self.poll_interval <= 0 or self.workspace_id is None:
+            return
+        if self.poller is not None and self.poller.workspace_id != self.workspace_id:
+            self.poller.stop()
+            self.poller = None
+        if self._poll_http is None:
+            self._poll_http = requests.Session()
+        if self.poller is None:
+            self.poller = WorkspacePoller(
+                self._poll_request, self.workspace_id, interval=self.poll_interval
+            )
+        self.poller.set_current_channel(self.current_channel_id)
+        self.poller.start()
+    
+    def _request(self, method: str, path: str, retry: bool = True, **kwargs) -> requests.Response:
+        """
+        Call the backend API over the pooled session.
+        
+        On 401 the cached session is invalidated and the request is retried
+        once with a fresh login.
+        """
+        headers = {'Authorization': f'Bearer {self.session_id}'} if self.session_id else {}
+        start = time.perf_counter()
+        response = self.http.request(
+            method, f"{self.backend_url}{path}", headers=headers, **kwargs
+        )
+        if self.profiler is not None:
+            self.profiler.add('http', time.perf_counter() - start)
+        
+        if response.status_code == 401 and self.session_id and retry:
+            self._invalidate_session()
+            self._authenticate()
+            self._store_session()
+            return self._request(method, path, retry=False, **kwargs)
+        
+        if self.trace_recorder is not None:
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = None
+            self.trace_recorder.record(
+                KIND_HTTP, f"{method} {path}", self.current_step, payload, response.status_code
+            )
+        
+        return response
+    
+    def _poll_request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Call the backend API from the poller thread.
+        
+        Uses the poller's own session and the current token. A 401 is left
+        for the stepping thread to re-authenticate, and the time is not
+        charged to the step profiler. Responses are traced as KIND_POLL so
+        replay can decode them the same way.
+        """
+        session_id = self.session_id
+        headers = {'Authorization': f'Bearer {session_id}'} if session_id else {}
+        response = self._poll_http.request(
+            method, f"{self.backend_url}{path}", headers=headers, **kwargs
+        )
+        if self.trace_recorder is not None and response.status_code == 200:
+            self.trace_recorder.record(
+                KIND_POLL, f"{method} {path}", self.current_step, response.json(), 200
+            )
+        return response
+    
+    def _emit(self, event: str, data: Any):
+        """Emit a Socket.io event, timed when profiling."""
+        start = time.perf_counter()
+        self.sio_client.emit(event, data)
+        if self.profiler is not None:
+            self.profiler.add('socket_emit', time.perf_counter() - start)
+    
+    def _workspace_channels(self) -> List[str]:
+        """Channel ids of the workspace (fetched once, extended by create-channel)."""
+        if self._channel_ids is None:
+            response = self._request('GET', f"/api/workspaces/{self.workspace_id}/channels")
+            if response.status_code != 200:
+                return []
+            channels = response.json()
+            self._channel_ids = [c['id'] for c in channels]
+            self._channel_names_by_id = {c['id']: c.get('name', '') for c in channels}
+        return self._channel_ids
+    
+    def _channel_names(self) -> Dict[str, str]:
+        """Channel id -> name of the workspace channels, in join-action order."""
+        return {cid: self._channel_names_by_id.get(cid, '') for cid in self._workspace_channels()}
+    
+    def _workspace_members(self) -> List[str]:
+        """User ids of the other workspace members (fetched once)."""
+        if self._member_ids is None:
+            response = self._request('GET', f"/api/workspaces/{self.workspace_id}/members")
+            if response.status_code != 200:
+                return []
+            self._member_ids = [
+                m['user_id'] for m in response.json() if m.get('user_id') != self.user_id
+            ]
+        return self._member_ids
+    
+    def _session_key(self) -> Tuple[str, str, str]:
+        return (self.backend_url, self.agent_email, self.agent_password)
+    
+    def _restore_session(self) -> bool:
+        """Load session and topology from the cache; False on a miss."""
+        entry = self.session_cache.get(self._session_key())
+        if entry is None:
+            return False
+        self.session_id = entry['session_id']
+        self.user_id = entry['user_id']
+        self.workspace_id = entry['workspace_id']
+        self.current_channel_id = entry['channel_id']
+        return True
+    
+    def _store_session(self):
+        self.session_cache.put(
+            self._session_key(),
+            self.session_ttl,
+            session_id=self.session_id,
+            user_id=self.user_id,
+            workspace_id=self.workspace_id,
+            channel_id=self.current_channel_id
+        )
+    
+    def _invalidate_session(self):
+        self.session_cache.invalidate(self._session_key())
+        self.session_id = None
+    
+    def _agent_username(self) -> str:
+        """Username to register the agent with; unique per agent_email, as the server requires."""
+        return self.agent_email.split('@')[0]
+    
     def _authenticate(self):
         """Authenticate the RL agent."""
         try:
             # Try to login
-            response = requests.post(
-                f"{self.backend_url}/api/login",
+            response = self._request(
+                'POST', '/api/auth/login', retry=False,
                 json={
                     'email': self.agent_email,
                     'password': self.agent_password
@@ -243,10 +694,10 @@ class SlackGymEnv(gym.Env):
                 self.user_id = data.get('user', {}).get('id')
             else:
                 # Create account if doesn't exist
-                response = requests.post(
-                    f"{self.backend_url}/api/signup",
+                response = self._request(
+                    'POST', '/api/auth/register', retry=False,
                     json={
-                        'username': 'RL_Agent',
+                        'username': self._agent_username(),
                         'email': self.agent_email,
                         'password': self.agent_password
                     }
@@ -263,97 +714,131 @@ class SlackGymEnv(gym.Env):
     
     def _setup_environment(self):
         """Setup workspace and channels."""
-        headers = {'Authorization': f'Bearer {self.session_id}'}
-        
         # Get or create workspace
-        response = requests.get(f"{self.backend_url}/api/workspaces", headers=headers)
+        response = self._request('GET', '/api/workspaces')
         if response.status_code == 200:
             workspaces = response.json()
             if workspaces:
                 self.workspace_id = workspaces[0]['id']
             else:
                 # Create workspace
-                response = requests.post(
-                    f"{self.backend_url}/api/workspaces",
-                    headers=headers,
+                response = self._request(
+                    'POST', '/api/workspaces',
                     json={'name': 'RL Training Space', 'slug': 'rl-training'}
                 )
                 if response.status_code == 200:
-                    self.workspace_id = response.json()['workspace']['id']
+                    # server/index.js returns the workspace itself
+                    data = response.json()
+                    self.workspace_id = data.get('workspace', data)['id']
         
         # Get channels
-        response = requests.get(
-            f"{self.backend_url}/api/workspaces/{self.workspace_id}/channels",
-            headers=headers
-        )
+        response = self._request('GET', f"/api/workspaces/{self.workspace_id}/channels")
         if response.status_code == 200:
             channels = response.json()
+            self._channel_ids = [c['id'] for c in channels]
+            self._channel_names_by_id = {c['id']: c.get('name', '') for c in channels}
+            self._member_ids = None
             if channels:
                 self.current_channel_id = channels[0]['id']
     
     def _connect_socket(self):
-        """Connect to WebSocket for real-time updates."""
-        try:
-            self.sio_client = SocketIOClient()
-            
-            @self.sio_client.on('new-message')
-            def on_message(data):
-                self.recent_messages.append(data)
-                # Keep only last 50 messages
-                if len(self.recent_messages) > 50:
-                    self.recent_messages.pop(0)
-            
-            self.sio_client.connect(self.backend_url)
-            
-            # Emit user-online event
-            self.sio_client.emit('user-online', {
-                'userId': self.user_id,
-                'workspaceId': self.workspace_id
-            })
-        except Exception as e:
-            print(f"Socket connection error: {e}")
-    
-    def _get_observation(self) -> Dict[str, np.ndarray]:
-        """Get current observation."""
-        # Message history embeddings (simplified - in production use real embeddings)
-        message_history = np.zeros((10, self.embedding_dim), dtype=np.float32)
-        for i, msg in enumerate(self.recent_messages[-10:]):
-            # Simple embedding: hash of message content
-            content = msg.get('content', '')
-            message_history[i] = self._simple_embedding(content)
-        
-        # Channel info (simplified)
-        channel_info = np.random.rand(20).astype(np.float32)
-        
-        # User presence (simplified)
-        user_presence = np.random.rand(50).astype(np.float32)
-        
-        # Unread counts
-        unread_counts = np.zeros(10, dtype=np.int32)
-        
-        # Conversation context
-        if self.recent_messages:
-            last_msg = self.recent_messages[-1].get('content', '')
-            conversation_context = self._simple_embedding(last_msg)
-        else:
-            conversation_context = np.zeros(self.embedding_dim, dtype=np.float32)
+        """Connect to WebSocket (reusing a live connection) and join the current channel."""
+        if self.sio_client is None or not self.sio_client.connected:
+            try:
+                self.sio_client = SocketIOClient()
+                self._room = None
+                
+                self.sio_client.on('new-message', self._on_new_message)
+                
+                self.sio_client.connect(self.backend_url)
+                
+                # Emit user-online event
+                self.sio_client.emit('user-online', {
+                    'userId': self.user_id,
+                    'workspaceId': self.workspace_id
+                })
+            except Exception as e:
+                print(f"Socket connection error: {e}")
+                return
+        
+        # new-message is broadcast to the channel's room only
+        if self.current_channel_id is not None:
+            self._join_room(self.current_channel_id)
+    
+    def _join_room(self, channel_id: str):
+        """
+        Move the socket into a channel's room.
+        
+        The previous room is left first; otherwise its messages keep
+        arriving and become pending replies sent to the new channel.
+        """
+        if self._room is not None and self._room != channel_id:
+            self._emit('leave-channel', self._room)
+        self._emit('join-channel', channel_id)
+        self._room = channel_id
+    
+    def _get_observation(self) -> Union[Dict[str, np.ndarray], np.ndarray]:
+        """
+        Get current observation.
+        
+        Returns a copy of the episode's observation buffers, or with
+        reuse_observations the buffers themselves (read-only views,
+        refreshed in place); in flat mode the episode's flat vector instead.
+        """
+        buffers = self._obs_buffers
+        
+        # Only messages that arrived since the last observation are encoded;
+        # message_history and conversation_context only change when they do
+        new_messages = self.messages.since(self._observed_seq)
+        if new_messages:
+            self._observed_seq = new_messages[-1].seq
+            recent = new_messages[-self.observation_builder.history_len:]
+            vectors = self.embedder.encode_messages(recent)
+            self.messages.set_embeddings(recent, vectors)
+            self.observation_builder.push(vectors)
+            history = self.observation_builder.observe()
+            np.copyto(buffers['message_history'], history['message_history'])
+            np.copyto(buffers['conversation_context'], history['conversation_context'])
+        if self.profiler is not None:
+            self.profiler.mark('embedding')
+        
+        # Channel info, user presence, unread counts and time since last message
+        self._workspace_features(buffers)
+        if self.profiler is not None:
+            self.profiler.mark('observation')
+        
+        if not self.reuse_observations:
+            if self.flat_observations:
+                return self._obs.copy()
+            return {key: buffer.copy() for key, buffer in buffers.items()}
+        return self._obs
+    
+    def _workspace_features(self, out: Dict[str, np.ndarray]):
+        """
+        Write workspace-level features into the observation buffers.
+        
+        Fills channel_info, user_presence, unread_counts and
+        time_since_last_message of ``out`` in place.
+        """
+        # Channel info, user presence and unread counts come from the
+        # background poller's cache, so this never waits on HTTP
+        if self.poller is not None:
+            channel_info, user_presence, unread_counts = self.poller.features()
+            np.copyto(out['channel_info'], channel_info)
+            np.copyto(out['user_presence'], user_presence)
+            np.copyto(out['unread_counts'], unread_counts)
         
         # Time since last message
-        time_since = np.array([0.0], dtype=np.float32)
-        
-        return {
-            'message_history': message_history,
-            'channel_info': channel_info,
-            'user_presence': user_presence,
-            'unread_counts': unread_counts,
-            'conversation_context': conversation_context,
-            'time_since_last_message': time_since
-        }
+        last_msg = self.messages.last()
+        elapsed = 0.0 if last_msg is None else min(time.monotonic() - last_msg.received_at, 3600.0)
+        out['time_since_last_message'][0] = elapsed
+        if self.trace_recorder is not None:
+            # The event's timestamp is the observation clock for replay
+            self.trace_recorder.record(KIND_META, 'observe', self.current_step)
     
     def _execute_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the action and return result."""
         action_type = action['action_type']
-        headers = {'Authorization': f'Bearer {self.session_id}'}
         
         result = {'success': False, 'message': ''}
         
@@ -364,44 +849,106 @@ class SlackGymEnv(gym.Env):
                 
                 # Send via Socket.io
                 if self.sio_client:
-                    self.sio_client.emit('send-message', {
-                        'channel_id': self.current_channel_id,
+                    self._emit('send-message', {
+                        'channelId': self.current_channel_id,
                         'content': message_text,
-                        'user_id': self.user_id
+                        'userId': self.user_id
                     })
-                    result = {'success': True, 'message': 'Message sent'}
+                    result = {'success': True, 'message': 'Message sent', 'content': message_text}
                     
             elif action_type == 1:  # React to message
-                if self.recent_messages:
-                    last_msg_id = self.recent_messages[-1].get('id')
-                    emoji_map = ['👍', '❤️', '😄', '🎉', '👏', '🚀', '✅', '⭐', '🔥', '💯']
-                    emoji = emoji_map[action['emoji'] % len(emoji_map)]
+                last_msg = self.messages.last()
+                if last_msg is not None:
+                    last_msg_id = last_msg.id
+                    emoji = EMOJI_MAP[action['emoji'] % len(EMOJI_MAP)]
+                    response = self._request(
+                        'POST', f"/api/messages/{last_msg_id}/reactions",
+                        json={'emoji': emoji}
+                    )
+                    if response.status_code == 200:
+                        removed = response.json().get('removed', False)
+                        result = {'success': True,
+                                  'message': 'Reaction removed' if removed else 'Reaction added'}
+                    else:
+                        result = {'success': False, 'message': f'HTTP {response.status_code}'}
+                        
+            elif action_type == 2:  # Create channel
+                response = self._request(
+                    'POST', f"/api/workspaces/{self.workspace_id}/channels",
+                    json={
+                        'name': f"rl-channel-{int(action['target_id'])}",
+                        'description': 'Created by RL agent',
+                        'isPrivate': False
+                    }
+                )
+                if response.status_code == 200:
+                    channel = response.json()
+                    channel_id = channel['id']
+                    if self._channel_ids is not None:
+                        self._channel_ids.append(channel_id)
+                    self._channel_names_by_id[channel_id] = channel.get('name', '')
+                    if self.poller is not None:
+                        self.poller.refresh_channels()
+                    result = {'success': True, 'message': 'Channel created', 'channel_id': channel_id}
                     
-                    if self.sio_client:
-                        self.sio_client.emit('reaction', {
-                            'message_id': last_msg_id,
-                            'emoji': emoji,
-                            'user_id': self.user_id
+            elif action_type == 3:  # Join channel
+                channel_ids = self._workspace_channels()
+                if channel_ids and self.sio_client:
+                    channel_id = channel_ids[int(action['target_id']) % len(channel_ids)]
+                    self._join_room(channel_id)
+                    self.current_channel_id = channel_id
+                    if self.poller is not None:
+                        self.poller.set_current_channel(channel_id)
+                    result = {'success': True, 'message': 'Joined channel'}
+                    
+            elif action_type == 4:  # Send DM
+                member_ids = self._workspace_members()
+                if member_ids and self.sio_client:
+                    other_id = member_ids[int(action['target_id']) % len(member_ids)]
+                    response = self._request(
+                        'POST', '/api/dm-conversations', json={'userId': other_id}
+                    )
+                    if response.status_code == 200:
+                        conversation_id = response.json()['id']
+                        message_text = self._decode_message(action['message_embedding'])
+                        self._emit('join-dm', conversation_id)
+                        self._emit('send-message', {
+                            'dmConversationId': conversation_id,
+                            'content': message_text,
+                            'userId': self.user_id
                         })
-                        result = {'success': True, 'message': 'Reaction added'}
+                        result = {'success': True, 'message': 'DM sent', 'content': message_text}
                         
             elif action_type == 5:  # Mark as read
-                response = requests.post(
-                    f"{self.backend_url}/api/channels/{self.current_channel_id}/mark-read",
-                    headers=headers
+                response = self._request(
+                    'POST', f"/api/channels/{self.current_channel_id}/mark-read"
                 )
                 result = {'success': response.status_code == 200, 'message': 'Marked as read'}
+                if result['success'] and self.poller is not None:
+                    self.poller.mark_read(self.current_channel_id)
                 
             elif action_type == 6:  # Pin message
-                if self.recent_messages:
-                    last_msg_id = self.recent_messages[-1].get('id')
-                    response = requests.post(
-                        f"{self.backend_url}/api/messages/{last_msg_id}/pin",
-                        headers=headers,
+                last_msg = self.messages.last()
+                if last_msg is not None:
+                    last_msg_id = last_msg.id
+                    response = self._request(
+                        'POST', f"/api/messages/{last_msg_id}/pin",
                         json={'channelId': self.current_channel_id}
                     )
                     result = {'success': response.status_code == 200, 'message': 'Message pinned'}
                     
+            elif action_type == 7:  # Search messages
+                last_msg = self.messages.last()
+                words = last_msg.content.split() if last_msg is not None else []
+                if words:
+                    response = self._request(
+                        'GET', f"/api/workspaces/{self.workspace_id}/search",
+                        params={'q': words[0]}
+                    )
+                    if response.status_code == 200:
+                        results = response.json()
+                        result = {'success': bool(results), 'message': f'{len(results)} results'}
+                        
             elif action_type == 8:  # No action
                 result = {'success': True, 'message': 'No action taken'}
                 
@@ -410,76 +957,118 @@ class SlackGymEnv(gym.Env):
         
         return result
     
-    def _calculate_reward(self, action: Dict[str, Any], action_result: Dict) -> float:
-        """Calculate reward for the action."""
-        reward = 0.0
+    def _calculate_reward(self, action: Dict[str, Any], action_result: Dict,
+                          reply_to: Optional[Tuple[MessageRecord, int]] = None) -> float:
+        """
+        Score the step with the task's reward kernel.
         
-        # Base reward for successful action
-        if action_result['success']:
-            reward += 0.1
+        Computes only the fields the kernel reads and scores them with its
+        scalar path (RewardKernel.score); reply_to is the (message, arrival
+        step) the action answers.
+        """
+        kernel = self.reward_kernel
+        fields = kernel.fields
+        action_type = int(action['action_type'])
+        success = bool(action_result['success'])
+        if action_type == 2 and success:
+            self._channel_maps = None  # A new channel joined the index
         
-        # Task-specific rewards
-        config = self.task_configs.get(self.task, self.task_configs['conversation'])
-        weights = config['reward_weights']
+        message = reply_to[0] if reply_to is not None else None
+        pending = message is not None and message.seq > self._handled_seq
+        if not pending:
+            return kernel.score(action_type, success)
         
-        if self.task == 'conversation':
-            # Reward for responding to messages
-            if action['action_type'] == 0 and self.recent_messages:
-                reward += weights['response_relevance'] * 0.5
-                
-                # Reward for timely response
-                if self.current_step < 10:
-                    reward += weights['timeliness'] * 0.3
-                
-                # Reward for engagement
-                if len(self.recent_messages) > 0:
-                    reward += weights['engagement'] * 0.2
-        
-        # Penalty for too many actions
-        if self.current_step > 0 and action['action_type'] != 8:
-            reward -= 0.01
+        latency = relevance = 0.0
+        label, channel, target, current = LABEL_UNKNOWN, None, -1, -1
+        if 'latency' in fields:
+            latency = float(self.current_step - reply_to[1])
+        if 'relevance' in fields:
+            content = action_result.get('content')
+            if content and message.content:
+                reply, incoming = self.embedder.encode_texts([content, message.content])
+                relevance = float(np.dot(reply, incoming))
+        if 'label' in fields or 'target_channel' in fields:
+            label, channel = self.labeler.label(message.content)
+        if 'target_channel' in fields or 'current_channel' in fields:
+            index_by_id, index_by_name = self._channel_index()
+            target = index_by_name.get(channel, -1)
+            current = index_by_id.get(self.current_channel_id, -1)
         
+        reward = kernel.score(action_type, success, True, latency, relevance, label, target, current)
+        if success and action_type in HANDLING_ACTIONS:
+            self._handled_seq = message.seq
         return reward
     
-    def _simple_embedding(self, text: str) -> np.ndarray:
-        """
-        Create simple embedding from text.
-        In production, use proper embeddings (BERT, GPT, etc.)
-        """
-        # Simple hash-based embedding
-        embedding = np.zeros(self.embedding_dim, dtype=np.float32)
-        if text:
-            for i, char in enumerate(text[:self.embedding_dim]):
-                embedding[i] = (ord(char) % 256) / 256.0
-        return embedding
+    def _channel_index(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Channel id -> index and name -> index (first match), cached until a channel is created."""
+        if self._channel_maps is None:
+            index_by_id, index_by_name = {}, {}
+            for i, (cid, name) in enumerate(self._channel_names().items()):
+                index_by_id[cid] = i
+                index_by_name.setdefault(name, i)
+            self._channel_maps = (index_by_id, index_by_name)
+        return self._channel_maps
     
     def _decode_message(self, embedding: np.ndarray) -> str:
+        """Reply in the response bank closest to the action embedding."""
+        return self.decoder.decode(embedding)
+    
+    def _build_decoder(self, decoder: Union[str, MessageDecoder],
+                       response_bank: Optional[Union[ResponseBank, List[str]]],
+                       encoder: Union[str, MessageEncoder]) -> MessageDecoder:
         """
-        Decode message from embedding.
-        In production, use proper decoder (seq2seq, transformer, etc.)
+        Decoder over response_bank (default: decoder.DEFAULT_RESPONSES).
+        
+        Banks embedded here use the observation encoder, so the agent's own
+        replies are not re-encoded when they come back as messages.
         """
-        # For demo, return simple templated messages
-        templates = [
-            "Hello! How can I help?",
-            "That's interesting!",
-            "I agree with that.",
-            "Can you tell me more?",
-            "Thanks for sharing!",
-            "Great point!",
-            "I'm processing that information.",
-            "Let me think about it."
-        ]
-        
-        # Use embedding to select template
-        idx = int(np.sum(embedding) * 100) % len(templates)
-        return templates[idx]
+        if isinstance(decoder, MessageDecoder):
+            return decoder
+        if isinstance(response_bank, ResponseBank):
+            return make_decoder(decoder, response_bank)
+        if response_bank is not None:
+            result = make_decoder(
+                decoder, ResponseBank.from_texts(response_bank, self.embedder.encoder)
+            )
+        elif not isinstance(encoder, str):
+            result = make_decoder(decoder, encoder=self.embedder.encoder)
+        else:
+            key = (decoder, encoder, self.embedding_dim)
+            if key not in _DEFAULT_DECODERS:
+                _DEFAULT_DECODERS[key] = make_decoder(decoder, encoder=self.embedder.encoder)
+            result = _DEFAULT_DECODERS[key]
+        self.embedder.add_static(result.bank.embeddings_by_text())
+        return result
 
 
 # ==================== Helper Functions ====================
 
-def make_slack_env(task='conversation', **kwargs):
-    """Factory function to create Slack environment."""
-    return SlackGymEnv(task=task, **kwargs)
+def make_slack_env(task='conversation', backend='http', **kwargs):
+    """
+    Factory function to create Slack environment.
+    
+    Args:
+        task: Task to train on ('conversation', 'moderation', 'routing')
+        backend: 'http' talks to the Node backend at backend_url,
+                 'sim' runs against an in-process simulated workspace,
+                 'replay' replays a recorded trace (pass trace_path)
+        **kwargs: Passed through to the environment constructor
+    """
+    if backend == 'http':
+        return SlackGymEnv(task=task, **kwargs)
+    if backend == 'sim':
+        try:
+            from .sim_backend import SimSlackGymEnv
+        except ImportError:  # running from inside rl_env/
+            from sim_backend import SimSlackGymEnv
+        return SimSlackGymEnv(task=task, **kwargs)
+    if backend == 'replay':
+        try:
+            from .traces import ReplaySlackEnv
+        except ImportError:  # running from inside rl_env/
+            from traces import ReplaySlackEnv
+        return ReplaySlackEnv(task=task, **kwargs)
+    raise ValueError(f"Unknown backend: {backend}")
 
 
 def test_environment():
@@ -489,22 +1078,22 @@ def test_environment():
     env = make_slack_env(task='conversation', max_steps=10)
     
     try:
-        obs = env.reset()
+        obs, info = env.reset(seed=0)
         print("✓ Environment reset successfully")
         print(f"  Observation keys: {obs.keys()}")
         
         for step in range(5):
             action = env.action_space.sample()
-            obs, reward, done, info = env.step(action)
+            obs, reward, terminated, truncated, info = env.step(action)
             
             print(f"\nStep {step + 1}:")
             print(f"  Reward: {reward:.3f}")
-            print(f"  Done: {done}")
+            print(f"  Done: {terminated or truncated}")
             print(f"  Info: {info}")
             
             env.render()
             
-            if done:
+            if terminated or truncated:
                 break
         
         print("\n✓ Environment test completed successfully!")
@@ -513,6 +1102,38 @@ def test_environment():
         env.close()
 
 
+def test_determinism(seed: int = 0, n_steps: int = 50):
+    """Check that two simulated runs with the same seed are identical."""
+    print("Testing seeded determinism...")
+    
+    runs = []
+    for _ in range(2):
+        env = make_slack_env(task='conversation', backend='sim', max_steps=n_steps)
+        env.action_space.seed(seed)
+        try:
+            obs, _ = env.reset(seed=seed)
+            observations, rewards = [obs], []
+            for _ in range(n_steps):
+                obs, reward, terminated, truncated, _ = env.step(env.action_space.sample())
+                observations.append(obs)
+                rewards.append(reward)
+                if terminated or truncated:
+                    break
+            runs.append((observations, rewards))
+        finally:
+            env.close()
+    
+    (obs_a, rewards_a), (obs_b, rewards_b) = runs
+    assert rewards_a == rewards_b, "rewards differ between seeded runs"
+    for a, b in zip(obs_a, obs_b):
+        for key in a:
+            assert np.array_equal(a[key], b[key]), f"{key} differs between seeded runs"
+    # Returned observations are copies, so earlier ones must not alias later ones
+    assert not np.shares_memory(obs_a[0]['message_history'], obs_a[-1]['message_history'])
+    print(f"✓ {len(rewards_a)} steps identical for seed {seed}")
+
+
 if __name__ == "__main__":
+    test_determinism()
     test_environment()
 
@@ -0,0 +1,442 @@
+"""
+Hyperparameter Sweeps
+=====================
+
+Trains many (algorithm, task, hyperparameter) trials concurrently on a
+process pool and collects their evaluation results into one table.
+
+Trials advance through rungs of growing timestep budgets (min_timesteps,
+min_timesteps * eta, ... up to max_timesteps). After each rung every
+trial is evaluated on fixed seeds with frozen normalization, and the
+scheduler decides which trials continue from their checkpoint:
+
+- 'halving': successive halving, the best 1/eta of each group continues
+- 'median': median stopping, trials below their group's median stop
+- None: every trial runs to max_timesteps
+
+Groups (default: per task) keep trials with incomparable reward scales
+from competing with each other.
+
+Example usage:
+    from rl_env.sweep import LogUniform, Sweep, format_table
+
+    sweep = Sweep(
+        {'algorithm': ['PPO', 'A2C', 'SAC'],
+         'task': ['conversation', 'moderation', 'routing'],
+         'learning_rate': LogUniform(1e-4, 1e-3)},
+        search='random', n_trials=27, scheduler='halving',
+        min_timesteps=5000, max_timesteps=45000
+    )
+    print(format_table(sweep.run()))
+
+    # or from the command line (inside rl_env/)
+    python sweep.py --algorithms PPO A2C SAC --tasks conversation moderation routing
+"""
+
+import csv
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    from .evaluation import load_normalizer, run_episode
+    from .slack_gym_env import make_slack_env
+except ImportError:  # running from inside rl_env/
+    from evaluation import load_normalizer, run_episode
+    from slack_gym_env import make_slack_env
+
+
+class Uniform:
+    """Random search distribution: uniform on [low, high]."""
+
+    def __init__(self, low: float, high: float):
+        self.low, self.high = low, high
+
+    def sample(self, rng: np.random.Generator) -> float:
+        return float(rng.uniform(self.low, self.high))
+
+
+class LogUniform(Uniform):
+    """Random search distribution: log-uniform on [low, high]."""
+
+    def sample(self, rng: np.random.Generator) -> float:
+        return float(np.exp(rng.uniform(np.log(self.low), np.log(self.high))))
+
+
+def grid_configs(space: Union[Dict[str, Any], Sequence[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Every combination of the space's values.
+
+    A list of spaces is the union of their grids (e.g. one per algorithm
+    with its own hyperparameters). Scalars are fixed values.
+    """
+    if not isinstance(space, dict):
+        return [config for sub in space for config in grid_configs(sub)]
+    keys = list(space)
+    choices = []
+    for key in keys:
+        values = space[key]
+        if isinstance(values, Uniform):
+            raise ValueError(f"Grid search needs discrete values for {key!r}, got a distribution")
+        choices.append(values if isinstance(values, (list, tuple)) else [values])
+    return [dict(zip(keys, combo)) for combo in itertools.product(*choices)]
+
+
+def random_configs(space: Union[Dict[str, Any], Sequence[Dict[str, Any]]], n_trials: int,
+                   seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """n_trials samples: lists are sampled uniformly, distributions with sample()."""
+    rng = np.random.default_rng(seed)
+    spaces = [space] if isinstance(space, dict) else list(space)
+    configs = []
+    for _ in range(n_trials):
+        sub = spaces[rng.integers(len(spaces))]
+        config = {}
+        for key, values in sub.items():
+            if isinstance(values, Uniform):
+                config[key] = values.sample(rng)
+            elif isinstance(values, (list, tuple)):
+                config[key] = values[rng.integers(len(values))]
+            else:
+                config[key] = values
+        configs.append(config)
+    return configs
+
+
+def rung_budgets(min_timesteps: int, max_timesteps: int, eta: int) -> List[int]:
+    """Timestep budgets min, min * eta, ... ending exactly at max."""
+    n_rungs = int(math.floor(math.log(max_timesteps / min_timesteps, eta) + 1e-9)) + 1
+    budgets = [min_timesteps * eta ** r for r in range(n_rungs)]
+    budgets[-1] = max_timesteps
+    return budgets
+
+
+# ==================== Trials ====================
+
+def train_trial(config: Dict[str, Any], timesteps: int, trial_dir: str,
+                n_eval_episodes: int = 5, eval_seed: int = 10_000,
+                backend: str = 'sim', n_envs: int = 1) -> Dict[str, float]:
+    """
+    Train one trial up to timesteps and evaluate it.
+
+    Continues from the checkpoint in trial_dir if an earlier rung left
+    one. config holds 'algorithm', 'task' and create_model keyword
+    arguments. Returns the evaluation summary (mean_reward, ...).
+    """
+    try:
+        from .train_agent import SlackRLTrainer
+    except ImportError:  # running from inside rl_env/
+        from train_agent import SlackRLTrainer
+    import stable_baselines3
+    from stable_baselines3.common.vec_env import VecNormalize
+
+    model_kwargs = {k: v for k, v in config.items() if k not in ('algorithm', 'task')}
+    model_kwargs.setdefault('verbose', 0)
+    trainer = SlackRLTrainer(
+        algorithm=config['algorithm'], task=config['task'], total_timesteps=timesteps,
+        log_dir=trial_dir, model_dir=trial_dir, backend=backend, n_envs=n_envs,
+        model_kwargs=model_kwargs
+    )
+    env = trainer.create_env()
+    model_path = os.path.join(trial_dir, 'model.zip')
+    stats_path = os.path.join(trial_dir, 'vecnormalize.pkl')
+    if os.path.exists(model_path):
+        env = VecNormalize.load(stats_path, env.venv)
+        algorithm = getattr(stable_baselines3, config['algorithm'])
+        model = algorithm.load(model_path, env=env, device='cpu')
+    else:
+        model = trainer.create_model(env)
+
+    model.learn(max(timesteps - model.num_timesteps, 0), reset_num_timesteps=False)
+    model.save(model_path)
+    env.save(stats_path)
+    env.close()
+
+    eval_env = make_slack_env(task=config['task'], backend='sim', max_steps=100)
+    normalizer = load_normalizer(stats_path)
+    rewards = [
+        run_episode(model, eval_env, eval_seed + i, normalizer)[0]
+        for i in range(n_eval_episodes)
+    ]
+    eval_env.close()
+    return {'mean_reward': float(np.mean(rewards)), 'std_reward': float(np.std(rewards))}
+
+
+def _init_worker(threads: int):
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _run_rung(trial_fn: Callable, trial_id: int, config: Dict[str, Any], timesteps: int,
+              trial_dir: str, trial_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    os.makedirs(trial_dir, exist_ok=True)
+    start = time.perf_counter()
+    try:
+        result = dict(trial_fn(config, timesteps, trial_dir, **trial_kwargs))
+        result['error'] = None
+    except Exception as e:
+        result = {'mean_reward': float('nan'), 'std_reward': float('nan'),
+                  'error': f"{type(e).__name__}: {e}"}
+    result.update(trial=trial_id, timesteps=timesteps, seconds=time.perf_counter() - start)
+    return result
+
+
+# ==================== Scheduler ====================
+
+class Sweep:
+    """
+    Grid or random search over algorithms, tasks and create_model arguments.
+
+    Args:
+        space: Dict (or list of dicts) of key -> value list, distribution or
+            fixed value; 'algorithm' and 'task' pick the trainer, all other
+            keys are create_model keyword arguments
+        search: 'grid' or 'random'
+        n_trials: Samples for random search
+        scheduler: 'halving', 'median' or None (see module docstring)
+        min_timesteps: Budget of the first rung
+        max_timesteps: Budget of the last rung
+        eta: Budget growth per rung; 'halving' keeps 1/eta of each group
+        group_by: Config keys whose trials compete with each other
+        n_workers: Concurrent trials (default: CPU count // threads_per_trial)
+        threads_per_trial: Torch threads per worker
+        out_dir: Trial checkpoints and results.csv go here
+        trial_fn: trial_fn(config, timesteps, trial_dir, **trial_kwargs) ->
+            {'mean_reward', ...}; default train_trial
+        trial_kwargs: Extra trial_fn arguments (n_eval_episodes, backend, ...)
+        seed: Seed for random search
+        start_method: multiprocessing start method ('fork', 'spawn', ...)
+    """
+
+    SCHEDULERS = ('halving', 'median', None)
+
+    def __init__(
+        self,
+        space: Union[Dict[str, Any], Sequence[Dict[str, Any]]],
+        search: str = 'grid',
+        n_trials: int = 10,
+        scheduler: Optional[str] = 'halving',
+        min_timesteps: int = 5000,
+        max_timesteps: int = 45000,
+        eta: int = 3,
+        group_by: Sequence[str] = ('task',),
+        n_workers: Optional[int] = None,
+        threads_per_trial: int = 1,
+        out_dir: str = './sweeps',
+        trial_fn: Optional[Callable] = None,
+        trial_kwargs: Optional[Dict[str, Any]] = None,
+        seed: Optional[int] = None,
+        start_method: Optional[str] = None
+    ):
+        if scheduler not in self.SCHEDULERS:
+            raise ValueError(f"Unknown scheduler: {scheduler!r} (choose from {self.SCHEDULERS})")
+        if search == 'grid':
+            configs = grid_configs(space)
+        elif search == 'random':
+            configs = random_configs(space, n_trials, seed)
+        else:
+            raise ValueError(f"Unknown search: {search!r} (choose 'grid' or 'random')")
+        for config in configs:
+            config.setdefault('algorithm', 'PPO')
+            config.setdefault('task', 'conversation')
+
+        self.configs = configs
+        self.scheduler = scheduler
+        self.eta = eta
+        self.group_by = tuple(group_by)
+        self.budgets = (
+            rung_budgets(min_timesteps, max_timesteps, eta) if scheduler else [max_timesteps]
+        )
+        self.n_workers = n_workers or max(1, (os.cpu_count() or 1) // threads_per_trial)
+        self.threads_per_trial = threads_per_trial
+        self.out_dir = out_dir
+        self.trial_fn = trial_fn or train_trial
+        self.trial_kwargs = dict(trial_kwargs or {})
+        self.start_method = start_method
+
+    def run(self) -> List[Dict[str, Any]]:
+        """Run every rung; returns one row per trial (see results_table)."""
+        os.makedirs(self.out_dir, exist_ok=True)
+        latest: Dict[int, Dict[str, Any]] = {}
+        stopped: Dict[int, int] = {}
+        alive = list(range(len(self.configs)))
+        print(f"Sweep: {len(self.configs)} trials, budgets {self.budgets}, "
+              f"{self.n_workers} workers, scheduler {self.scheduler}")
+
+        with ProcessPoolExecutor(
+            self.n_workers,
+            mp_context=mp.get_context(self.start_method),
+            initializer=_init_worker,
+            initargs=(self.threads_per_trial,)
+        ) as executor:
+            for rung, budget in enumerate(self.budgets):
+                futures = [
+                    executor.submit(
+                        _run_rung, self.trial_fn, t, self.configs[t], budget,
+                        os.path.join(self.out_dir, f"trial_{t:03d}"), self.trial_kwargs
+                    )
+                    for t in alive
+                ]
+                for future in as_completed(futures):
+                    result = future.result()
+                    latest[result['trial']] = result
+                    self._print_result(rung, result)
+
+                if rung == len(self.budgets) - 1:
+                    break
+                survivors = self._promote(alive, latest)
+                for t in alive:
+                    if t not in survivors:
+                        stopped[t] = rung
+                alive = survivors
+
+        rows = self.results_table(latest, stopped)
+        self._write_csv(rows)
+        return rows
+
+    def results_table(self, latest: Dict[int, Dict[str, Any]],
+                      stopped: Dict[int, int]) -> List[Dict[str, Any]]:
+        """Rows sorted by group, then by mean reward (best first)."""
+        rows = []
+        for t, config in enumerate(self.configs):
+            result = latest.get(t, {})
+            if result.get('error'):
+                status = 'failed'
+            elif t in stopped:
+                status = f"stopped@{stopped[t]}"
+            else:
+                status = 'completed'
+            params = {k: v for k, v in config.items() if k not in ('algorithm', 'task')}
+            rows.append({
+                'trial': t,
+                'algorithm': config['algorithm'],
+                'task': config['task'],
+                'params': json.dumps(params, sort_keys=True, default=str),
+                'timesteps': result.get('timesteps', 0),
+                'mean_reward': result.get('mean_reward', float('nan')),
+                'std_reward': result.get('std_reward', float('nan')),
+                'status': status,
+                'error': result.get('error'),
+            })
+        rows.sort(key=lambda r: (
+            [str(self.configs[r['trial']].get(k)) for k in self.group_by],
+            -_score(r)
+        ))
+        return rows
+
+    # ==================== Private Methods ====================
+
+    def _group(self, trial: int) -> tuple:
+        return tuple(str(self.configs[trial].get(k)) for k in self.group_by)
+
+    def _promote(self, alive: List[int], latest: Dict[int, Dict[str, Any]]) -> List[int]:
+        """Trials of each group that continue to the next rung."""
+        groups: Dict[tuple, List[int]] = {}
+        for t in alive:
+            groups.setdefault(self._group(t), []).append(t)
+        survivors = []
+        for members in groups.values():
+            scores = np.array([_score(latest[t]) for t in members])
+            if self.scheduler == 'halving':
+                keep = max(1, len(members) // self.eta)
+                order = np.argsort(-scores, kind='stable')[:keep]
+                survivors += [members[i] for i in sorted(order)]
+            elif self.scheduler == 'median':
+                finite = scores[np.isfinite(scores)]
+                median = np.median(finite) if len(finite) else -np.inf
+                survivors += [t for t, s in zip(members, scores) if s >= median]
+            else:
+                survivors += members
+        return sorted(survivors)
+
+    def _print_result(self, rung: int, result: Dict[str, Any]):
+        config = self.configs[result['trial']]
+        outcome = result['error'] or f"reward {result['mean_reward']:.3f} ± {result['std_reward']:.3f}"
+        print(f"  rung {rung} trial {result['trial']:3d} {config['algorithm']:>4} "
+              f"{config['task']:<12} {result['timesteps']:>8} steps  {outcome}  "
+              f"({result['seconds']:.0f}s)")
+
+    def _write_csv(self, rows: List[Dict[str, Any]]):
+        path = os.path.join(self.out_dir, 'results.csv')
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['trial'])
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Results written to {path}")
+
+
+def _score(result: Dict[str, Any]) -> float:
+    """Mean reward, with failed trials ranked last."""
+    score = result.get('mean_reward', float('nan'))
+    return score if np.isfinite(score) else -np.inf
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    """Plain-text table of sweep results."""
+    header = f"{'trial':>5}  {'algorithm':<9}  {'task':<12}  {'steps':>8}  {'reward':>16}  {'status':<11}  params"
+    lines = [header, '-' * len(header)]
+    for r in rows:
+        reward = f"{r['mean_reward']:.3f} ± {r['std_reward']:.3f}" if np.isfinite(r['mean_reward']) else 'n/a'
+        lines.append(
+            f"{r['trial']:>5}  {r['algorithm']:<9}  {r['task']:<12}  {r['timesteps']:>8}  "
+            f"{reward:>16}  {r['status']:<11}  {r['params']}"
+        )
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Parallel hyperparameter sweep for Slack agents')
+    parser.add_argument('--algorithms', nargs='+', default=['PPO', 'A2C'],
+                        help='Algorithms to compare')
+    parser.add_argument('--tasks', nargs='+', default=['conversation'],
+                        help='Tasks to train on')
+    parser.add_argument('--space', type=str, default=None,
+                        help='JSON file with extra create_model values per key (lists are searched)')
+    parser.add_argument('--search', type=str, default='grid', choices=['grid', 'random'])
+    parser.add_argument('--n-trials', type=int, default=10,
+                        help='Samples for random search')
+    parser.add_argument('--scheduler', type=str, default='halving',
+                        choices=['halving', 'median', 'none'])
+    parser.add_argument('--min-timesteps', type=int, default=5000)
+    parser.add_argument('--timesteps', type=int, default=45000,
+                        help='Budget of the last rung')
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Concurrent trials (default: one per CPU)')
+    parser.add_argument('--backend', type=str, default='sim', choices=['sim', 'vec'])
+    parser.add_argument('--eval-episodes', type=int, default=5)
+    parser.add_argument('--out-dir', type=str, default='./sweeps')
+    parser.add_argument('--seed', type=int, default=None)
+
+    args = parser.parse_args()
+
+    space = {'algorithm': args.algorithms, 'task': args.tasks}
+    if args.space:
+        with open(args.space) as f:
+            space.update(json.load(f))
+
+    sweep = Sweep(
+        space,
+        search=args.search,
+        n_trials=args.n_trials,
+        scheduler=None if args.scheduler == 'none' else args.scheduler,
+        min_timesteps=args.min_timesteps,
+        max_timesteps=args.timesteps,
+        eta=args.eta,
+        n_workers=args.workers,
+        out_dir=os.path.join(args.out_dir, time.strftime('%Y%m%d_%H%M%S')),
+        trial_kwargs={'backend': args.backend, 'n_eval_episodes': args.eval_episodes},
+        seed=args.seed
+    )
+    print(format_table(sweep.run()))
@@ -0,0 +1,408 @@
+"""
+Trace Recording and Replay
+==========================
+
+Record every HTTP response and socket event a SlackGymEnv sees, then
+serve them back offline at full CPU speed.
+
+A trace is a directory:
+
+- ``events.npy``: one row per event in a structured (columnar) array,
+  memory-mapped on load. Columns: episode, step, kind, status, name
+  (index into ``names``), offset and length of the payload, and time
+  (seconds since the episode began).
+- ``episodes.npy``: per-episode event range and compressed block
+  location, so seeking to any episode is O(1).
+- ``payloads.bin``: one zlib-compressed block of JSON payloads per
+  episode, memory-mapped on load.
+- ``meta.json``: format version and the table of event names.
+
+Example usage:
+    from rl_env import make_slack_env
+    from rl_env.traces import TraceRecorder
+
+    # Record once against the live backend
+    env = make_slack_env(trace_recorder=TraceRecorder('traces/run1'))
+    ...
+    env.close()  # flushes the trace
+
+    # Replay offline, as many times as needed
+    env = make_slack_env(backend='replay', trace_path='traces/run1')
+    obs, info = env.reset(options={'episode': 42})
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import gymnasium as gym
+import numpy as np
+
+try:
+    from .slack_gym_env import KIND_HTTP, KIND_META, KIND_POLL, KIND_SOCKET, SlackGymEnv
+    from .workspace_poller import WorkspacePoller
+except ImportError:  # running from inside rl_env/
+    from slack_gym_env import KIND_HTTP, KIND_META, KIND_POLL, KIND_SOCKET, SlackGymEnv
+    from workspace_poller import WorkspacePoller
+
+
+TRACE_VERSION = 2
+
+# Version 1 traces lack the time column and poller responses
+READABLE_VERSIONS = (1, 2)
+
+EVENT_DTYPE = np.dtype([
+    ('episode', np.int32),
+    ('step', np.int32),
+    ('kind', np.uint8),
+    ('status', np.int16),
+    ('name', np.int32),
+    ('offset', np.int64),
+    ('length', np.int32),
+    ('time', np.float64)
+])
+
+EPISODE_DTYPE = np.dtype([
+    ('event_start', np.int64),
+    ('event_end', np.int64),
+    ('block_offset', np.int64),
+    ('block_length', np.int64)
+])
+
+
+class TraceRecorder:
+    """
+    Append-only trace writer.
+
+    Events are buffered per episode; when the next episode begins (or on
+    close()) the episode's payloads are compressed into a single block and
+    appended to ``payloads.bin``. The index files are written on close().
+
+    Thread-safe: socket events arrive on the Socket.io thread.
+
+    Args:
+        path: Trace directory (created if missing)
+        compression_level: zlib level for payload blocks
+    """
+
+    def __init__(self, path: str, compression_level: int = 6):
+        self.path = path
+        self.compression_level = compression_level
+        os.makedirs(path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._payload_file = open(os.path.join(path, 'payloads.bin'), 'wb')
+        self._names: Dict[str, int] = {}
+        self._events: List[Tuple] = []
+        self._episodes: List[Tuple[int, int, int, int]] = []
+        self._block: List[bytes] = []
+        self._block_size = 0
+        self._episode = -1
+        self._episode_start = 0
+        self._episode_started_at = time.monotonic()
+        self.closed = False
+
+    @property
+    def n_episodes(self) -> int:
+        open_episode = 1 if self._episode >= 0 and not self.closed else 0
+        return len(self._episodes) + open_episode
+
+    def begin_episode(self):
+        """Close the current episode and start a new one."""
+        with self._lock:
+            self._flush_episode()
+            self._episode += 1
+            self._episode_start = len(self._events)
+            self._episode_started_at = time.monotonic()
+
+    def record(self, kind: int, name: str, step: int, payload: Any = None, status: int = 0):
+        """Append one event to the current episode."""
+        data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        now = time.monotonic()
+        with self._lock:
+            if self.closed or self._episode < 0:
+                return
+            name_id = self._names.setdefault(name, len(self._names))
+            self._events.append((
+                self._episode, step, kind, status, name_id, self._block_size, len(data),
+                now - self._episode_started_at
+            ))
+            self._block.append(data)
+            self._block_size += len(data)
+
+    def close(self):
+        """Flush the last episode and write the index files."""
+        with self._lock:
+            if self.closed:
+                return
+            self._flush_episode()
+            self._payload_file.close()
+            np.save(os.path.join(self.path, 'events.npy'), np.array(self._events, dtype=EVENT_DTYPE))
+            np.save(os.path.join(self.path, 'episodes.npy'), np.array(self._episodes, dtype=EPISODE_DTYPE))
+            names = sorted(self._names, key=self._names.get)
+            with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+                json.dump({'version': TRACE_VERSION, 'names': names}, f)
+            self.closed = True
+
+    # ==================== Private Methods ====================
+
+    def _flush_episode(self):
+        """Compress the buffered episode into payloads.bin. Caller holds the lock."""
+        if self._episode < 0 or self.closed:
+            return
+        block = zlib.compress(b''.join(self._block), self.compression_level)
+        offset = self._payload_file.tell()
+        self._payload_file.write(block)
+        self._episodes.append((self._episode_start, len(self._events), offset, len(block)))
+        self._block = []
+        self._block_size = 0
+
+
+class ReplayBackend:
+    """
+    Read-only view of a recorded trace.
+
+    Index files and payloads are memory-mapped, so opening a trace costs
+    the same regardless of its size; episode(i) decompresses one block.
+
+    Args:
+        path: Trace directory written by TraceRecorder
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('version') not in READABLE_VERSIONS:
+            raise ValueError(f"Unsupported trace version: {meta.get('version')}")
+
+        self.names: List[str] = meta['names']
+        self.events = np.load(os.path.join(path, 'events.npy'), mmap_mode='r')
+        self.episodes = np.load(os.path.join(path, 'episodes.npy'))
+        payload_path = os.path.join(path, 'payloads.bin')
+        if os.path.getsize(payload_path):
+            self.payloads = np.memmap(payload_path, dtype=np.uint8, mode='r')
+        else:
+            self.payloads = np.zeros(0, dtype=np.uint8)
+
+    @property
+    def n_episodes(self) -> int:
+        return len(self.episodes)
+
+    def episode(self, index: int) -> List[Dict[str, Any]]:
+        """Decoded events of one episode, in recording order."""
+        start, end, block_offset, block_length = self.episodes[index].tolist()
+        block = zlib.decompress(self.payloads[block_offset:block_offset + block_length].tobytes())
+        events = self.events[start:end]
+        if 'time' in events.dtype.names:
+            times = events['time'].tolist()
+        else:
+            times = [0.0] * len(events)
+
+        return [
+            {
+                'step': int(step),
+                'kind': int(kind),
+                'status': int(status),
+                'name': self.names[name],
+                'time': t,
+                'payload': json.loads(block[offset:offset + length])
+            }
+            for step, kind, status, name, offset, length, t in zip(
+                events['step'], events['kind'], events['status'],
+                events['name'], events['offset'], events['length'], times
+            )
+        ]
+
+
+class ReplayResponse:
+    """The parts of requests.Response that SlackGymEnv uses."""
+
+    def __init__(self, status_code: int, payload: Any):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self) -> Any:
+        return self._payload
+
+
+class _ReplaySocket:
+    """Socket.io client stand-in; outgoing events go nowhere."""
+
+    connected = True
+
+    def emit(self, event: str, data: Any = None):
+        pass
+
+    def disconnect(self):
+        pass
+
+
+class ReplaySlackEnv(SlackGymEnv):
+    """
+    SlackGymEnv driven by a recorded trace instead of a live backend.
+
+    Each reset() loads the next recorded episode (wrapping around), restores
+    the recorded user/workspace/channel, and delivers the recorded socket
+    events and workspace poller responses at the step they were received.
+    HTTP calls are answered with the recorded response for the same method
+    and path, in order; calls that were not recorded get an empty 200
+    response. Workspace features are decoded by a WorkspacePoller restored
+    from the episode's snapshot, and time_since_last_message is computed
+    from the recorded timestamps. ``reset(options={'episode': i})``
+    replays episode i.
+
+    Args:
+        trace_path: Trace directory written by TraceRecorder
+        backend: Existing ReplayBackend to share between environments
+        **kwargs: Passed through to SlackGymEnv
+    """
+
+    _synchronous_events = True
+
+    def __init__(self, trace_path: Optional[str] = None, backend: Optional[ReplayBackend] = None,
+                 **kwargs):
+        if backend is None:
+            if trace_path is None:
+                raise ValueError("ReplaySlackEnv needs trace_path or backend")
+            backend = ReplayBackend(trace_path)
+        kwargs.setdefault('backend_url', f"replay://{backend.path}")
+        super(ReplaySlackEnv, self).__init__(**kwargs)
+        self.http.close()
+
+        self.backend = backend
+        if backend.n_episodes == 0:
+            raise ValueError(f"Trace has no episodes: {backend.path}")
+        self.episode_index = -1
+        self._next_episode = 0
+        self._responses: Dict[Tuple[str, str], Deque[Any]] = {}
+        self._events: List[Dict[str, Any]] = []
+        self._event_pos = 0
+        self._marks: Dict[Tuple[str, int], float] = {}
+
+    def seek(self, episode: int):
+        """Make the next reset() replay the given episode."""
+        self._next_episode = episode % self.backend.n_episodes
+
+    def reset(
+        self,
+        seed: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Load the next (or options['episode']) recorded episode; returns (obs, info)."""
+        gym.Env.reset(self, seed=seed)
+        if options and 'episode' in options:
+            self.seek(options['episode'])
+        self._start_episode()
+        if self.profiler is not None:
+            self.profiler.count_reset()
+
+        self.episode_index = self._next_episode
+        self._next_episode = (self.episode_index + 1) % self.backend.n_episodes
+        self._load_episode(self.episode_index)
+
+        self.sio_client = _ReplaySocket()
+        self._deliver_events('observe')
+        info = self._reset_info()
+        info['episode_index'] = self.episode_index
+        return self._get_observation(), info
+
+    def close(self):
+        self.sio_client = None
+
+    # ==================== Private Methods ====================
+
+    def _load_episode(self, index: int):
+        responses = defaultdict(deque)
+        events = []
+        marks = {}
+        for event in self.backend.episode(index):
+            kind = event['kind']
+            if kind == KIND_HTTP:
+                method, _, path = event['name'].partition(' ')
+                responses[(method, path)].append((event['status'], event['payload']))
+            elif kind == KIND_SOCKET or kind == KIND_POLL:
+                events.append(event)
+            elif kind == KIND_META and event['name'] in ('act', 'observe'):
+                marks[(event['name'], event['step'])] = event['time']
+            elif kind == KIND_META:
+                payload = event['payload']
+                self.session_id = payload.get('session_id')
+                self.user_id = payload.get('user_id')
+                self.workspace_id = payload.get('workspace_id')
+                self.current_channel_id = payload.get('channel_id')
+                self._restore_poller(payload.get('workspace'))
+        self._responses = dict(responses)
+        self._events = events
+        self._event_pos = 0
+        self._marks = marks
+
+    def _restore_poller(self, state: Optional[Dict[str, Any]]):
+        """Rebuild the recorded poller state; None if the recording had no poller."""
+        if state is None:
+            self.poller = None
+            return
+        if self.poller is None:
+            # Never started: it only decodes recorded responses
+            self.poller = WorkspacePoller(self._request, self.workspace_id)
+        self.poller.restore(state)
+
+    def _deliver_events(self, mark: str):
+        """
+        Deliver recorded socket events and poll responses up to a step mark.
+
+        mark is 'act' (before the step's action) or 'observe' (before its
+        observation); events recorded during the step but after the mark
+        wait for the next call.
+        """
+        events = self._events
+        step = self.current_step
+        cutoff = self._marks.get((mark, step), float('inf'))
+        while self._event_pos < len(events):
+            event = events[self._event_pos]
+            if event['step'] > step or (event['step'] == step and event['time'] > cutoff):
+                break
+            self._event_pos += 1
+            if event['kind'] == KIND_POLL:
+                if self.poller is not None:
+                    self.poller.apply(event['name'].partition(' ')[2], event['payload'])
+            else:
+                self._on_new_message(event['payload'])
+                # Recorded arrival time, on the same clock as the observe events
+                self.messages.last().received_at = event['time']
+
+    def _request(self, method: str, path: str, retry: bool = True, **kwargs) -> ReplayResponse:
+        queue = self._responses.get((method, path))
+        if queue:
+            return ReplayResponse(*queue.popleft())
+        return ReplayResponse(200, {})
+
+    def _execute_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        self._deliver_events('act')
+        result = super(ReplaySlackEnv, self)._execute_action(action)
+        self._deliver_events('observe')
+        return result
+
+    def _workspace_features(self, out: Dict[str, np.ndarray]):
+        """Features decoded from the recorded poller responses and timestamps."""
+        if self.poller is not None:
+            channel_info, user_presence, unread_counts = self.poller.features()
+            np.copyto(out['channel_info'], channel_info)
+            np.copyto(out['user_presence'], user_presence)
+            np.copyto(out['unread_counts'], unread_counts)
+        else:
+            # Recorded without a poller (or a version 1 trace): buffers start
+            # zeroed each episode; only the current channel is set
+            out['channel_info'][0] = 1.0
+
+        last_msg = self.messages.last()
+        observed_at = self._marks.get(('observe', self.current_step))
+        if last_msg is None or observed_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = min(max(observed_at - last_msg.received_at, 0.0), 3600.0)
+        out['time_since_last_message'][0] = elapsed
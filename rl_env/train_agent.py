@@ -7,20 +7,155 @@ to interact with the Slack clone.
 """
 
 import os
+import shutil
 import time
 from datetime import datetime
+from functools import partial
 import numpy as np
 import torch
 
 # Stable Baselines3
 from stable_baselines3 import PPO, A2C, DQN, SAC
 from stable_baselines3.common.env_checker import check_env
-from stable_baselines3.common.callbacks import EvalCallback, CheckpointCallback
+from stable_baselines3.common.callbacks import BaseCallback, CheckpointCallback
 from stable_baselines3.common.monitor import Monitor
-from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
+from stable_baselines3.common.vec_env import DummyVecEnv, VecMonitor, VecNormalize
 
 # Custom environment
 from slack_gym_env import SlackGymEnv, make_slack_env
+from vec_env import SlackVecEnv
+from shm_vec_env import SharedMemoryVecEnv
+from replay_buffer import SlackReplayBuffer
+from evaluation import ParallelEvaluator, summarize
+from sweep import Sweep, format_table
+from policy_export import NumpyPolicy, check_parity, export_policy
+from instrumentation import PrometheusTextExporter, StepProfiler
+
+
+class ProfilerCallback(BaseCallback):
+    """
+    Log environment step profiles to TensorBoard.
+    
+    Collects the StepProfiler of every training environment every
+    log_freq steps; counters and steps/sec are summed across environments,
+    latencies averaged.
+    """
+    
+    SUMMED = ('steps', 'resets', 'steps_per_sec', 'actions/', 'failures/')
+    
+    def __init__(self, log_freq=1000, verbose=0):
+        super(ProfilerCallback, self).__init__(verbose)
+        self.log_freq = log_freq
+    
+    def _on_step(self) -> bool:
+        if self.n_calls % self.log_freq != 0:
+            return True
+        try:
+            profilers = self.training_env.get_attr('profiler')
+        except AttributeError:
+            return True
+        
+        summaries = [p.summary() for p in profilers if p is not None]
+        if not summaries:
+            return True
+        for key in summaries[0]:
+            values = [s[key] for s in summaries if key in s]
+            value = np.sum(values) if key.startswith(self.SUMMED) else np.mean(values)
+            self.logger.record(f"env/{key}", float(value))
+        return True
+
+
+class AsyncEvalCallback(BaseCallback):
+    """
+    Evaluate checkpoints in a ParallelEvaluator while training continues.
+    
+    Every eval_freq steps the model and its VecNormalize statistics are
+    saved and submitted, unless the previous evaluation is still running.
+    Finished evaluations are logged as eval/* and the best one is copied
+    to best_model.zip.
+    """
+    
+    def __init__(self, evaluator, save_path, eval_freq=5000, n_episodes=10, verbose=0):
+        super(AsyncEvalCallback, self).__init__(verbose)
+        self.evaluator = evaluator
+        self.save_path = save_path
+        self.eval_freq = eval_freq
+        self.n_episodes = n_episodes
+        self.best_mean_reward = -np.inf
+        self._run = None
+        self._checkpoint = None
+    
+    def _init_callback(self):
+        os.makedirs(self.save_path, exist_ok=True)
+    
+    def _on_step(self) -> bool:
+        if self.n_calls % self.eval_freq == 0 and self._run is None:
+            self._submit()
+        self._collect(wait=False)
+        return True
+    
+    def _on_training_end(self):
+        self._collect(wait=True)
+    
+    def _submit(self):
+        self._checkpoint = os.path.join(self.save_path, f"eval_{self.num_timesteps}")
+        self.model.save(self._checkpoint)
+        vecnormalize_path = None
+        vec_normalize = self.model.get_vec_normalize_env()
+        if vec_normalize is not None:
+            vecnormalize_path = f"{self._checkpoint}_vecnormalize.pkl"
+            vec_normalize.save(vecnormalize_path)
+        self._run = self.evaluator.submit(
+            f"{self._checkpoint}.zip", self.n_episodes, vecnormalize_path
+        )
+    
+    def _collect(self, wait):
+        if self._run is None:
+            return
+        if wait:
+            self._run.wait()
+        else:
+            self._run.poll()
+        if not self._run.done:
+            return
+        summary = summarize(self._run.results)
+        self.logger.record('eval/mean_reward', summary['mean_reward'])
+        self.logger.record('eval/mean_ep_length', summary['mean_length'])
+        if self.verbose > 0:
+            print(f"Eval {os.path.basename(self._checkpoint)}: "
+                  f"{summary['mean_reward']:.3f} ± {summary['std_reward']:.3f}")
+        if summary['mean_reward'] > self.best_mean_reward:
+            self.best_mean_reward = summary['mean_reward']
+            shutil.copy(f"{self._checkpoint}.zip", os.path.join(self.save_path, 'best_model.zip'))
+        self._run = None
+
+
+ALGORITHMS = {'PPO': PPO, 'A2C': A2C, 'SAC': SAC}
+
+# Hyperparameters of each algorithm; SlackRLTrainer(model_kwargs=...) overrides them
+MODEL_DEFAULTS = {
+    'PPO': {
+        'learning_rate': 3e-4,
+        'n_steps': 2048,
+        'batch_size': 64,
+        'n_epochs': 10,
+        'gamma': 0.99,
+        'gae_lambda': 0.95,
+        'clip_range': 0.2
+    },
+    'A2C': {
+        'learning_rate': 7e-4,
+        'n_steps': 5,
+        'gamma': 0.99,
+        'gae_lambda': 1.0
+    },
+    'SAC': {
+        'learning_rate': 3e-4,
+        'buffer_size': 100000,
+        'batch_size': 256,
+        'gamma': 0.99
+    }
+}
 
 
 class SlackRLTrainer:
@@ -34,13 +169,41 @@ class SlackRLTrainer:
         task='conversation',
         total_timesteps=100000,
         log_dir='./logs',
-        model_dir='./models'
+        model_dir='./models',
+        backend='http',
+        n_envs=1,
+        profile=False,
+        flat_obs=False,
+        reward_config=None,
+        replay_dtype='float32',
+        eval_workers=None,
+        model_kwargs=None
     ):
         self.algorithm = algorithm
         self.task = task
         self.total_timesteps = total_timesteps
         self.log_dir = log_dir
         self.model_dir = model_dir
+        self.backend = backend
+        self.n_envs = n_envs
+        self.profile = profile
+        
+        # Flat Box observations feed an MLP directly instead of the
+        # per-key extractors of MultiInputPolicy
+        self.flat_obs = flat_obs
+        self.policy = 'MlpPolicy' if flat_obs else 'MultiInputPolicy'
+        
+        # Reward weights/parameters (dict or JSON/YAML path, see rewards.py)
+        self.reward_config = reward_config
+        
+        # Storage dtype of message embeddings in the SAC replay buffer
+        self.replay_dtype = replay_dtype
+        
+        # Evaluation runs in its own process pool (default: one per CPU)
+        self.eval_workers = eval_workers
+        
+        # Overrides of MODEL_DEFAULTS (and verbose, tensorboard_log, ...)
+        self.model_kwargs = dict(model_kwargs or {})
         
         # Create directories
         os.makedirs(log_dir, exist_ok=True)
@@ -52,66 +215,104 @@ class SlackRLTrainer:
         
     def create_env(self):
         """Create and wrap environment."""
-        # Create base environment
-        env = make_slack_env(
-            task=self.task,
-            max_steps=100,
-            backend_url="http://localhost:3001"
-        )
-        
-        # Wrap with Monitor for logging
-        env = Monitor(env, os.path.join(self.log_dir, self.run_name))
-        
-        # Vectorize environment
-        env = DummyVecEnv([lambda: env])
+        if self.backend == 'vec':
+            # Natively vectorized simulated workspaces
+            env = SlackVecEnv(
+                num_envs=self.n_envs, task=self.task, max_steps=100,
+                flat_observations=self.flat_obs, reward_config=self.reward_config
+            )
+            env = VecMonitor(env, os.path.join(self.log_dir, self.run_name))
+        elif self.n_envs > 1:
+            # One agent account per env, stepped in worker processes that
+            # write observations into shared memory
+            env_fns = [
+                partial(
+                    make_slack_env,
+                    task=self.task,
+                    backend=self.backend,
+                    max_steps=100,
+                    backend_url="http://localhost:3001",
+                    agent_email=f"rl_agent{rank}@slack.ai",
+                    profiler=self.make_profiler(rank),
+                    flat_observations=self.flat_obs,
+                    reward_config=self.reward_config,
+                    reuse_observations=True  # workers copy into shared memory
+                )
+                for rank in range(self.n_envs)
+            ]
+            if self.backend == 'http':
+                # Network-bound: a few processes, each stepping its envs
+                # concurrently over one keep-alive pool
+                env = SharedMemoryVecEnv(
+                    env_fns, n_workers=max(1, self.n_envs // 16), threads_per_worker=16
+                )
+            else:
+                env = SharedMemoryVecEnv(env_fns)
+            env = VecMonitor(env, os.path.join(self.log_dir, self.run_name))
+        else:
+            # Create base environment
+            env = make_slack_env(
+                task=self.task,
+                backend=self.backend,
+                max_steps=100,
+                backend_url="http://localhost:3001",
+                profiler=self.make_profiler(0),
+                flat_observations=self.flat_obs,
+                reward_config=self.reward_config,
+                reuse_observations=True  # DummyVecEnv copies into its own buffers
+            )
+            
+            # Wrap with Monitor for logging
+            env = Monitor(env, os.path.join(self.log_dir, self.run_name))
+            
+            # Vectorize environment
+            env = DummyVecEnv([lambda: env])
         
         # Normalize observations
         env = VecNormalize(env, norm_obs=True, norm_reward=True)
         
         return env
     
+    def make_profiler(self, rank=0):
+        """Step profiler for one env (None unless profiling), exported as Prometheus text."""
+        if not self.profile:
+            return None
+        exporter = PrometheusTextExporter(
+            os.path.join(self.log_dir, f"{self.run_name}_env{rank}.prom"),
+            labels={'run': self.run_name, 'env': str(rank)}
+        )
+        return StepProfiler(exporters=[exporter])
+    
+    def make_evaluator(self):
+        """Process pool evaluating checkpoints on fixed seeds, isolated from training."""
+        return ParallelEvaluator(
+            task=self.task,
+            # The vectorized backend simulates the same workspaces as 'sim'
+            backend='sim' if self.backend == 'vec' else self.backend,
+            algorithm=self.algorithm,
+            n_workers=self.eval_workers,
+            max_steps=100,
+            env_kwargs={
+                'flat_observations': self.flat_obs,
+                'reward_config': self.reward_config
+            }
+        )
+    
     def create_model(self, env):
         """Create RL model based on algorithm."""
-        if self.algorithm == 'PPO':
-            model = PPO(
-                'MultiInputPolicy',
-                env,
-                learning_rate=3e-4,
-                n_steps=2048,
-                batch_size=64,
-                n_epochs=10,
-                gamma=0.99,
-                gae_lambda=0.95,
-                clip_range=0.2,
-                verbose=1,
-                tensorboard_log=self.log_dir
-            )
-        elif self.algorithm == 'A2C':
-            model = A2C(
-                'MultiInputPolicy',
-                env,
-                learning_rate=7e-4,
-                n_steps=5,
-                gamma=0.99,
-                gae_lambda=1.0,
-                verbose=1,
-                tensorboard_log=self.log_dir
-            )
-        elif self.algorithm == 'SAC':
-            model = SAC(
-                'MultiInputPolicy',
-                env,
-                learning_rate=3e-4,
-                buffer_size=100000,
-                batch_size=256,
-                gamma=0.99,
-                verbose=1,
-                tensorboard_log=self.log_dir
-            )
-        else:
+        if self.algorithm not in ALGORITHMS:
             raise ValueError(f"Unknown algorithm: {self.algorithm}")
         
-        return model
+        kwargs = dict(MODEL_DEFAULTS[self.algorithm], verbose=1, tensorboard_log=self.log_dir)
+        if self.algorithm == 'SAC' and not self.flat_obs:
+            # Dict observations: store each message embedding once
+            kwargs.update(
+                replay_buffer_class=SlackReplayBuffer,
+                replay_buffer_kwargs={'embedding_dtype': self.replay_dtype}
+            )
+        kwargs.update(self.model_kwargs)
+        
+        return ALGORITHMS[self.algorithm](self.policy, env, **kwargs)
     
     def train(self):
         """Train the agent."""
@@ -134,20 +335,20 @@ class SlackRLTrainer:
             name_prefix='rl_model'
         )
         
-        eval_callback = EvalCallback(
-            env,
-            best_model_save_path=os.path.join(self.model_dir, self.run_name, 'best'),
-            log_path=os.path.join(self.log_dir, self.run_name),
+        # Evaluate checkpoints in the background on frozen normalization stats
+        evaluator = self.make_evaluator()
+        eval_callback = AsyncEvalCallback(
+            evaluator,
+            save_path=os.path.join(self.model_dir, self.run_name, 'best'),
             eval_freq=5000,
-            deterministic=True,
-            render=False
+            verbose=1
         )
         
         # Train
         try:
             model.learn(
                 total_timesteps=self.total_timesteps,
-                callback=[checkpoint_callback, eval_callback],
+                callback=[checkpoint_callback, eval_callback, ProfilerCallback()],
                 tb_log_name=self.run_name
             )
             
@@ -165,40 +366,63 @@ class SlackRLTrainer:
             print("\n⚠ Training interrupted by user")
             model.save(os.path.join(self.model_dir, f"{self.run_name}_interrupted"))
             return model, env
+        
+        finally:
+            evaluator.close()
     
     def evaluate(self, model, env, n_episodes=10):
-        """Evaluate trained model."""
+        """
+        Evaluate trained model in parallel worker processes.
+        
+        The model and the env's VecNormalize statistics are saved and
+        evaluated on fixed seeds with frozen statistics, so evaluation
+        never touches the training env.
+        """
         print(f"\n{'='*60}")
         print(f"Evaluating {self.algorithm} for {n_episodes} episodes")
         print(f"{'='*60}\n")
         
-        episode_rewards = []
-        episode_lengths = []
+        eval_path = os.path.join(self.model_dir, f"{self.run_name}_eval")
+        model.save(eval_path)
+        vecnormalize_path = None
+        if isinstance(env, VecNormalize):
+            vecnormalize_path = f"{eval_path}_vecnormalize.pkl"
+            env.save(vecnormalize_path)
         
-        for episode in range(n_episodes):
-            obs = env.reset()
-            done = False
-            episode_reward = 0
-            episode_length = 0
-            
-            while not done:
-                action, _states = model.predict(obs, deterministic=True)
-                obs, reward, done, info = env.step(action)
-                episode_reward += reward[0]
-                episode_length += 1
-            
-            episode_rewards.append(episode_reward)
-            episode_lengths.append(episode_length)
-            
-            print(f"Episode {episode + 1}: Reward = {episode_reward:.3f}, Length = {episode_length}")
+        # Episodes are printed as they finish, in completion order
+        results = []
+        with self.make_evaluator() as evaluator:
+            for result in evaluator.evaluate(f"{eval_path}.zip", n_episodes, vecnormalize_path):
+                results.append(result)
+                print(f"Episode {len(results)} (seed {result.seed}): "
+                      f"Reward = {result.reward:.3f}, Length = {result.length}")
         
+        summary = summarize(results)
         print(f"\n{'='*60}")
         print(f"Evaluation Results:")
-        print(f"  Mean Reward: {np.mean(episode_rewards):.3f} ± {np.std(episode_rewards):.3f}")
-        print(f"  Mean Length: {np.mean(episode_lengths):.1f} ± {np.std(episode_lengths):.1f}")
+        print(f"  Mean Reward: {summary['mean_reward']:.3f} ± {summary['std_reward']:.3f}")
+        print(f"  Mean Length: {summary['mean_length']:.1f} ± {summary['std_length']:.1f}")
         print(f"{'='*60}\n")
         
+        episode_rewards = [r.reward for r in results]
+        episode_lengths = [r.length for r in results]
         return episode_rewards, episode_lengths
+    
+    def export(self, model, env, quantize=None):
+        """
+        Export the policy and the env's normalization for NumPy inference.
+        
+        Writes <run_name>_policy.npz (see policy_export.py) and checks that
+        it reproduces model.predict(deterministic=True).
+        """
+        normalizer = env if isinstance(env, VecNormalize) else None
+        path = os.path.join(self.model_dir, f"{self.run_name}_policy.npz")
+        export_policy(model, path, normalizer, quantize=quantize)
+        
+        parity = check_parity(model, NumpyPolicy(path), normalizer=normalizer)
+        print(f"✓ Policy exported to: {path} ({os.path.getsize(path) / 1024:.1f} KiB)")
+        print(f"  Parity with torch: {'passed' if parity['passed'] else 'FAILED'} {parity}")
+        return path
 
 
 def train_conversation_agent():
@@ -243,43 +467,33 @@ def train_routing_agent():
     return model, env
 
 
-def compare_algorithms():
-    """Compare different RL algorithms."""
-    algorithms = ['PPO', 'A2C']
-    results = {}
-    
-    for algo in algorithms:
-        print(f"\n{'#'*60}")
-        print(f"# Training {algo}")
-        print(f"{'#'*60}\n")
-        
-        trainer = SlackRLTrainer(
-            algorithm=algo,
-            task='conversation',
-            total_timesteps=20000
-        )
-        
-        model, env = trainer.train()
-        rewards, lengths = trainer.evaluate(model, env, n_episodes=10)
-        
-        results[algo] = {
-            'mean_reward': np.mean(rewards),
-            'std_reward': np.std(rewards),
-            'mean_length': np.mean(lengths),
-            'std_length': np.std(lengths)
-        }
+def compare_algorithms(algorithms=('PPO', 'A2C'), tasks=('conversation',),
+                       total_timesteps=20000, n_workers=None):
+    """Compare RL algorithms, training every (algorithm, task) pair concurrently."""
+    sweep = Sweep(
+        {'algorithm': list(algorithms), 'task': list(tasks)},
+        scheduler=None,
+        max_timesteps=total_timesteps,
+        n_workers=n_workers,
+        out_dir=os.path.join('./sweeps', datetime.now().strftime("%Y%m%d_%H%M%S")),
+        trial_kwargs={'n_eval_episodes': 10}
+    )
+    rows = sweep.run()
     
     # Print comparison
     print(f"\n{'='*60}")
     print("Algorithm Comparison:")
     print(f"{'='*60}")
-    for algo, metrics in results.items():
-        print(f"\n{algo}:")
-        print(f"  Reward: {metrics['mean_reward']:.3f} ± {metrics['std_reward']:.3f}")
-        print(f"  Length: {metrics['mean_length']:.1f} ± {metrics['std_length']:.1f}")
+    print(format_table(rows))
     print(f"\n{'='*60}\n")
     
-    return results
+    return {
+        (row['algorithm'], row['task']): {
+            'mean_reward': row['mean_reward'],
+            'std_reward': row['std_reward']
+        }
+        for row in rows
+    }
 
 
 if __name__ == "__main__":
@@ -295,6 +509,23 @@ if __name__ == "__main__":
                         help='Total training timesteps')
     parser.add_argument('--compare', action='store_true',
                         help='Compare different algorithms')
+    parser.add_argument('--backend', type=str, default='http', choices=['http', 'sim', 'vec'],
+                        help='Environment backend (vec = vectorized simulator)')
+    parser.add_argument('--n-envs', type=int, default=1,
+                        help='Number of parallel environments (worker processes unless --backend vec)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Record step latency and throughput (TensorBoard env/* and .prom files)')
+    parser.add_argument('--flat-obs', action='store_true',
+                        help='Flat Box observations with an MlpPolicy instead of MultiInputPolicy')
+    parser.add_argument('--reward-config', type=str, default=None,
+                        help='JSON/YAML file overriding reward weights and parameters')
+    parser.add_argument('--eval-workers', type=int, default=None,
+                        help='Evaluation worker processes (default: one per CPU)')
+    parser.add_argument('--replay-dtype', type=str, default='float32',
+                        choices=['float32', 'float16', 'int8'],
+                        help='Storage dtype of message embeddings in the SAC replay buffer')
+    parser.add_argument('--export', type=str, default=None, choices=['float32', 'int8'],
+                        help='Export the trained policy for NumPy inference with these weights')
     
     args = parser.parse_args()
     
@@ -304,11 +535,20 @@ if __name__ == "__main__":
         trainer = SlackRLTrainer(
             algorithm=args.algorithm,
             task=args.task,
-            total_timesteps=args.timesteps
+            total_timesteps=args.timesteps,
+            backend=args.backend,
+            n_envs=args.n_envs,
+            profile=args.profile,
+            flat_obs=args.flat_obs,
+            reward_config=args.reward_config,
+            replay_dtype=args.replay_dtype,
+            eval_workers=args.eval_workers
         )
         
         model, env = trainer.train()
         trainer.evaluate(model, env, n_episodes=10)
+        if args.export:
+            trainer.export(model, env, quantize=None if args.export == 'float32' else args.export)
         
         print("\n✓ Training complete! Check logs/ and models/ directories")
         print(f"  TensorBoard: tensorboard --logdir {trainer.log_dir}")
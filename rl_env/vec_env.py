@@ -0,0 +1,536 @@
+"""
+Vectorized Slack Environment
+============================
+
+Steps N independent simulated Slack workspaces with a handful of NumPy
+operations instead of a Python loop over environments.
+
+All per-workspace state is stored struct-of-arrays style with a leading
+batch dimension (message buffers, unread counts, presence, ...). Messages
+are drawn from a fixed bank that is embedded once up front, so message
+buffers only hold integer ids into that bank.
+
+Example usage:
+    from rl_env.vec_env import SlackVecEnv
+
+    env = SlackVecEnv(num_envs=256, task='conversation', seed=0)
+    obs = env.reset()
+    obs, rewards, dones, infos = env.step({
+        'action_type': np.zeros(256, dtype=np.int64),
+        'message_embedding': np.zeros((256, 128), dtype=np.float32),
+        'target_id': np.zeros(256, dtype=np.int64),
+        'emoji': np.zeros(256, dtype=np.int64),
+    })
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    from .decoder import MessageDecoder, ResponseBank
+    from .sim_backend import DEFAULT_CHANNELS, SIM_LABELS, SIM_MESSAGES, SimSlackGymEnv
+    from .encoders import MessageEncoder
+    from .rewards import HANDLING_ACTIONS, LABEL_UNKNOWN, MessageLabeler, action_mask, make_transitions
+except ImportError:  # running from inside rl_env/
+    from decoder import MessageDecoder, ResponseBank
+    from sim_backend import DEFAULT_CHANNELS, SIM_LABELS, SIM_MESSAGES, SimSlackGymEnv
+    from encoders import MessageEncoder
+    from rewards import HANDLING_ACTIONS, LABEL_UNKNOWN, MessageLabeler, action_mask, make_transitions
+
+try:
+    from stable_baselines3.common.vec_env import VecEnv
+except ImportError:  # stable-baselines3 is optional
+    VecEnv = object
+
+
+HISTORY_LEN = 10
+MAX_CHANNELS = 20
+MAX_USERS = 50
+UNREAD_SLOTS = 10
+
+# Attributes holding one row per environment; get_attr/set_attr index them
+PER_ENV_STATE = (
+    'msg_ids', 'msg_head', 'msg_count', 'last_msg_time',
+    'n_channels', 'channel_member', 'current_channel', 'unread', 'pinned', 'reactions',
+    'presence', 'clock', 'current_step', 'last_incoming', 'last_incoming_step', 'pending'
+)
+
+
+class SlackVecEnv(VecEnv):
+    """
+    Batch of N simulated Slack workspaces stepped with vectorized NumPy ops.
+
+    Follows the SB3 VecEnv interface (reset/step_async/step_wait) and uses
+    the same observation and action spaces as SlackGymEnv. Finished
+    environments are reset automatically; their last observation is
+    stored in ``infos[i]['terminal_observation']``.
+
+    Batched observations are written into the same preallocated arrays on
+    every step; copy them if they must outlive the next step (SB3 rollout
+    buffers already copy).
+
+    Message history is ordered oldest to newest and zero-padded at the
+    front until an episode has seen HISTORY_LEN messages.
+
+    With ``flat_observations`` the batch is one (num_envs, size) float32
+    array laid out by ``observation_layout`` instead of a dict.
+
+    Args:
+        num_envs: Number of workspaces stepped together
+        task: Task to train on ('conversation', 'moderation', 'routing')
+        max_steps: Episode length
+        embedding_dim: Message embedding dimension
+        n_sim_users: Simulated teammates per workspace
+        message_rate: Probability that a teammate posts on each step
+        presence_flip_rate: Per-user probability of a presence change per step
+        seed: Seed for the simulated traffic
+        encoder: Message encoder name or instance (see encoders.make_encoder)
+        flat_observations: Return flat float32 vectors instead of dicts
+        decoder: Decoder name or instance for send actions (see decoder.make_decoder)
+        response_bank: Replies to decode into (default: decoder.DEFAULT_RESPONSES)
+        reward_config: Reward config dict or JSON/YAML path (see rewards.load_reward_config)
+    """
+
+    def __init__(
+        self,
+        num_envs: int = 64,
+        task: str = 'conversation',
+        max_steps: int = 100,
+        embedding_dim: int = 128,
+        n_sim_users: int = 20,
+        message_rate: float = 0.3,
+        presence_flip_rate: float = 0.01,
+        seed: Optional[int] = None,
+        encoder: Union[str, MessageEncoder] = 'hashed',
+        flat_observations: bool = False,
+        decoder: Union[str, MessageDecoder] = 'auto',
+        response_bank: Optional[Union[ResponseBank, List[str]]] = None,
+        reward_config: Optional[Union[str, Dict[str, Any]]] = None
+    ):
+        # Reuse the single-env spaces, reward kernel, encoder and decoder. The
+        # template runs on the simulated backend (no sockets or HTTP) and is
+        # closed once they are copied out
+        template = SimSlackGymEnv(
+            task=task, max_steps=max_steps, embedding_dim=embedding_dim, encoder=encoder,
+            flat_observations=flat_observations, decoder=decoder, response_bank=response_bank,
+            reward_config=reward_config, n_sim_users=0, poll_interval=0
+        )
+
+        if VecEnv is object:
+            self.num_envs = num_envs
+            self.observation_space = template.observation_space
+            self.action_space = template.action_space
+        else:
+            super(SlackVecEnv, self).__init__(
+                num_envs, template.observation_space, template.action_space
+            )
+
+        self.task = task
+        self.max_steps = max_steps
+        self.embedding_dim = embedding_dim
+        self.n_sim_users = min(n_sim_users, MAX_USERS)
+        self.message_rate = message_rate
+        self.presence_flip_rate = presence_flip_rate
+        self.task_configs = template.task_configs
+        self.reward_kernel = template.reward_kernel
+        self.observation_layout = template.observation_layout
+        self.decoder = template.decoder
+        self.flat_observations = flat_observations
+        self.rng = np.random.default_rng(seed)
+
+        # Message bank: teammate messages followed by the decoder's replies,
+        # plus a trailing all-zero row used for empty history slots
+        bank = SIM_MESSAGES + self.decoder.bank.texts
+        self._agent_msg_offset = len(SIM_MESSAGES)
+        self._empty_msg = len(bank)
+        self.message_bank = np.zeros((len(bank) + 1, embedding_dim), dtype=np.float32)
+        self.message_bank[:len(bank)] = template.embedder.encoder.encode_batch(bank)
+        template.close()
+
+        # Ground-truth label and target channel slot per bank id; the
+        # agent's replies and the empty row have neither
+        labeler = MessageLabeler(known=SIM_LABELS)
+        self.bank_labels = np.full(len(bank) + 1, LABEL_UNKNOWN, dtype=np.int8)
+        self.bank_channels = np.full(len(bank) + 1, -1, dtype=np.int64)
+        for i, text in enumerate(SIM_MESSAGES):
+            label, channel = labeler.label(text)
+            self.bank_labels[i] = label
+            if channel in DEFAULT_CHANNELS:
+                self.bank_channels[i] = DEFAULT_CHANNELS.index(channel)
+
+        n = num_envs
+        self._arange = np.arange(n)
+
+        # Message ring buffers (ids into message_bank)
+        self.msg_ids = np.full((n, HISTORY_LEN), self._empty_msg, dtype=np.int32)
+        self.msg_head = np.zeros(n, dtype=np.int64)
+        self.msg_count = np.zeros(n, dtype=np.int64)
+        self.last_msg_time = np.zeros(n, dtype=np.float32)
+
+        # Channels
+        self.n_channels = np.zeros(n, dtype=np.int64)
+        self.channel_member = np.zeros((n, MAX_CHANNELS), dtype=bool)
+        self.current_channel = np.zeros(n, dtype=np.int64)
+        self.unread = np.zeros((n, MAX_CHANNELS), dtype=np.int32)
+        self.pinned = np.zeros(n, dtype=np.int64)
+        self.reactions = np.zeros(n, dtype=np.int64)
+
+        # Presence: 1.0 online, 0.0 offline
+        self.presence = np.zeros((n, MAX_USERS), dtype=np.float32)
+
+        # Episode bookkeeping
+        self.clock = np.zeros(n, dtype=np.float32)
+        self.current_step = np.zeros(n, dtype=np.int64)
+
+        # Newest teammate message in the feed, the step it arrived and
+        # whether the agent has yet to handle it (see rewards.py)
+        self.last_incoming = np.full(n, self._empty_msg, dtype=np.int64)
+        self.last_incoming_step = np.zeros(n, dtype=np.int64)
+        self.pending = np.zeros(n, dtype=bool)
+        self._reply_ids = np.full(n, self._empty_msg, dtype=np.int64)
+        self._transitions = make_transitions(n)
+        self._handling = action_mask(HANDLING_ACTIONS)
+
+        # Batched observation, filled in place by every step
+        self._history_range = np.arange(HISTORY_LEN)
+        self._obs, self._obs_buffers = self._allocate_observation(n)
+
+        self._actions = None
+        self._init_workspaces(self._arange)
+
+    # ==================== VecEnv API ====================
+
+    def reset(self) -> Union[Dict[str, np.ndarray], np.ndarray]:
+        """Reset every environment and return batched observations."""
+        self._init_workspaces(self._arange)
+        return self._get_observation()
+
+    def step_async(self, actions: Union[Dict[str, np.ndarray], Sequence[Dict[str, Any]]]):
+        """Store a batch of actions for step_wait()."""
+        self._actions = actions
+
+    def step_wait(self):
+        """Apply the stored actions to all environments at once."""
+        actions = self._stack_actions(self._actions)
+        action_type = actions['action_type']
+
+        self.current_step += 1
+        self.clock += 1.0
+
+        rewards, success = self._act_and_score(actions)
+        self._simulate_traffic()
+
+        dones = self.current_step >= self.max_steps
+        obs = self._get_observation()
+
+        infos = [
+            {'action_success': bool(s), 'messages_received': int(m), 'current_step': int(c)}
+            for s, m, c in zip(success, np.minimum(self.msg_count, 50), self.current_step)
+        ]
+
+        if dones.any():
+            done_idx = np.flatnonzero(dones)
+            for i in done_idx:
+                if self.flat_observations:
+                    infos[i]['terminal_observation'] = obs[i].copy()
+                else:
+                    infos[i]['terminal_observation'] = {k: v[i].copy() for k, v in obs.items()}
+                infos[i]['TimeLimit.truncated'] = True
+            self._reset_episodes(done_idx)
+            reset_obs = self._get_observation(done_idx)
+            if self.flat_observations:
+                obs[done_idx] = reset_obs
+            else:
+                for key, value in reset_obs.items():
+                    obs[key][done_idx] = value
+
+        return obs, rewards, dones, infos
+
+    def step(self, actions):
+        """Step all environments with a batch of actions."""
+        self.step_async(actions)
+        return self.step_wait()
+
+    def seed(self, seed: Optional[int] = None) -> List[Optional[int]]:
+        """Reseed the simulated traffic."""
+        self.rng = np.random.default_rng(seed)
+        return [seed] * self.num_envs
+
+    def close(self):
+        """Nothing to release; state lives in NumPy arrays."""
+
+    def get_attr(self, attr_name: str, indices=None) -> List[Any]:
+        """Per-env rows of PER_ENV_STATE attributes; the shared value otherwise."""
+        indices = self._indices(indices)
+        value = getattr(self, attr_name)
+        if attr_name in PER_ENV_STATE:
+            return [value[i] for i in indices]
+        return [value] * len(indices)
+
+    def set_attr(self, attr_name: str, value: Any, indices=None):
+        """
+        Set per-env rows of PER_ENV_STATE attributes, or a shared attribute.
+
+        Shared attributes apply to the whole batch, so they can only be set
+        for all environments.
+        """
+        indices = self._indices(indices)
+        if attr_name in PER_ENV_STATE:
+            getattr(self, attr_name)[list(indices)] = value
+            return
+        self._require_all(indices, f"set_attr('{attr_name}')")
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs) -> List[Any]:
+        """Call a batch-wide method; only allowed for all environments at once."""
+        indices = self._indices(indices)
+        self._require_all(indices, f"env_method('{method_name}')")
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return [result] * len(indices)
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> List[bool]:
+        return [False] * len(self._indices(indices))
+
+    # ==================== Private Methods ====================
+
+    def _indices(self, indices) -> Sequence[int]:
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def _require_all(self, indices: Sequence[int], what: str):
+        """Raise unless indices cover every environment."""
+        if set(int(i) for i in indices) != set(range(self.num_envs)):
+            raise ValueError(
+                f"{what} acts on the whole batch and cannot target a subset of environments"
+            )
+
+    def _allocate_observation(self, n: int):
+        """
+        Zeroed observation for n environments.
+
+        Returns (observation, per-field buffers); they are the same dict
+        unless observations are flat, in which case the buffers are views
+        into the (n, size) array.
+        """
+        if self.flat_observations:
+            flat = np.zeros((n, self.observation_layout.size), dtype=np.float32)
+            return flat, self.observation_layout.views(flat)
+        buffers = {
+            key: np.zeros((n,) + space.shape, dtype=space.dtype)
+            for key, space in self.observation_layout.spaces.items()
+        }
+        return buffers, buffers
+
+    def _init_workspaces(self, idx: np.ndarray):
+        """Create fresh workspaces for the given environments."""
+        n_default = len(DEFAULT_CHANNELS)
+        self.n_channels[idx] = n_default
+        self.channel_member[idx] = False
+        self.channel_member[idx, :n_default] = True
+        self.current_channel[idx] = 0
+        self.unread[idx] = 0
+        self.pinned[idx] = 0
+        self.reactions[idx] = 0
+        self.clock[idx] = 0.0
+
+        self.presence[idx] = 0.0
+        online = self.rng.random((len(idx), self.n_sim_users)) < 0.7
+        self.presence[idx, :self.n_sim_users] = online
+
+        self._reset_episodes(idx)
+
+    def _reset_episodes(self, idx: np.ndarray):
+        """Clear per-episode state, keeping the workspace itself."""
+        self.msg_ids[idx] = self._empty_msg
+        self.msg_head[idx] = 0
+        self.msg_count[idx] = 0
+        self.last_msg_time[idx] = self.clock[idx]
+        self.current_step[idx] = 0
+        self.last_incoming[idx] = self._empty_msg
+        self.last_incoming_step[idx] = 0
+        self.pending[idx] = False
+
+    def _stack_actions(self, actions) -> Dict[str, np.ndarray]:
+        """Accept either a dict of arrays or a list of per-env action dicts."""
+        if isinstance(actions, dict):
+            stacked = {k: np.asarray(v) for k, v in actions.items()}
+        else:
+            stacked = {k: np.stack([a[k] for a in actions]) for k in actions[0]}
+        n = self.num_envs
+        stacked.setdefault('message_embedding', np.zeros((n, self.embedding_dim), dtype=np.float32))
+        stacked.setdefault('target_id', np.zeros(n, dtype=np.int64))
+        stacked.setdefault('emoji', np.zeros(n, dtype=np.int64))
+        return stacked
+
+    def _push_messages(self, idx: np.ndarray, msg_ids: np.ndarray):
+        """Append one message to the ring buffer of each env in idx."""
+        if len(idx) == 0:
+            return
+        slot = self.msg_head[idx]
+        self.msg_ids[idx, slot] = msg_ids
+        self.msg_head[idx] = (slot + 1) % HISTORY_LEN
+        self.msg_count[idx] += 1
+        self.last_msg_time[idx] = self.clock[idx]
+
+    def _execute_actions(self, actions: Dict[str, np.ndarray]) -> np.ndarray:
+        """Apply a batch of actions and return per-env success flags."""
+        action_type = actions['action_type'].astype(np.int64)
+        target_id = actions['target_id'].astype(np.int64)
+        has_message = self.msg_count > 0
+        n = self.num_envs
+
+        success = np.zeros(n, dtype=bool)
+
+        # 0: Send message -> replies of all senders decoded in one batch
+        send = action_type == 0
+        if send.any():
+            idx = np.flatnonzero(send)
+            replies = self._agent_msg_offset + self.decoder.decode_batch(actions['message_embedding'][idx])
+            self._push_messages(idx, replies)
+            self._reply_ids[idx] = replies
+            success[idx] = True
+
+        # 1: React / 6: Pin / 7: Search need an existing message
+        react = (action_type == 1) & has_message
+        self.reactions += react
+        pin = (action_type == 6) & has_message
+        self.pinned += pin
+        search = (action_type == 7) & has_message
+        success |= react | pin | search
+
+        # 2: Create channel
+        create = (action_type == 2) & (self.n_channels < MAX_CHANNELS)
+        if create.any():
+            idx = np.flatnonzero(create)
+            self.channel_member[idx, self.n_channels[idx]] = True
+            self.n_channels[idx] += 1
+            success[idx] = True
+
+        # 3: Join channel
+        join = action_type == 3
+        if join.any():
+            idx = np.flatnonzero(join)
+            channel = target_id[idx] % self.n_channels[idx]
+            self.channel_member[idx, channel] = True
+            self.current_channel[idx] = channel
+            success[idx] = True
+
+        # 4: Send DM / 8: No action
+        success |= (action_type == 4) | (action_type == 8)
+
+        # 5: Mark as read
+        mark = action_type == 5
+        if mark.any():
+            idx = np.flatnonzero(mark)
+            self.unread[idx, self.current_channel[idx]] = 0
+            success[idx] = True
+
+        return success
+
+    def _simulate_traffic(self):
+        """Teammates post messages and change presence in every workspace."""
+        n = self.num_envs
+        rng = self.rng
+
+        posted = rng.random(n) < self.message_rate
+        if posted.any():
+            idx = np.flatnonzero(posted)
+            channel = (rng.random(len(idx)) * self.n_channels[idx]).astype(np.int64)
+            member = self.channel_member[idx, channel]
+            self.unread[idx[member], channel[member]] += 1
+
+            # Only messages in the current channel reach the agent's feed
+            visible = channel == self.current_channel[idx]
+            seen = idx[visible]
+            msg_ids = rng.integers(0, len(SIM_MESSAGES), size=len(seen))
+            self._push_messages(seen, msg_ids)
+            self.last_incoming[seen] = msg_ids
+            self.last_incoming_step[seen] = self.current_step[seen]
+            self.pending[seen] = True
+
+        flip = rng.random(n) < self.presence_flip_rate * self.n_sim_users
+        if flip.any():
+            idx = np.flatnonzero(flip)
+            user = rng.integers(0, self.n_sim_users, size=len(idx))
+            self.presence[idx, user] = 1.0 - self.presence[idx, user]
+
+    def _act_and_score(self, actions: Dict[str, np.ndarray]):
+        """
+        Apply the actions and score them with the reward kernel.
+
+        Fills one transition row per environment, computing only the
+        fields the kernel reads. Returns (rewards, success).
+        """
+        fields = self.reward_kernel.fields
+        t = self._transitions
+        incoming = self.last_incoming
+        pending = self.pending.copy()
+        t['pending'][:] = pending
+        if 'latency' in fields:
+            np.subtract(self.current_step, self.last_incoming_step, out=t['latency'], casting='unsafe')
+        if 'label' in fields:
+            np.take(self.bank_labels, incoming, out=t['label'])
+        if 'target_channel' in fields:
+            np.take(self.bank_channels, incoming, out=t['target_channel'])
+
+        action_type = actions['action_type']
+        success = self._execute_actions(actions)
+        t['action_type'][:] = action_type
+        t['success'][:] = success
+
+        if 'relevance' in fields:
+            relevance = t['relevance']
+            relevance.fill(0.0)
+            idx = np.flatnonzero((action_type == 0) & pending)
+            if len(idx):
+                relevance[idx] = np.einsum(
+                    'ij,ij->i',
+                    self.message_bank[self._reply_ids[idx]],
+                    self.message_bank[incoming[idx]]
+                )
+        if 'current_channel' in fields:
+            t['current_channel'][:] = self.current_channel
+
+        rewards = self.reward_kernel(t)
+        handled = pending & success & self._handling[t['action_type']]
+        self.pending &= ~handled
+        return rewards, success
+
+    def _get_observation(self, idx: Optional[np.ndarray] = None) -> Union[Dict[str, np.ndarray], np.ndarray]:
+        """
+        Build batched observations for all (or the given) environments.
+
+        The full batch is written into preallocated buffers that are reused
+        by every step; observations for a subset are freshly allocated.
+        """
+        if idx is None:
+            idx = self._arange
+            obs, out = self._obs, self._obs_buffers
+        else:
+            obs, out = self._allocate_observation(len(idx))
+        n = len(idx)
+
+        # Ring buffer -> oldest-to-newest order
+        order = (self.msg_head[idx, None] + self._history_range) % HISTORY_LEN
+        ordered_ids = np.take_along_axis(self.msg_ids[idx], order, axis=1)
+        np.take(self.message_bank, ordered_ids, axis=0, out=out['message_history'])
+        np.take(self.message_bank, ordered_ids[:, -1], axis=0, out=out['conversation_context'])
+
+        # 1.0 for the current channel, 0.5 for other joined channels
+        channel_info = out['channel_info']
+        np.multiply(self.channel_member[idx], np.float32(0.5), out=channel_info)
+        channel_info[np.arange(n), self.current_channel[idx]] = 1.0
+
+        np.copyto(out['user_presence'], self.presence[idx])
+        np.minimum(self.unread[idx, :UNREAD_SLOTS], 100, out=out['unread_counts'])
+
+        time_since = out['time_since_last_message'][:, 0]
+        np.subtract(self.clock[idx], self.last_msg_time[idx], out=time_since)
+        np.minimum(time_since, 3600.0, out=time_since)
+        time_since[self.msg_count[idx] == 0] = 0.0
+
+        return obs
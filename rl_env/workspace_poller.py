@@ -0,0 +1,394 @@
+"""
+Workspace Poller
+================
+
+Background polling of workspace-level observation features.
+
+One daemon thread fetches channels, unread counts and presence on a fixed
+cadence and publishes them as decoded NumPy arrays, so step() reads the
+latest arrays without waiting on HTTP. Request load is set by the poll
+interval, not the step rate. New messages patch the unread counts
+between polls. Presence comes from polling only: the server sends
+``presence-update`` to a ``workspace:<id>`` room that clients never join.
+
+AsyncWorkspacePoller does the same on an asyncio loop for AsyncSlackEnv,
+where one poller is shared by all sessions of a workspace.
+
+Example usage:
+    poller = WorkspacePoller(env._poll_request, workspace_id, interval=2.0)
+    poller.start()
+    channel_info, user_presence, unread_counts = poller.features()
+    print(poller.staleness())
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Presence status -> user_presence value
+PRESENCE_VALUES = {'online': 1.0, 'active': 1.0, 'away': 0.5, 'busy': 0.5, 'dnd': 0.5}
+
+FIELDS = ('channel_info', 'user_presence', 'unread_counts')
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class WorkspacePoller:
+    """
+    Cache of channel_info, user_presence and unread_counts for one workspace.
+
+    Published arrays are read-only and never modified in place; updates
+    swap in new arrays under a lock, so a reader can keep the arrays it got.
+
+    Channel slots follow the order of the workspace's channel list, user
+    slots the order in which users were first seen.
+
+    Args:
+        request: Callable (method, path) -> response with status_code/json(),
+                 called from the polling thread, e.g. SlackGymEnv._poll_request
+        workspace_id: Workspace to poll
+        interval: Seconds between unread-count/presence polls
+        channel_interval: Seconds between channel-list polls
+        max_channels: Length of channel_info
+        max_users: Length of user_presence
+        unread_slots: Length of unread_counts
+    """
+
+    def __init__(
+        self,
+        request: Callable[..., Any],
+        workspace_id: str,
+        interval: float = 2.0,
+        channel_interval: float = 30.0,
+        max_channels: int = 20,
+        max_users: int = 50,
+        unread_slots: int = 10
+    ):
+        self.request = request
+        self.workspace_id = workspace_id
+        self.interval = interval
+        self.channel_interval = channel_interval
+        self.max_channels = max_channels
+        self.max_users = max_users
+        self.unread_slots = unread_slots
+
+        self.current_channel_id: Optional[str] = None
+        self.polls = 0
+        self.errors = 0
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._channel_ids: List[str] = []
+        self._channel_slots: Dict[str, int] = {}
+        self._user_slots: Dict[Any, int] = {}
+        self._channels_polled_at = float('-inf')
+
+        self._arrays = {
+            'channel_info': _readonly(np.zeros(max_channels, dtype=np.float32)),
+            'user_presence': _readonly(np.zeros(max_users, dtype=np.float32)),
+            'unread_counts': _readonly(np.zeros(unread_slots, dtype=np.int32))
+        }
+        self._updated_at = {field: None for field in FIELDS}
+
+    # ==================== Lifecycle ====================
+
+    def start(self):
+        """Poll once synchronously, then keep polling in a daemon thread."""
+        if self._thread is not None:
+            return
+        self.poll()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='workspace-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1.0)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ==================== Reads ====================
+
+    def features(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Latest channel_info, user_presence and unread_counts (read-only)."""
+        arrays = self._arrays
+        return arrays['channel_info'], arrays['user_presence'], arrays['unread_counts']
+
+    def staleness(self) -> Dict[str, float]:
+        """Seconds since each field was last updated (inf if never)."""
+        now = time.monotonic()
+        return {
+            field: float('inf') if updated is None else now - updated
+            for field, updated in self._updated_at.items()
+        }
+
+    # ==================== Polling ====================
+
+    def poll(self):
+        """Fetch everything due now and publish the decoded arrays."""
+        now = time.monotonic()
+        try:
+            if now - self._channels_polled_at >= self.channel_interval:
+                self._poll_channels()
+                self._channels_polled_at = now
+            self._poll_unread_counts()
+            self._poll_presence()
+            self.polls += 1
+        except Exception as e:
+            # Keep serving the last good arrays; staleness shows the gap
+            self.errors += 1
+            if self.errors == 1:
+                print(f"Workspace poll error: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def _get(self, path: str) -> Optional[Any]:
+        response = self.request('GET', path)
+        if response.status_code != 200:
+            return None
+        return response.json()
+
+    def _poll_channels(self):
+        channels = self._get(f"/api/workspaces/{self.workspace_id}/channels")
+        if channels is not None:
+            self._decode_channels(channels)
+
+    def _poll_unread_counts(self):
+        rows = self._get(f"/api/workspaces/{self.workspace_id}/unread-counts")
+        if rows is not None:
+            self._decode_unread_counts(rows)
+
+    def _poll_presence(self):
+        rows = self._get(f"/api/workspaces/{self.workspace_id}/presence")
+        if rows is not None:
+            self._decode_presence(rows)
+
+    # ==================== Replay ====================
+
+    def apply(self, path: str, payload: Any):
+        """Decode a poll response for path as if it had just been fetched (used by replay)."""
+        endpoint = path.rsplit('/', 1)[-1]
+        if endpoint == 'channels':
+            self._decode_channels(payload)
+        elif endpoint == 'unread-counts':
+            self._decode_unread_counts(payload)
+        elif endpoint == 'presence':
+            self._decode_presence(payload)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Slot assignments, current channel and published arrays, JSON-serializable."""
+        with self._lock:
+            state = {field: self._arrays[field].tolist() for field in FIELDS}
+            state['channel_ids'] = list(self._channel_ids)
+            state['user_ids'] = sorted(self._user_slots, key=self._user_slots.get)
+            state['current_channel_id'] = self.current_channel_id
+            return state
+
+    def restore(self, state: Dict[str, Any]):
+        """Load a snapshot() taken from another poller."""
+        with self._lock:
+            self._channel_ids = list(state['channel_ids'])
+            self._channel_slots = {cid: i for i, cid in enumerate(self._channel_ids)}
+            self._user_slots = {uid: i for i, uid in enumerate(state['user_ids'])}
+            self.current_channel_id = state['current_channel_id']
+            for field in FIELDS:
+                dtype = self._arrays[field].dtype
+                self._publish(field, np.array(state[field], dtype=dtype))
+
+    # ==================== Decoding ====================
+
+    def _decode_channels(self, channels: List[Dict[str, Any]]):
+        channel_ids = [c['id'] for c in channels][:self.max_channels]
+        with self._lock:
+            self._channel_ids = channel_ids
+            self._channel_slots = {cid: i for i, cid in enumerate(channel_ids)}
+            self._publish('channel_info', self._channel_info())
+
+    def _decode_unread_counts(self, rows: List[Dict[str, Any]]):
+        unread = np.zeros(self.unread_slots, dtype=np.int32)
+        with self._lock:
+            for row in rows:
+                slot = self._channel_slots.get(row.get('channel_id'))
+                if slot is not None and slot < self.unread_slots:
+                    unread[slot] = min(int(row.get('unread_count') or 0), 100)
+            self._publish('unread_counts', unread)
+
+    def _decode_presence(self, rows: List[Dict[str, Any]]):
+        presence = np.zeros(self.max_users, dtype=np.float32)
+        with self._lock:
+            for row in rows:
+                slot = self._user_slot(row.get('id'))
+                if slot is not None:
+                    presence[slot] = PRESENCE_VALUES.get(row.get('status'), 0.0)
+            self._publish('user_presence', presence)
+
+    # ==================== Socket Events ====================
+
+    def refresh_channels(self):
+        """Re-fetch the channel list on the next poll (e.g. after creating one)."""
+        self._channels_polled_at = float('-inf')
+
+    def set_current_channel(self, channel_id: Optional[str]):
+        with self._lock:
+            self.current_channel_id = channel_id
+            self._publish('channel_info', self._channel_info())
+
+    def on_message(self, data: Dict[str, Any], current_channel_id: Optional[str] = None):
+        """Count a message outside the reader's current channel as unread until the next poll."""
+        channel_id = data.get('channel_id')
+        if current_channel_id is None:
+            current_channel_id = self.current_channel_id
+        with self._lock:
+            slot = self._channel_slots.get(channel_id)
+            if channel_id == current_channel_id or slot is None or slot >= self.unread_slots:
+                return
+            unread = self._arrays['unread_counts'].copy()
+            unread[slot] = min(unread[slot] + 1, 100)
+            self._publish('unread_counts', unread)
+
+    def mark_read(self, channel_id: Optional[str]):
+        """Zero a channel's unread count after a successful mark-read."""
+        with self._lock:
+            slot = self._channel_slots.get(channel_id)
+            if slot is None or slot >= self.unread_slots:
+                return
+            unread = self._arrays['unread_counts'].copy()
+            unread[slot] = 0
+            self._publish('unread_counts', unread)
+
+    # ==================== Private Methods ====================
+
+    def _channel_info(self, current_channel_id: Optional[str] = None) -> np.ndarray:
+        """1.0 for the current channel, 0.5 for other channels. Caller holds the lock."""
+        if current_channel_id is None:
+            current_channel_id = self.current_channel_id
+        info = np.zeros(self.max_channels, dtype=np.float32)
+        info[:len(self._channel_ids)] = 0.5
+        slot = self._channel_slots.get(current_channel_id)
+        if slot is not None:
+            info[slot] = 1.0
+        return info
+
+    def _user_slot(self, user_id: Any) -> Optional[int]:
+        """Stable slot for a user, assigned on first sight. Caller holds the lock."""
+        if user_id is None:
+            return None
+        slot = self._user_slots.get(user_id)
+        if slot is None and len(self._user_slots) < self.max_users:
+            slot = self._user_slots[user_id] = len(self._user_slots)
+        return slot
+
+    def _publish(self, field: str, array: np.ndarray):
+        """Swap in a new array for field. Caller holds the lock."""
+        self._arrays = dict(self._arrays, **{field: _readonly(array)})
+        self._updated_at[field] = time.monotonic()
+
+
+class AsyncWorkspacePoller(WorkspacePoller):
+    """
+    WorkspacePoller driven by an asyncio task instead of a thread.
+
+    Shared by the sessions of one workspace: each session attach()es its
+    request coroutine and the first attached one is used for polling, so
+    the poller outlives any single session. The arrays are shared, while
+    channel_info is per session (see channel_info()).
+
+    Args:
+        workspace_id: Workspace to poll
+        **kwargs: interval, channel_interval and sizes, as for WorkspacePoller
+    """
+
+    def __init__(self, workspace_id: str, **kwargs):
+        super(AsyncWorkspacePoller, self).__init__(None, workspace_id, **kwargs)
+        self._requests: List[Callable[..., Any]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    # ==================== Sessions ====================
+
+    def attach(self, request: Callable[..., Any]):
+        """Add a session's request coroutine (method, path) -> (status, data)."""
+        self._requests.append(request)
+
+    def detach(self, request: Callable[..., Any]) -> int:
+        """Remove a session's request coroutine; returns the number still attached."""
+        if request in self._requests:
+            self._requests.remove(request)
+        return len(self._requests)
+
+    def channel_info(self, current_channel_id: Optional[str]) -> np.ndarray:
+        """channel_info as seen from a session in current_channel_id."""
+        with self._lock:
+            return self._channel_info(current_channel_id)
+
+    # ==================== Lifecycle ====================
+
+    async def start(self):
+        """Poll once, then keep polling in a task on the running loop."""
+        if self._task is not None:
+            return
+        await self.poll()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ==================== Polling ====================
+
+    async def poll(self):
+        """Fetch everything due now and publish the decoded arrays."""
+        now = time.monotonic()
+        path = f"/api/workspaces/{self.workspace_id}"
+        try:
+            if now - self._channels_polled_at >= self.channel_interval:
+                channels = await self._get(f"{path}/channels")
+                if channels is not None:
+                    self._decode_channels(channels)
+                self._channels_polled_at = now
+            rows = await self._get(f"{path}/unread-counts")
+            if rows is not None:
+                self._decode_unread_counts(rows)
+            rows = await self._get(f"{path}/presence")
+            if rows is not None:
+                self._decode_presence(rows)
+            self.polls += 1
+        except Exception as e:
+            # Keep serving the last good arrays; staleness shows the gap
+            self.errors += 1
+            if self.errors == 1:
+                print(f"Workspace poll error: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.poll()
+
+    async def _get(self, path: str) -> Optional[Any]:
+        if not self._requests:
+            return None
+        status, data = await self._requests[0]('GET', path)
+        return data if status == 200 else None